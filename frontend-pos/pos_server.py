@@ -17,7 +17,6 @@ import time
 import os
 from pathlib import Path
 from datetime import datetime, timedelta
-from collections import defaultdict
 from typing import Optional
 
 from fastapi import FastAPI, Request, Depends, HTTPException, status, Response
@@ -32,6 +31,7 @@ if str(project_root) not in sys.path:
 # ----------------------------------------------
 
 from src.payment.dao import FacturaDAO
+from src.db.shared_state import RateLimiter, get_shared_state
 from src.auth.security import (
     create_access_token,
     create_refresh_token,
@@ -56,10 +56,11 @@ FAKE_USERS_DB = {
     }
 }
 
-# --- Rate Limiter simple en memoria ---
-rate_limiter = defaultdict(list)
+# --- Rate Limiter en el estado compartido (global entre workers) ---
 RATE_LIMIT_MAX_CALLS = 5
 RATE_LIMIT_TIMEFRAME = timedelta(minutes=1)
+rate_limiter = RateLimiter(get_shared_state(), "pos_token", RATE_LIMIT_MAX_CALLS,
+                           RATE_LIMIT_TIMEFRAME.total_seconds())
 
 # --- Inicialización de la App y Plantillas ---
 app = FastAPI(
@@ -73,16 +74,14 @@ templates = Jinja2Templates(directory=Path(__file__).parent / "templates")
 @app.middleware("http")
 async def simple_rate_limiter(request: Request, call_next):
     client_ip = request.client.host
-    current_time = datetime.utcnow()
-    rate_limiter[client_ip] = [t for t in rate_limiter[client_ip] if current_time - t < RATE_LIMIT_TIMEFRAME]
     
     if request.url.path == "/auth/token":
-        if len(rate_limiter[client_ip]) >= RATE_LIMIT_MAX_CALLS:
+        if rate_limiter.exceeded(client_ip):
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 detail="Demasiadas solicitudes. Inténtalo de nuevo más tarde."
             )
-        rate_limiter[client_ip].append(current_time)
+        rate_limiter.hit(client_ip)
     
     response = await call_next(request)
     return response
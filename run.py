@@ -7,6 +7,7 @@ Uso:
     python run.py --frontend         # Ejecutar frontend Streamlit
     python run.py --web-frontend     # Ejecutar NUESTRO frontend de TPV
     python run.py --init-db          # Inicializar base de datos
+    python run.py --prod --workers 4 # API en producción con varios workers
     python run.py --help             # Mostrar ayuda
 """
 
@@ -41,6 +42,55 @@ def run_api():
         print("\n👋 API detenida")
 
 
+def default_workers() -> int:
+    """
+    Workers por defecto para --prod
+
+    Con estado en memoria solo 1 (varios procesos no lo comparten); con un
+    backend compartido, ``API_WORKERS`` o el número de núcleos.
+    """
+    from src.db.shared_state import is_external_state
+
+    if not is_external_state():
+        return 1
+    return int(os.getenv("API_WORKERS", os.cpu_count() or 1))
+
+
+def run_api_production(workers: int, host: str, port: int, app: str):
+    """
+    Ejecutar la API con varios workers de uvicorn (sin recarga)
+
+    Con más de un worker el estado compartido (ETag, carritos, eventos de
+    escaneo, límites de login) debe estar en un servidor compatible con
+    Redis: ``SHARED_STATE_URL=redis://localhost:6379/0``.
+    """
+    from src.db.shared_state import is_external_state, prepare_workers
+
+    if workers > 1 and not is_external_state():
+        print("❌ Con más de un worker se necesita SHARED_STATE_URL=redis://... "
+              "(el estado en memoria no se comparte entre procesos)")
+        sys.exit(1)
+
+    # Migraciones una sola vez, antes de que los workers compitan por aplicarlas
+    prepare_workers(workers)
+
+    print(f"🚀 Iniciando {app} con {workers} workers en http://{host}:{port}")
+    print("⏹️  Presiona Ctrl+C para detener")
+    print("-" * 50)
+
+    try:
+        subprocess.run([
+            sys.executable, "-m", "uvicorn",
+            app,
+            "--host", host,
+            "--port", str(port),
+            "--workers", str(workers),
+            "--log-level", os.getenv("LOG_LEVEL", "info").lower()
+        ])
+    except KeyboardInterrupt:
+        print("\n👋 API detenida")
+
+
 def run_pos_frontend():
     """Ejecutar el frontend del TPV con login"""
     print("🌐 Iniciando Frontend del TPV (ScanPay POS)...")
@@ -88,6 +138,16 @@ def main():
                        help="Ejecutar el frontend del TPV ScanPay POS")
     parser.add_argument("--init-db", action="store_true", 
                        help="Inicializar base de datos")
+    parser.add_argument("--prod", action="store_true",
+                       help="Ejecutar la API en modo producción (varios workers, sin recarga)")
+    parser.add_argument("--workers", type=int,
+                       default=default_workers(),
+                       help="Número de workers para --prod (por defecto 1 con estado en memoria; "
+                            "con SHARED_STATE_URL compartido, API_WORKERS o núcleos)")
+    parser.add_argument("--app", default="src.api.main_advanced:app",
+                       help="Aplicación ASGI para --prod")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8001")))
     # Se mantienen otros argumentos por si son necesarios, pero se simplifica el menú
     # para enfocarnos en el TPV
     
@@ -97,6 +157,8 @@ def main():
         run_pos_frontend()
     elif args.init_db:
         init_database()
+    elif args.prod:
+        run_api_production(args.workers, args.host, args.port, args.app)
     else:
         # Por defecto, si no se especifica --web-frontend, mostramos ayuda.
         parser.print_help()
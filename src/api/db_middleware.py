@@ -0,0 +1,62 @@
+"""
+Middleware de unidad de trabajo de base de datos
+
+Abre una ``UnitOfWork`` por request HTTP y la cierra cuando la respuesta
+termina de enviarse (incluidas las respuestas en streaming). Al terminar
+registra el perfil de consultas en ``db.query_stats`` (con aviso de N+1) y
+deja la unidad de trabajo en ``request.state.db`` para los middlewares
+externos. Con ``DEBUG=true`` agrega a la respuesta la cantidad de consultas
+SQL, su tiempo total y el tiempo de vida de la sesión:
+
+- ``X-DB-Query-Count``
+- ``X-DB-Query-Ms``
+- ``X-DB-Session-Ms``
+"""
+
+import logging
+import os
+
+from ..db.database import SessionLocal
+from ..db.query_stats import get_query_stats, route_key
+from ..db.unit_of_work import unit_of_work
+
+logger = logging.getLogger(__name__)
+
+
+def debug_enabled() -> bool:
+    return os.getenv("DEBUG", "false").lower() == "true"
+
+
+class UnitOfWorkMiddleware:
+    """Middleware ASGI: una sesión compartida por request"""
+
+    def __init__(self, app, session_factory=None, expose_headers=None):
+        self.app = app
+        self.session_factory = session_factory or SessionLocal
+        self.expose_headers = debug_enabled() if expose_headers is None else expose_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with unit_of_work(self.session_factory) as uow:
+            # Visible como request.state.db fuera de este middleware
+            scope.setdefault("state", {})["db"] = uow
+
+            async def send_with_metrics(message):
+                if message["type"] == "http.response.start" and self.expose_headers:
+                    headers = list(message.get("headers", []))
+                    for name, value in uow.metrics_headers().items():
+                        headers.append((name.lower().encode("latin-1"), value.encode("latin-1")))
+                    message["headers"] = headers
+                await send(message)
+
+            await self.app(scope, receive, send_with_metrics)
+
+        if uow.query_count:
+            get_query_stats().record(scope.get("method"), route_key(scope), uow)
+            logger.debug(
+                f"{scope.get('method')} {scope.get('path')} - "
+                f"{uow.query_count} consultas ({uow.query_ms:.2f}ms), sesión {uow.session_ms:.2f}ms"
+            )
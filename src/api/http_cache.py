@@ -0,0 +1,75 @@
+"""
+Utilidades de caché HTTP: ETag fuerte y GET condicional
+
+El ETag combina la versión del espacio de nombres (ver
+``db.data_version``) con un hash de la ruta y los parámetros, así cada
+página o filtro tiene su propia etiqueta pero todas se invalidan juntas
+cuando cambian los datos. En SQLite la versión la mantienen triggers en la
+base, así también la invalidan las escrituras de otros procesos.
+"""
+
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+from ..db.data_version import get_data_versions
+
+# Los datos cambian en cualquier momento: el cliente guarda la respuesta
+# pero siempre revalida (la revalidación con 304 es casi gratuita)
+DEFAULT_CACHE_CONTROL = "no-cache"
+
+
+def make_etag(request: Request, namespace: str) -> str:
+    """
+    Calcula el ETag de una petición (a lo sumo una consulta por clave primaria)
+
+    Args:
+        request: Petición entrante (la ruta y la query forman parte del ETag)
+        namespace: Espacio de nombres de versión ("catalog", "config")
+
+    Returns:
+        ETag fuerte entre comillas
+    """
+    version = get_data_versions().get(namespace)
+    variant = hashlib.sha1(f"{request.url.path}?{request.url.query}".encode()).hexdigest()[:12]
+    return f'"{namespace}-{version}-{variant}"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Comparación débil (RFC 9110): se ignora el prefijo W/
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+
+def conditional_get(
+    request: Request,
+    response: Response,
+    namespace: str,
+    cache_control: str = DEFAULT_CACHE_CONTROL,
+) -> Optional[Response]:
+    """
+    Aplica las cabeceras de caché y resuelve ``If-None-Match``
+
+    Uso dentro de un endpoint, antes de cualquier consulta::
+
+        not_modified = conditional_get(request, response, "catalog")
+        if not_modified:
+            return not_modified
+
+    Returns:
+        Respuesta 304 si el cliente ya tiene la versión actual, None si hay
+        que generar el contenido (las cabeceras ya quedan en ``response``)
+    """
+    etag = make_etag(request, namespace)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return None
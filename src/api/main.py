@@ -5,9 +5,18 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 from contextlib import asynccontextmanager
 
-from ..db.database import create_tables
-from ..db.init_db import init_database
-from .routes import productos, scanner, auth, usb_scanner, printer
+from ..db.database import engine, read_engine
+from ..db.async_database import dispose_async_engine
+from ..db.pool_metrics import get_pool_metrics
+from ..db.search_index import ensure_search_index
+from ..db.category_index import ensure_category_index
+from ..db.change_log import ensure_change_log
+from ..db.data_version import get_data_versions
+from ..db.init_db import seed_database
+from ..db.schema_migrations import ensure_schema
+from ..db.sqlite_pragmas import get_sqlite_settings
+from .db_middleware import UnitOfWorkMiddleware
+from .routes import productos, scanner, auth, usb_scanner, printer, debug
 
 # Configurar logging
 logging.basicConfig(
@@ -24,13 +33,29 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 Iniciando API Escáner de Códigos de Barras...")
     
     try:
-        # Crear tablas de base de datos
-        create_tables()
-        logger.info("✅ Tablas de base de datos verificadas")
+        # Migraciones pendientes (con la base al día solo compara la revisión)
+        schema = ensure_schema(engine)
+        logger.info(f"✅ Esquema de base de datos en la revisión {schema.current}")
         
-        # Inicializar con datos de ejemplo si es la primera vez
-        init_database()
-        logger.info("✅ Base de datos inicializada")
+        # Datos de ejemplo solo al crear la base por primera vez
+        if schema.upgraded and schema.previous is None:
+            seed_database()
+            logger.info("✅ Base de datos inicializada")
+        
+        # Índice de búsqueda de productos (FTS5)
+        ensure_search_index(engine)
+        logger.info("✅ Índice de búsqueda verificado")
+        
+        # Registro de cambios para sincronización de carriles
+        ensure_change_log(engine)
+        logger.info("✅ Registro de cambios del catálogo verificado")
+        
+        # Índice materializado de categorías
+        ensure_category_index(engine)
+        logger.info("✅ Índice de categorías verificado")
+        
+        # Versiones de datos para ETag (antes de atender peticiones)
+        get_data_versions()
         
     except Exception as e:
         logger.error(f"❌ Error durante inicialización: {e}")
@@ -40,6 +65,7 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("🔄 Cerrando aplicación...")
+    await dispose_async_engine()
 
 
 # Crear aplicación FastAPI
@@ -74,6 +100,9 @@ app = FastAPI(
 )
 
 # Configurar CORS para permitir peticiones desde frontend
+# Una sesión de base de datos compartida por request
+app.add_middleware(UnitOfWorkMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # En producción, especificar dominios específicos
@@ -88,6 +117,7 @@ app.include_router(scanner.router, prefix="/api/v1")
 app.include_router(usb_scanner.router, prefix="/api/v1")
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(printer.router, prefix="/api/v1")
+app.include_router(debug.router)
 
 
 @app.get("/")
@@ -102,7 +132,12 @@ async def health_check():
     return {
         "status": "healthy",
         "message": "API Escáner de Códigos de Barras funcionando correctamente",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "sqlite": get_sqlite_settings(engine),
+        "pool": {
+            "primary": get_pool_metrics(engine),
+            "read": get_pool_metrics(read_engine) if read_engine is not engine else None
+        }
     }
 
 
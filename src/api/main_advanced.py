@@ -7,16 +7,23 @@ Incluye autenticación JWT, gestión de ventas, usuarios y reportes
 import os
 import logging
 import time
-from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 from fastapi.security import HTTPBearer
 from contextlib import asynccontextmanager
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.orm import Session
 
-from ..db.models_advanced import Base, User, Producto, SystemConfig, UserRole
-from ..db.database import get_db_engine
-from .routes import auth_advanced, sales, printer
+from ..db.models_advanced import User, Producto, SystemConfig, UserRole
+from ..db.database import get_db, get_read_db, get_db_engine, read_engine
+from ..db.async_database import dispose_async_engine
+from ..db.pool_metrics import get_pool_metrics
+from ..db.schema_migrations import ensure_schema
+from ..db.data_version import get_data_versions
+from ..db.sqlite_pragmas import get_sqlite_settings
+from .db_middleware import UnitOfWorkMiddleware
+from .routes import auth_advanced, sales, printer, cart, debug
+from .http_cache import conditional_get
 from ..backup import backup_router, init_backup_manager
 
 # Configurar logging
@@ -30,15 +37,6 @@ logger = logging.getLogger(__name__)
 DB_NAME = os.getenv("ADVANCED_DB_NAME", "inventario_pos_advanced.db")
 engine = get_db_engine()
 
-# Dependency para sesión de DB
-def get_db():
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -53,13 +51,13 @@ async def lifespan(app: FastAPI):
             logger.info("💡 Ejecuta 'python create_advanced_pos.py' primero")
             raise FileNotFoundError(f"Database {DB_NAME} not found")
         
-        # Crear/verificar tablas
-        Base.metadata.create_all(bind=engine)
-        logger.info("✅ Esquema de base de datos verificado")
+        # Migraciones pendientes (con la base al día solo compara la revisión);
+        # la revisión 0003 crea las configuraciones por defecto del sistema
+        schema = ensure_schema(engine)
+        logger.info(f"✅ Esquema de base de datos en la revisión {schema.current}")
         
-        # Verificar configuraciones del sistema
-        await verify_system_config()
-        logger.info("✅ Configuraciones del sistema verificadas")
+        # Versiones de datos para ETag (antes de atender peticiones)
+        get_data_versions()
         
         # Inicializar sistema de backup
         backup_config = {
@@ -82,37 +80,7 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("🔄 Cerrando API POS Avanzada...")
-
-
-async def verify_system_config():
-    """Verificar que existan configuraciones básicas del sistema"""
-    db_gen = get_db()
-    db = next(db_gen)
-    
-    try:
-        # Verificar configuraciones esenciales
-        essential_configs = [
-            ("business_name", "INVENTARIO BARRAS"),
-            ("tax_rate", "16.00"),
-            ("printer_mode", "file")
-        ]
-        
-        for key, default_value in essential_configs:
-            config = db.query(SystemConfig).filter_by(key=key).first()
-            if not config:
-                new_config = SystemConfig(
-                    key=key,
-                    value=default_value,
-                    description=f"Auto-created {key}",
-                    category="system"
-                )
-                db.add(new_config)
-                logger.info(f"✅ Configuración creada: {key}")
-        
-        db.commit()
-        
-    finally:
-        db.close()
+    await dispose_async_engine()
 
 
 # Crear aplicación FastAPI
@@ -159,6 +127,9 @@ app = FastAPI(
 )
 
 # Configurar CORS
+# Una sesión de base de datos compartida por request
+app.add_middleware(UnitOfWorkMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # En producción especificar dominios
@@ -170,8 +141,10 @@ app.add_middleware(
 # Incluir rutas
 app.include_router(auth_advanced.router, prefix="/api/v1")
 app.include_router(sales.router, prefix="/api/v1")
+app.include_router(cart.router, prefix="/api/v1")
 app.include_router(printer.router, prefix="/api/v1")
 app.include_router(backup_router, prefix="/api/v1")
+app.include_router(debug.router)
 
 
 @app.get("/")
@@ -187,7 +160,12 @@ async def health_check():
         "status": "healthy",
         "message": "API POS Avanzada funcionando correctamente",
         "version": "2.0.0",
-        "database": DB_NAME
+        "database": DB_NAME,
+        "sqlite": get_sqlite_settings(engine),
+        "pool": {
+            "primary": get_pool_metrics(engine),
+            "read": get_pool_metrics(read_engine) if read_engine is not engine else None
+        }
     }
 
 
@@ -209,6 +187,7 @@ async def api_info():
         "endpoints": {
             "authentication": "/api/v1/auth",
             "sales": "/api/v1/sales",
+            "cart": "/api/v1/cart",
             "printer": "/api/v1/printer",
             "backup": "/api/v1/backup",
             "docs": "/docs",
@@ -224,9 +203,13 @@ async def api_info():
 
 
 @app.get("/api/v1/system/config")
-async def get_system_config(db: Session = Depends(get_db)):
+async def get_system_config(request: Request, response: Response, db: Session = Depends(get_db)):
     """Obtener configuraciones del sistema (público)"""
     
+    not_modified = conditional_get(request, response, "config")
+    if not_modified:
+        return not_modified
+    
     public_configs = db.query(SystemConfig).filter(
         SystemConfig.category.in_(["business", "pos"])
     ).all()
@@ -242,7 +225,7 @@ async def get_system_config(db: Session = Depends(get_db)):
 
 
 @app.get("/api/v1/stats/overview")
-async def get_overview_stats(db: Session = Depends(get_db)):
+async def get_overview_stats(db: Session = Depends(get_read_db)):
     """Estadísticas generales del sistema (público)"""
     
     from ..db.models_advanced import Sale, Customer, SaleStatus
@@ -326,10 +309,14 @@ async def log_requests(request: Request, call_next):
     response = await call_next(request)
     process_time = time.time() - start_time
     
+    # Consultas SQL del request (UnitOfWorkMiddleware)
+    uow = getattr(request.state, "db", None)
+    queries = f" - Queries: {uow.query_count} ({uow.query_ms:.1f}ms)" if uow is not None else ""
+    
     logger.info(
         f"{request.method} {request.url} - "
         f"Status: {response.status_code} - "
-        f"Time: {process_time:.4f}s"
+        f"Time: {process_time:.4f}s{queries}"
     )
     
     return response
@@ -358,10 +345,15 @@ if __name__ == "__main__":
     ╚══════════════════════════════════════════════╝
     """)
     
+    # Con API_WORKERS > 1 se desactiva la recarga (ver ``run.py --prod``);
+    # sin estado compartido externo se queda en un worker
+    from ..db.shared_state import prepare_workers
+    workers = prepare_workers(int(os.getenv("API_WORKERS", "1")))
     uvicorn.run(
         "src.api.main_advanced:app",
         host=host,
         port=port,
-        reload=True,
+        reload=workers == 1,
+        workers=workers,
         log_level=os.getenv("LOG_LEVEL", "info").lower()
     )
\ No newline at end of file
@@ -3,9 +3,9 @@ Advanced Authentication and User Management
 Sistema completo de autenticación JWT con roles y permisos
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional
 from datetime import datetime, timedelta
@@ -14,7 +14,9 @@ import bcrypt
 import os
 
 from ...db.models_advanced import User, AuditLog, UserRole
-from ...db.database import get_db_engine
+from ...db.database import get_db
+from ...db.repositories import UserRepository
+from ...db.shared_state import RateLimiter, get_shared_state
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -25,18 +27,26 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 security = HTTPBearer()
 
-# Dependency para obtener sesión de DB
-def get_db():
-    engine = get_db_engine()
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Intentos fallidos de login por IP y usuario antes de bloquear (ventana fija)
+LOGIN_MAX_ATTEMPTS = int(os.getenv("LOGIN_MAX_ATTEMPTS", "10"))
+LOGIN_LOCKOUT_SECONDS = int(os.getenv("LOGIN_LOCKOUT_SECONDS", "300"))
 
 # === UTILIDADES DE AUTENTICACIÓN ===
 
+def get_login_limiter() -> RateLimiter:
+    """Límite de intentos fallidos, compartido por todos los workers"""
+    return RateLimiter(get_shared_state(), "login", LOGIN_MAX_ATTEMPTS, LOGIN_LOCKOUT_SECONDS)
+
+def login_attempt_key(request: Request, username: str) -> str:
+    """
+    Clave del límite de login: IP del cliente + usuario
+
+    Un atacante que prueba contraseñas contra un usuario queda bloqueado
+    desde su IP sin dejar al usuario legítimo fuera de su propia caja.
+    """
+    client_ip = request.client.host if request.client else "unknown"
+    return f"{client_ip}:{username}"
+
 def hash_password(password: str) -> str:
     """Hash de password con bcrypt"""
     salt = bcrypt.gensalt()
@@ -85,7 +95,7 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             detail="Could not validate credentials"
         )
     
-    user = db.query(User).filter(User.username == username).first()
+    user = UserRepository(db).get_by_username(username)
     if user is None or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -151,12 +161,21 @@ class UserResponse(BaseModel):
 # === ENDPOINTS DE AUTENTICACIÓN ===
 
 @router.post("/login", response_model=TokenResponse)
-async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, request: Request, db: Session = Depends(get_db)):
     """Autenticar usuario y generar token JWT"""
     
+    limiter = get_login_limiter()
+    attempt_key = login_attempt_key(request, login_data.username)
+    if limiter.exceeded(attempt_key):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts, try again later"
+        )
+    
     # Buscar usuario
-    user = db.query(User).filter(User.username == login_data.username).first()
+    user = UserRepository(db).get_by_username(login_data.username)
     if not user or not verify_password(login_data.password, user.password_hash):
+        limiter.hit(attempt_key)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password"
@@ -168,6 +187,8 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
             detail="User account is inactive"
         )
     
+    limiter.reset(attempt_key)
+    
     # Crear token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -234,10 +255,10 @@ async def create_user(
     """Crear nuevo usuario (solo Admin/Manager)"""
     
     # Verificar que username y email no existan
-    if db.query(User).filter(User.username == user_data.username).first():
+    if UserRepository(db).get_by_username(user_data.username):
         raise HTTPException(status_code=400, detail="Username already exists")
     
-    if db.query(User).filter(User.email == user_data.email).first():
+    if UserRepository(db).get_by_email(user_data.email):
         raise HTTPException(status_code=400, detail="Email already exists")
     
     # Crear usuario
@@ -301,7 +322,7 @@ async def get_user(
 ):
     """Obtener usuario específico"""
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = UserRepository(db).get(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -316,7 +337,7 @@ async def update_user(
 ):
     """Actualizar usuario"""
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = UserRepository(db).get(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -361,7 +382,7 @@ async def delete_user(
     if user_id == current_user.id:
         raise HTTPException(status_code=400, detail="Cannot delete your own account")
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = UserRepository(db).get(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -0,0 +1,203 @@
+"""
+API Routes for Lane Carts
+Carritos de venta en memoria por carril: escaneo, edición y cobro
+"""
+
+import logging
+
+from fastapi import APIRouter, HTTPException, Depends, Header, Path, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Annotated, List, Optional
+from pydantic import BaseModel, Field
+
+from ...cart import get_cart_manager, ProductNotFoundError, OutOfStockError
+from ...scanner.scan_events import stream_events
+from .sales import get_db, process_sale, CreateSaleRequest, SaleItemRequest, PaymentRequest
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/cart", tags=["cart"])
+
+# El carril se guarda en columnas String(20) (secuencias de venta, reservas
+# y movimientos de stock) y forma parte del número de venta
+LANE_ID_MAX_LENGTH = 20
+LaneId = Annotated[str, Path(max_length=LANE_ID_MAX_LENGTH, pattern=r"^[A-Za-z0-9_-]+$",
+                             description="Identificador del carril (letras, números, - y _)")]
+
+# === MODELOS PYDANTIC ===
+
+class CartScanRequest(BaseModel):
+    codigo_barra: str
+    quantity: int = Field(default=1, ge=1)
+
+class CartQuantityRequest(BaseModel):
+    quantity: int = Field(ge=0)
+
+class CheckoutRequest(BaseModel):
+    cashier_username: str
+    customer_code: Optional[str] = None
+    payments: List[PaymentRequest]
+    notes: Optional[str] = None
+
+
+# === ENDPOINTS ===
+
+@router.get("/")
+async def get_carts_status():
+    """Resumen de los carritos abiertos por carril"""
+    return get_cart_manager().get_status()
+
+
+@router.get("/{lane_id}")
+async def get_cart(lane_id: LaneId):
+    """Obtener el carrito actual de un carril"""
+    return get_cart_manager().get_cart(lane_id).to_dict()
+
+
+@router.post("/{lane_id}/scan")
+async def scan_to_cart(lane_id: LaneId, scan_request: CartScanRequest):
+    """Agregar un código escaneado al carrito del carril"""
+    try:
+        return get_cart_manager().scan(lane_id, scan_request.codigo_barra, scan_request.quantity)
+    except ProductNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Producto {scan_request.codigo_barra} no encontrado")
+    except OutOfStockError:
+        raise HTTPException(status_code=409, detail=f"Stock insuficiente para {scan_request.codigo_barra}")
+
+
+@router.put("/{lane_id}/items/{codigo_barra}")
+async def update_cart_item(lane_id: LaneId, codigo_barra: str, update: CartQuantityRequest):
+    """Cambiar la cantidad de una línea (0 la elimina)"""
+    try:
+        return get_cart_manager().set_quantity(lane_id, codigo_barra, update.quantity)
+    except ProductNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Producto {codigo_barra} no está en el carrito")
+    except OutOfStockError:
+        raise HTTPException(status_code=409, detail=f"Stock insuficiente para {codigo_barra}")
+
+
+@router.delete("/{lane_id}/items/{codigo_barra}")
+async def remove_cart_item(lane_id: LaneId, codigo_barra: str):
+    """Eliminar una línea del carrito"""
+    try:
+        return get_cart_manager().remove_line(lane_id, codigo_barra)
+    except ProductNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Producto {codigo_barra} no está en el carrito")
+
+
+@router.delete("/{lane_id}")
+async def clear_cart(lane_id: LaneId):
+    """Vaciar el carrito del carril"""
+    return get_cart_manager().clear(lane_id)
+
+
+@router.get("/{lane_id}/events")
+async def cart_events(
+    lane_id: LaneId,
+    request: Request,
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Flujo Server-Sent Events con el carrito actualizado tras cada cambio
+    
+    Cada evento ``cart`` trae el carrito completo, por lo que la UI solo
+    tiene que pintarlo; ``not_found`` avisa de códigos desconocidos.
+    """
+    return StreamingResponse(
+        stream_events(
+            get_cart_manager().get_events(lane_id),
+            last_event_id=last_event_id,
+            is_disconnected=request.is_disconnected
+        ),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+@router.post("/{lane_id}/checkout")
+def checkout_cart(lane_id: LaneId, checkout: CheckoutRequest, db: Session = Depends(get_db)):
+    """
+    Cobrar el carrito: se persiste completo como venta en una sola transacción
+    """
+    manager = get_cart_manager()
+    
+    # Un cobro a la vez por carril: de la lectura del carrito hasta descontarlo
+    with manager.checkout_lock(lane_id):
+        cart = manager.get_cart(lane_id).to_dict()
+        
+        if not cart["lines"]:
+            raise HTTPException(status_code=400, detail="El carrito está vacío")
+        
+        sale_request = CreateSaleRequest(
+            cashier_username=checkout.cashier_username,
+            customer_code=checkout.customer_code,
+            items=[
+                SaleItemRequest(
+                    codigo_barra=line["codigo_barra"],
+                    quantity=line["quantity"],
+                    unit_price=line["unit_price"]
+                )
+                for line in cart["lines"]
+            ],
+            payments=checkout.payments,
+            notes=checkout.notes
+        )
+        
+        result = process_sale(sale_request, db, lane_id=lane_id)
+        
+        # Solo se descuenta lo cobrado; escaneos posteriores siguen en el carrito.
+        # La venta ya está confirmada: un fallo aquí no puede convertirse en un 500
+        try:
+            manager.consume(lane_id, {line["codigo_barra"]: line["quantity"] for line in cart["lines"]})
+        except Exception as e:
+            logger.error(f"❌ Venta {result.get('sale_number')} registrada pero no se pudo actualizar el carrito {lane_id}: {e}")
+    
+    return result
+
+
+@router.post("/{lane_id}/scanner/attach")
+async def attach_scanner(lane_id: LaneId):
+    """
+    Conectar el scanner físico (USB-HID o serial) al carrito del carril
+    
+    Cada código leído se agrega directamente al carrito en memoria y se
+    publica por ``/cart/{lane_id}/events``, sin pasar por el navegador.
+    """
+    from .usb_scanner import get_scanner_instance
+    from ...scanner.scanner_owner import get_scanner_ownership
+    
+    manager = get_cart_manager()
+    scanner = get_scanner_instance()
+    
+    def on_barcode_scanned(barcode_data: str):
+        try:
+            manager.scan(lane_id, barcode_data)
+        except (ProductNotFoundError, OutOfStockError):
+            # Ya se publicó el evento not_found / out_of_stock del carril
+            pass
+    
+    def start() -> bool:
+        scanner.set_barcode_callback(on_barcode_scanned)
+        return scanner.is_listening or scanner.start_listening()
+    
+    # Solo el worker dueño del hardware puede redirigir sus lecturas
+    try:
+        owner = get_scanner_ownership().acquire(scanner, start)
+    except RuntimeError:
+        raise HTTPException(status_code=500, detail="No se pudo iniciar el scanner")
+    if owner:
+        raise HTTPException(
+            status_code=409,
+            detail={"error": "Scanner en uso por otro worker", "owner_worker": owner["worker"]}
+        )
+    
+    return {
+        "status": "success",
+        "message": f"Scanner conectado al carril {lane_id}",
+        "scanner": scanner.get_status()
+    }
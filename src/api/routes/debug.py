@@ -0,0 +1,35 @@
+"""
+API Routes for Debugging
+Perfil de consultas SQL por endpoint (solo con DEBUG=true)
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from ..db_middleware import debug_enabled
+from ...db.query_stats import get_query_stats
+
+router = APIRouter(prefix="/debug", tags=["Debug"])
+
+
+def require_debug():
+    """Los endpoints de depuración no existen fuera de DEBUG=true"""
+    if not debug_enabled():
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@router.get("/queries", dependencies=[Depends(require_debug)])
+async def get_queries_report():
+    """
+    Consultas SQL por endpoint
+
+    Promedio y máximo de consultas por request, tiempo promedio en base de
+    datos, requests con posible N+1 y el detalle de los últimos requests.
+    """
+    return get_query_stats().report()
+
+
+@router.delete("/queries", dependencies=[Depends(require_debug)])
+async def reset_queries_report():
+    """Reiniciar las estadísticas de consultas"""
+    get_query_stats().reset()
+    return {"message": "Estadísticas de consultas reiniciadas"}
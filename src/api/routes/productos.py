@@ -1,41 +1,179 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import io
+import json
+from typing import Dict, Iterator, List, Optional, Tuple
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
-from ...db.database import get_db
+from ...db.database import get_db, SessionLocal
+from ...db.async_database import get_async_db
+from ...db.async_repositories import AsyncProductoRepository
 from ...db.models import Producto as ProductoModel
-from ..schemas import Producto, ProductoCreate, ProductoUpdate, ErrorResponse
+from ...db.category_index import get_categories, get_category_tree
+from ...db.repositories import ProductoRepository
+from ...db.change_log import OP_DELETE, OP_UPSERT, ensure_change_log, get_changes
+from ...db.search_index import search_productos
+from ..schemas import Producto, ProductoCreate, ProductoUpdate, ProductoSearchResponse, ProductoChangesResponse, ErrorResponse
 from ..auth import get_current_active_user
+from ..http_cache import conditional_get
 
 router = APIRouter(prefix="/productos", tags=["productos"])
 
+# Columnas que se exportan en el catálogo NDJSON
+EXPORT_COLUMNS = (
+    ProductoModel.codigo_barra,
+    ProductoModel.nombre,
+    ProductoModel.precio,
+    ProductoModel.descripcion,
+    ProductoModel.stock,
+    ProductoModel.categoria,
+    ProductoModel.created_at,
+    ProductoModel.updated_at,
+)
+
 
 @router.get("/", response_model=List[Producto])
 async def listar_productos(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     categoria: str = None,
+    after: Optional[str] = Query(None, description="Cursor: último codigo_barra recibido"),
     db: Session = Depends(get_db)
 ):
-    """Obtener lista de productos con filtros opcionales"""
-    query = db.query(ProductoModel)
+    """
+    Obtener lista de productos con filtros opcionales
+    
+    Paginación por cursor (keyset): enviar en ``after`` el valor de la
+    cabecera ``X-Next-Cursor`` de la respuesta anterior. A diferencia de
+    ``skip``, el coste no crece con la posición en el catálogo.
+    
+    Responde 304 si ``If-None-Match`` coincide con la versión del catálogo.
+    """
+    not_modified = conditional_get(request, response, "catalog")
+    if not_modified:
+        return not_modified
+    
+    productos = ProductoRepository(db).list(categoria=categoria, after=after, skip=skip, limit=limit)
     
-    if categoria:
-        query = query.filter(ProductoModel.categoria == categoria)
+    if productos and len(productos) == limit:
+        response.headers["X-Next-Cursor"] = productos[-1].codigo_barra
     
-    productos = query.offset(skip).limit(limit).all()
     return productos
 
 
+def _export_rows(categoria: Optional[str], batch_size: int):
+    """Genera el catálogo como NDJSON leyendo con un cursor del servidor"""
+    db = SessionLocal()
+    try:
+        stmt = select(*EXPORT_COLUMNS).order_by(ProductoModel.codigo_barra)
+        if categoria:
+            stmt = stmt.where(ProductoModel.categoria == categoria)
+        
+        result = db.execute(stmt.execution_options(stream_results=True, yield_per=batch_size))
+        for partition in result.partitions():
+            yield "".join(
+                json.dumps(dict(row._mapping), default=str, ensure_ascii=False) + "\n"
+                for row in partition
+            )
+    finally:
+        db.close()
+
+
+@router.get("/export")
+async def exportar_productos(
+    categoria: Optional[str] = None,
+    batch_size: int = Query(1000, ge=100, le=10000)
+):
+    """
+    Exportar el catálogo completo como NDJSON (un producto por línea)
+    
+    Las filas se envían en lotes directamente desde el cursor de la base
+    de datos, sin construir objetos ORM ni la lista completa en memoria.
+    Pensado para que las tabletas descarguen el catálogo al abrir.
+    """
+    return StreamingResponse(
+        _export_rows(categoria, batch_size),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=productos.ndjson"}
+    )
+
+
+@router.get("/search", response_model=ProductoSearchResponse)
+async def buscar_productos(
+    q: str = Query(..., min_length=1, description="Texto a buscar"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Buscar productos por nombre, descripción, marca o categoría
+    
+    Usa el índice FTS5 con coincidencia por prefijo para type-ahead
+    ("coc" encuentra "Coca Cola"). Si no hay resultados se reintenta con
+    búsqueda difusa por trigramas para tolerar errores de tipeo.
+    """
+    resultados, mode = search_productos(db, ProductoModel, q, limit=limit)
+    
+    return {
+        "query": q,
+        "mode": mode,
+        "total": len(resultados),
+        "resultados": resultados
+    }
+
+
+@router.get("/changes", response_model=ProductoChangesResponse)
+async def cambios_productos(
+    since: int = Query(0, ge=0, description="Última secuencia aplicada por el cliente (0 = catálogo completo)"),
+    limit: int = Query(1000, ge=1, le=5000),
+    db: Session = Depends(get_db)
+):
+    """
+    Cambios del catálogo posteriores a ``since`` para réplicas locales
+    
+    Devuelve el estado actual de los productos creados o modificados y los
+    códigos eliminados. El cliente guarda ``next_since`` y repite la
+    llamada mientras ``has_more`` sea verdadero.
+    """
+    if not ensure_change_log(db.get_bind()):
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail={"error": "Sincronización incremental no disponible en este motor de base de datos"}
+        )
+    
+    changes, last_seq = get_changes(db, since, limit)
+    
+    if since > last_seq:
+        # La base se recreó: la réplica del cliente ya no es válida
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"error": "Secuencia desconocida, se requiere sincronización completa (since=0)", "last_seq": last_seq}
+        )
+    
+    upsert_codes = [codigo for _, codigo, operation in changes if operation == OP_UPSERT]
+    upserts = list(ProductoRepository(db).get_many(upsert_codes).values())
+    
+    return {
+        "since": since,
+        "next_since": changes[-1][0] if changes else since,
+        "last_seq": last_seq,
+        "has_more": len(changes) == limit,
+        "upserts": upserts,
+        "deletes": [codigo for _, codigo, operation in changes if operation == OP_DELETE]
+    }
+
+
 @router.get("/{codigo_barra}", response_model=Producto)
 async def obtener_producto(
     codigo_barra: str,
-    db: Session = Depends(get_db)
+    db=Depends(get_async_db)
 ):
     """Obtener producto por código de barras"""
-    producto = db.query(ProductoModel).filter(
-        ProductoModel.codigo_barra == codigo_barra
-    ).first()
+    producto = await AsyncProductoRepository(db).lookup(codigo_barra)
     
     if producto is None:
         raise HTTPException(
@@ -54,9 +192,8 @@ async def crear_producto(
 ):
     """Crear nuevo producto (requiere autenticación)"""
     # Verificar si el código de barras ya existe
-    existing_producto = db.query(ProductoModel).filter(
-        ProductoModel.codigo_barra == producto.codigo_barra
-    ).first()
+    productos = ProductoRepository(db)
+    existing_producto = productos.get(producto.codigo_barra)
     
     if existing_producto:
         raise HTTPException(
@@ -64,14 +201,156 @@ async def crear_producto(
             detail={"error": "El código de barras ya existe", "codigo_barra": producto.codigo_barra}
         )
     
-    db_producto = ProductoModel(**producto.dict())
-    db.add(db_producto)
+    db_producto = productos.add(**producto.dict())
     db.commit()
     db.refresh(db_producto)
     
     return db_producto
 
 
+def _iter_import_rows(file: UploadFile, formato: str) -> Iterator[Tuple[int, dict]]:
+    """Lee filas del archivo subido sin cargarlo completo en memoria"""
+    text_stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    
+    if formato == "csv":
+        reader = csv.DictReader(text_stream)
+        for row_number, row in enumerate(reader, start=2):
+            # Celdas vacías = campo no enviado (no sobrescribe el valor actual)
+            yield row_number, {k.strip(): v.strip() for k, v in row.items() if k and v is not None and v.strip() != ""}
+    else:
+        for row_number, line in enumerate(text_stream, start=1):
+            if line.strip():
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield row_number, {"__error__": f"JSON inválido: {e.msg}"}
+                    continue
+                if not isinstance(row, dict):
+                    yield row_number, {"__error__": "Cada línea debe ser un objeto JSON"}
+                    continue
+                yield row_number, row
+
+
+def _upsert_chunk(db: Session, rows: List[dict]) -> int:
+    """
+    Inserta o actualiza un lote con ``INSERT ... ON CONFLICT DO UPDATE``
+    
+    Las filas se agrupan por el conjunto de campos enviados para que una
+    actualización no pise columnas que el archivo no trae.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    
+    groups: Dict[frozenset, List[dict]] = {}
+    for values in rows:
+        groups.setdefault(frozenset(values), []).append(values)
+    
+    for fields, values in groups.items():
+        stmt = insert(ProductoModel).values(values)
+        update_set = {
+            field: getattr(stmt.excluded, field)
+            for field in fields if field != "codigo_barra"
+        }
+        update_set["updated_at"] = func.now()
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[ProductoModel.codigo_barra],
+            set_=update_set
+        ))
+    
+    return len(rows)
+
+
+@router.post("/bulk")
+def importar_productos(
+    file: UploadFile = File(...),
+    formato: Optional[str] = Query(None, pattern="^(csv|jsonl)$", description="csv o jsonl (por defecto según extensión)"),
+    chunk_size: int = Query(500, ge=1, le=5000),
+    max_errors: int = Query(1000, ge=0),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """
+    Importar o actualizar productos en bloque desde CSV o JSON Lines (requiere autenticación)
+    
+    El archivo se lee fila a fila, se valida en lotes de ``chunk_size`` y
+    cada lote se guarda con un único upsert en su propia transacción.
+    Las filas inválidas no detienen la importación: se informan con su
+    número de fila en ``errors``. Las columnas que no son campos de producto
+    no se importan y se listan en ``ignored_columns``.
+    """
+    if formato is None:
+        filename = (file.filename or "").lower()
+        formato = "jsonl" if filename.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+    
+    report = {"processed": 0, "upserted": 0, "error_count": 0, "chunks": 0, "errors": []}
+    ignored_columns = set()
+    # codigo_barra -> (número de fila, valores validados)
+    chunk: Dict[str, Tuple[int, dict]] = {}
+    
+    def add_error(row_number: int, row: dict, errors: List[str]):
+        report["error_count"] += 1
+        if len(report["errors"]) < max_errors:
+            report["errors"].append({
+                "row": row_number,
+                "codigo_barra": row.get("codigo_barra"),
+                "errors": errors
+            })
+    
+    def flush():
+        if not chunk:
+            return
+        try:
+            report["upserted"] += _upsert_chunk(db, [values for _, values in chunk.values()])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            for row_number, values in chunk.values():
+                add_error(row_number, values, [f"Error guardando lote: {e}"])
+            chunk.clear()
+            return
+        report["chunks"] += 1
+        chunk.clear()
+    
+    try:
+        for row_number, row in _iter_import_rows(file, formato):
+            report["processed"] += 1
+            
+            if "__error__" in row:
+                add_error(row_number, {}, [row["__error__"]])
+                continue
+            
+            ignored_columns.update(k for k in row if k not in ProductoCreate.model_fields)
+            
+            try:
+                producto = ProductoCreate(**row)
+            except ValidationError as e:
+                add_error(row_number, row, [
+                    f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()
+                ])
+                continue
+            
+            # Si el código se repite dentro del lote gana la última fila
+            chunk[producto.codigo_barra] = (row_number, producto.dict(exclude_unset=True))
+            
+            if len(chunk) >= chunk_size:
+                flush()
+        
+        flush()
+    except (UnicodeDecodeError, csv.Error) as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"error": "No se pudo leer el archivo", "detail": str(e), "report": report}
+        )
+    
+    report["ignored_columns"] = sorted(ignored_columns)
+    report["status"] = "success" if report["error_count"] == 0 else "partial"
+    return report
+
+
 @router.put("/{codigo_barra}", response_model=Producto)
 async def actualizar_producto(
     codigo_barra: str,
@@ -80,9 +359,7 @@ async def actualizar_producto(
     current_user = Depends(get_current_active_user)
 ):
     """Actualizar producto existente (requiere autenticación)"""
-    producto = db.query(ProductoModel).filter(
-        ProductoModel.codigo_barra == codigo_barra
-    ).first()
+    producto = ProductoRepository(db).get(codigo_barra)
     
     if producto is None:
         raise HTTPException(
@@ -108,9 +385,7 @@ async def eliminar_producto(
     current_user = Depends(get_current_active_user)
 ):
     """Eliminar producto (requiere autenticación)"""
-    producto = db.query(ProductoModel).filter(
-        ProductoModel.codigo_barra == codigo_barra
-    ).first()
+    producto = ProductoRepository(db).get(codigo_barra)
     
     if producto is None:
         raise HTTPException(
@@ -125,7 +400,37 @@ async def eliminar_producto(
 
 
 @router.get("/categorias/", response_model=List[str])
-async def obtener_categorias(db: Session = Depends(get_db)):
+async def obtener_categorias(request: Request, response: Response, db: Session = Depends(get_db)):
     """Obtener lista única de categorías"""
-    categorias = db.query(ProductoModel.categoria).distinct().all()
-    return [cat[0] for cat in categorias if cat[0]]
\ No newline at end of file
+    not_modified = conditional_get(request, response, "catalog")
+    if not_modified:
+        return not_modified
+    
+    return get_categories(db)
+
+
+@router.get("/categorias/resumen")
+async def resumen_categorias(
+    request: Request,
+    response: Response,
+    categoria: Optional[str] = None,
+    subcategoria: Optional[str] = None,
+    marca: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Árbol de categorías, subcategorías y marcas con cantidad de productos
+    
+    Se lee del índice materializado ``producto_categorias``; los filtros
+    acotan el árbol a una rama (ej. ``?categoria=Bebidas``).
+    """
+    not_modified = conditional_get(request, response, "catalog")
+    if not_modified:
+        return not_modified
+    
+    arbol = get_category_tree(db, categoria=categoria, subcategoria=subcategoria, marca=marca)
+    
+    return {
+        "total_productos": sum(nodo["productos"] for nodo in arbol),
+        "categorias": arbol
+    }
\ No newline at end of file
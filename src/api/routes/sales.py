@@ -4,35 +4,30 @@ Manejo completo de ventas, items y pagos
 """
 
 from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy import func, insert
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 
 from ...db.models_advanced import Sale, SaleItem, Payment, Producto, User, Customer, SaleStatus, PaymentMethod
-from ...db.database import get_db_engine
-from sqlalchemy.orm import sessionmaker
+from ...db.database import get_db, get_read_db
+from ...db.async_database import get_async_db
+from ...db.async_repositories import AsyncSaleRepository
+from ...db.repositories import ProductoRepository, UserRepository
+from ...db.sale_numbers import get_sale_number_allocator
+from ...db.stock_ledger import StockLedger
 from pydantic import BaseModel, Field
 
 router = APIRouter(prefix="/sales", tags=["sales"])
 
-# Dependency para obtener sesión de DB
-def get_db():
-    engine = get_db_engine()
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # === MODELOS PYDANTIC ===
 
 class SaleItemRequest(BaseModel):
     codigo_barra: str
     quantity: int = Field(ge=1)
     unit_price: Optional[Decimal] = None
-    discount_percentage: Optional[Decimal] = Field(default=0.0, ge=0, le=100)
+    discount_percentage: Optional[Decimal] = Field(default=Decimal('0.00'), ge=0, le=100)
 
 class PaymentRequest(BaseModel):
     method: PaymentMethod
@@ -66,13 +61,17 @@ class SaleResponse(BaseModel):
 
 # === ENDPOINTS ===
 
-@router.post("/", response_model=dict)
-async def create_sale(sale_request: CreateSaleRequest, db: Session = Depends(get_db)):
-    """Crear nueva venta completa"""
+def process_sale(sale_request: CreateSaleRequest, db: Session, lane_id: Optional[str] = None) -> dict:
+    """
+    Registrar una venta completa (items, pagos, stock y cliente) en una transacción
+    
+    Compartido por ``POST /sales/`` y el cobro de carritos por carril. Con
+    ``lane_id`` la venta usa la numeración propia del carril.
+    """
     
     try:
         # Buscar cajero
-        cashier = db.query(User).filter_by(username=sale_request.cashier_username).first()
+        cashier = UserRepository(db).get_by_username(sale_request.cashier_username)
         if not cashier:
             raise HTTPException(status_code=404, detail="Cajero no encontrado")
         
@@ -83,11 +82,22 @@ async def create_sale(sale_request: CreateSaleRequest, db: Session = Depends(get
             if not customer:
                 raise HTTPException(status_code=404, detail="Cliente no encontrado")
         
-        # Generar número de venta
-        today = datetime.now().strftime("%Y%m%d")
-        last_sale = db.query(Sale).filter(Sale.sale_number.like(f"POS-{today}-%")).order_by(Sale.id.desc()).first()
-        next_number = 1 if not last_sale else int(last_sale.sale_number.split('-')[-1]) + 1
-        sale_number = f"POS-{today}-{next_number:04d}"
+        # Resolver todos los productos en una sola consulta (solo columnas)
+        productos = ProductoRepository(db)
+        catalogo = productos.lookup_many(item.codigo_barra for item in sale_request.items)
+        cantidades: Dict[int, int] = {}
+        for item_req in sale_request.items:
+            producto = catalogo.get(item_req.codigo_barra)
+            if not producto:
+                raise HTTPException(status_code=404, detail=f"Producto {item_req.codigo_barra} no encontrado")
+            
+            # Verificar stock (el mismo producto puede venir en varias líneas)
+            cantidades[producto.id] = cantidades.get(producto.id, 0) + item_req.quantity
+            if producto.stock < cantidades[producto.id]:
+                raise HTTPException(status_code=400, detail=f"Stock insuficiente para {producto.nombre}")
+        
+        # Generar número de venta (secuencia por día y carril)
+        sale_number = get_sale_number_allocator().next_number(db, lane_id=lane_id)
         
         # Crear venta
         sale = Sale(
@@ -107,15 +117,9 @@ async def create_sale(sale_request: CreateSaleRequest, db: Session = Depends(get
         
         # Procesar items
         total = Decimal('0.00')
+        lineas = []
         for item_req in sale_request.items:
-            # Buscar producto
-            producto = db.query(Producto).filter_by(codigo_barra=item_req.codigo_barra).first()
-            if not producto:
-                raise HTTPException(status_code=404, detail=f"Producto {item_req.codigo_barra} no encontrado")
-            
-            # Verificar stock
-            if producto.stock < item_req.quantity:
-                raise HTTPException(status_code=400, detail=f"Stock insuficiente para {producto.nombre}")
+            producto = catalogo[item_req.codigo_barra]
             
             # Calcular precios
             unit_price = item_req.unit_price or producto.precio
@@ -123,27 +127,29 @@ async def create_sale(sale_request: CreateSaleRequest, db: Session = Depends(get
             discount_amount = line_total * (item_req.discount_percentage / 100)
             final_line_total = line_total - discount_amount
             
-            # Crear item de venta
-            sale_item = SaleItem(
-                sale_id=sale.id,
-                producto_id=producto.id,
-                quantity=item_req.quantity,
-                unit_price=unit_price,
-                discount_percentage=item_req.discount_percentage,
-                discount_amount=discount_amount,
-                line_total=final_line_total,
-                tax_rate=producto.tax_rate if producto.is_taxable else Decimal('0.00')
-            )
-            
-            # Calcular impuestos
-            if producto.is_taxable:
-                sale_item.tax_amount = final_line_total * (producto.tax_rate / 100)
-            
-            db.add(sale_item)
+            # Item de venta (con impuestos)
+            lineas.append({
+                "sale_id": sale.id,
+                "producto_id": producto.id,
+                "quantity": item_req.quantity,
+                "unit_price": unit_price,
+                "discount_percentage": item_req.discount_percentage,
+                "discount_amount": discount_amount,
+                "line_total": final_line_total,
+                "tax_rate": producto.tax_rate if producto.is_taxable else Decimal('0.00'),
+                "tax_amount": final_line_total * (producto.tax_rate / 100) if producto.is_taxable else Decimal('0.00'),
+            })
             total += final_line_total
-            
-            # Actualizar stock
-            producto.stock -= item_req.quantity
+        
+        # Todos los items en un solo INSERT (executemany)
+        db.execute(insert(SaleItem), lineas)
+        
+        # Descontar stock en un solo UPDATE condicionado: si otra venta (o la
+        # reserva de otro carril) se llevó las unidades, no se actualiza
+        sin_stock = StockLedger(db).sell(cantidades, sale_id=sale.id, lane_id=lane_id)
+        agotados = [p for p in catalogo.values() if p.id in sin_stock]
+        if agotados:
+            raise HTTPException(status_code=400, detail=f"Stock insuficiente para {agotados[0].nombre}")
         
         # Calcular totales de la venta
         sale.subtotal = total / (1 + (Decimal('16.00') / 100))  # Asumiendo 16% IVA
@@ -202,6 +208,12 @@ async def create_sale(sale_request: CreateSaleRequest, db: Session = Depends(get
         raise HTTPException(status_code=500, detail=f"Error creando venta: {str(e)}")
 
 
+@router.post("/", response_model=dict)
+async def create_sale(sale_request: CreateSaleRequest, db: Session = Depends(get_db)):
+    """Crear nueva venta completa"""
+    return process_sale(sale_request, db)
+
+
 @router.get("/", response_model=List[SaleResponse])
 async def get_sales(
     skip: int = Query(0, ge=0),
@@ -210,27 +222,23 @@ async def get_sales(
     end_date: Optional[date] = None,
     cashier_id: Optional[int] = None,
     status: Optional[SaleStatus] = None,
-    db: Session = Depends(get_db)
+    db=Depends(get_async_db)
 ):
     """Obtener lista de ventas con filtros"""
     
-    query = db.query(Sale)
-    
-    # Aplicar filtros
-    if start_date:
-        query = query.filter(Sale.created_at >= start_date)
-    if end_date:
-        query = query.filter(Sale.created_at <= end_date + timedelta(days=1))
-    if cashier_id:
-        query = query.filter(Sale.cashier_id == cashier_id)
-    if status:
-        query = query.filter(Sale.status == status)
-    
-    sales = query.order_by(Sale.created_at.desc()).offset(skip).limit(limit).all()
+    # Cajero, cliente y cantidad de items en una sola consulta
+    sales = await AsyncSaleRepository(db).list(
+        start=start_date,
+        end=end_date + timedelta(days=1) if end_date else None,
+        cashier_id=cashier_id,
+        status=status,
+        skip=skip,
+        limit=limit
+    )
     
     # Formatear respuesta
     response = []
-    for sale in sales:
+    for sale, items_count in sales:
         response.append(SaleResponse(
             id=sale.id,
             sale_number=sale.sale_number,
@@ -242,17 +250,17 @@ async def get_sales(
             status=sale.status,
             created_at=sale.created_at,
             completed_at=sale.completed_at,
-            items_count=len(sale.items)
+            items_count=items_count
         ))
     
     return response
 
 
 @router.get("/{sale_id}")
-async def get_sale_detail(sale_id: int, db: Session = Depends(get_db)):
+async def get_sale_detail(sale_id: int, db=Depends(get_async_db)):
     """Obtener detalles completos de una venta"""
     
-    sale = db.query(Sale).filter(Sale.id == sale_id).first()
+    sale = await AsyncSaleRepository(db).get_detail(sale_id)
     if not sale:
         raise HTTPException(status_code=404, detail="Venta no encontrada")
     
@@ -326,9 +334,14 @@ async def cancel_sale(sale_id: int, reason: str = "Cancelada por usuario", db: S
         raise HTTPException(status_code=400, detail="Solo se pueden cancelar ventas completadas")
     
     try:
-        # Restaurar stock de productos
-        for item in sale.items:
-            item.producto.stock += item.quantity
+        # Restaurar stock de productos (registrado en el libro de stock)
+        cantidades = dict(
+            db.query(SaleItem.producto_id, func.sum(SaleItem.quantity))
+            .filter(SaleItem.sale_id == sale.id)
+            .group_by(SaleItem.producto_id)
+            .all()
+        )
+        StockLedger(db).restock(cantidades, sale_id=sale.id)
         
         # Actualizar estadísticas del cliente
         if sale.customer:
@@ -355,7 +368,7 @@ async def cancel_sale(sale_id: int, reason: str = "Cancelada por usuario", db: S
 # === ENDPOINTS DE REPORTES RÁPIDOS ===
 
 @router.get("/reports/daily")
-async def daily_sales_report(target_date: Optional[date] = None, db: Session = Depends(get_db)):
+async def daily_sales_report(target_date: Optional[date] = None, db: Session = Depends(get_read_db)):
     """Reporte de ventas diarias"""
     
     if not target_date:
@@ -364,25 +377,29 @@ async def daily_sales_report(target_date: Optional[date] = None, db: Session = D
     start_datetime = datetime.combine(target_date, datetime.min.time())
     end_datetime = datetime.combine(target_date, datetime.max.time())
     
-    # Query ventas del día
-    sales = db.query(Sale).filter(
+    day_filter = (
         Sale.created_at >= start_datetime,
         Sale.created_at <= end_datetime,
         Sale.status == SaleStatus.COMPLETED
-    ).all()
+    )
+    
+    # Ventas del día (solo las columnas del reporte)
+    sales = db.query(Sale.created_at, Sale.total_amount).filter(*day_filter).all()
     
     # Calcular métricas
     total_sales = len(sales)
     total_revenue = sum(sale.total_amount for sale in sales)
-    total_items = sum(len(sale.items) for sale in sales)
+    total_items = db.query(func.count(SaleItem.id)).join(Sale, SaleItem.sale_id == Sale.id).filter(*day_filter).scalar()
     average_ticket = total_revenue / total_sales if total_sales > 0 else 0
     
-    # Ventas por método de pago
-    payment_methods = {}
-    for sale in sales:
-        for payment in sale.payments:
-            method = payment.method.value
-            payment_methods[method] = payment_methods.get(method, 0) + float(payment.amount)
+    # Ventas por método de pago (agregadas en la base, no por venta)
+    payment_methods = {
+        method.value: float(amount)
+        for method, amount in db.query(Payment.method, func.sum(Payment.amount))
+        .join(Sale, Payment.sale_id == Sale.id)
+        .filter(*day_filter)
+        .group_by(Payment.method)
+    }
     
     return {
         "date": target_date.isoformat(),
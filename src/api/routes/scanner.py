@@ -5,7 +5,8 @@ from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
 from sqlalchemy.orm import Session
 
 from ...db.database import get_db
-from ...db.models import Producto as ProductoModel, EscaneoHistorial
+from ...db.models import EscaneoHistorial
+from ...db.repositories import ProductoRepository
 from ...scanner.barcode_scanner import BarcodeScanner
 from ..schemas import EscaneoResponse, Producto
 
@@ -62,9 +63,7 @@ async def scan_from_image(
         codigo_barra, tipo_codigo = result
         
         # Buscar producto en base de datos
-        producto = db.query(ProductoModel).filter(
-            ProductoModel.codigo_barra == codigo_barra
-        ).first()
+        producto = ProductoRepository(db).lookup(codigo_barra)
         
         # Guardar en historial
         historial = EscaneoHistorial(
@@ -126,9 +125,7 @@ async def scan_from_camera(
                 codigo_barra, tipo_codigo = result
                 
                 # Buscar producto en base de datos
-                producto = db.query(ProductoModel).filter(
-                    ProductoModel.codigo_barra == codigo_barra
-                ).first()
+                producto = ProductoRepository(db).lookup(codigo_barra)
                 
                 # Guardar en historial
                 historial = EscaneoHistorial(
@@ -1,15 +1,24 @@
 import asyncio
 import logging
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Header, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional
+import os
 import threading
 import time
 
 from ...db.database import get_db
-from ...db.models import Producto as ProductoModel, EscaneoHistorial
+from ...db.async_database import get_async_db
+from ...db.async_repositories import AsyncScanRepository
+from ...db.models import EscaneoHistorial
+from ...db.repositories import ProductoRepository
 from ...scanner.usb_hid_scanner import get_hid_scanner
+from ...scanner.serial_scanner import get_serial_scanner
+from ...scanner.scanner_config import get_scanner_config_store, ScannerConfigError, ScannerConfigVersionError
+from ...scanner.scan_events import get_scan_event_bus, stream_events
+from ...scanner.scanner_owner import get_scanner_ownership
 from ..schemas import EscaneoResponse, Producto
 
 router = APIRouter(prefix="/usb-scanner", tags=["usb-scanner"])
@@ -21,11 +30,35 @@ logger = logging.getLogger(__name__)
 scanner_instance = None
 listening_task = None
 
+def _producto_resumen(producto) -> Optional[dict]:
+    """Resumen del producto que se envía junto a cada escaneo"""
+    if producto is None:
+        return None
+    return {
+        "nombre": producto.nombre,
+        "precio": float(producto.precio),
+        "stock": producto.stock,
+        "categoria": producto.categoria
+    }
+
+
+# Tipos de historial generados por los scanners físicos
+SCANNER_TIPOS = ("USB-HID", "SERIAL")
+
+
 def get_scanner_instance():
-    """Obtener instancia única del scanner USB-HID"""
+    """
+    Obtener instancia única del scanner físico configurado
+    
+    SCANNER_BACKEND=hid (por defecto) usa el modo teclado USB-HID;
+    SCANNER_BACKEND=serial usa el lector en modo serie / CDC-ACM.
+    """
     global scanner_instance
     if scanner_instance is None:
-        scanner_instance = get_hid_scanner()
+        if os.getenv("SCANNER_BACKEND", "hid").lower() == "serial":
+            scanner_instance = get_serial_scanner()
+        else:
+            scanner_instance = get_hid_scanner()
     return scanner_instance
 
 
@@ -38,10 +71,16 @@ async def get_scanner_status():
         scanner = get_scanner_instance()
         status = scanner.get_status()
         
+        # Con varios workers el hardware lo controla uno solo: se informa su estado
+        owner = get_scanner_ownership().owned_elsewhere()
+        if owner:
+            status = owner["status"]
+        
         return {
             "status": "success",
             "scanner_info": status,
-            "message": "Scanner USB-HID disponible" if status['keyboard_library'] else "Librería keyboard no disponible"
+            "owner_worker": owner["worker"] if owner else None,
+            "message": f"Scanner {status['type']} disponible" if status['available'] else f"Librería del scanner {status['type']} no disponible"
         }
     except Exception as e:
         logger.error(f"Error obteniendo estado del scanner: {e}")
@@ -67,57 +106,73 @@ async def start_scanner(background_tasks: BackgroundTasks, db: Session = Depends
                 "listening": True
             }
         
+        tipo_codigo = scanner.get_status()['type']
+        
         # Configurar callback para procesar códigos escaneados
         def on_barcode_scanned(barcode_data: str):
             """Callback que se ejecuta cuando se escanea un código"""
             try:
-                logger.info(f"📷 Código detectado por scanner USB: {barcode_data}")
+                logger.info(f"📷 Código detectado por scanner {tipo_codigo}: {barcode_data}")
                 
                 # Buscar producto en base de datos
                 with next(get_db()) as db_session:
-                    producto = db_session.query(ProductoModel).filter(
-                        ProductoModel.codigo_barra == barcode_data
-                    ).first()
+                    producto = ProductoRepository(db_session).lookup(barcode_data)
                     
                     # Guardar en historial
                     historial = EscaneoHistorial(
                         codigo_barra=barcode_data,
-                        tipo_codigo="USB-HID",
+                        tipo_codigo=tipo_codigo,
                         encontrado=1 if producto else 0
                     )
                     db_session.add(historial)
+                    db_session.flush()
+                    historial_id = historial.id
+                    producto_data = _producto_resumen(producto)
                     db_session.commit()
                     
-                    if producto:
-                        logger.info(f"✅ Producto encontrado: {producto.nombre}")
+                    # Notificar a los clientes SSE con el producto ya resuelto
+                    get_scan_event_bus().publish("scan", {
+                        "historial_id": historial_id,
+                        "codigo_barra": barcode_data,
+                        "tipo_codigo": tipo_codigo,
+                        "encontrado": producto_data is not None,
+                        "timestamp": datetime.now().isoformat(),
+                        "producto": producto_data
+                    })
+                    
+                    if producto_data:
+                        logger.info(f"✅ Producto encontrado: {producto_data['nombre']}")
                     else:
                         logger.warning(f"⚠️ Producto no encontrado para código: {barcode_data}")
                         
             except Exception as e:
                 logger.error(f"Error procesando código escaneado: {e}")
         
-        # Configurar callback
-        scanner.set_barcode_callback(on_barcode_scanned)
+        def start() -> bool:
+            # Configurar callback e iniciar escucha
+            scanner.set_barcode_callback(on_barcode_scanned)
+            return scanner.start_listening()
         
-        # Iniciar escucha
-        success = scanner.start_listening()
-        
-        if success:
+        # Solo un worker toca el hardware; los demás informan quién lo tiene
+        owner = get_scanner_ownership().acquire(scanner, start)
+        if owner:
             return {
-                "status": "success",
-                "message": "Scanner USB-HID iniciado correctamente",
+                "status": "info",
+                "message": f"Scanner ya está en funcionamiento en el worker {owner['worker']}",
                 "listening": True,
-                "instructions": [
-                    "El scanner está activo y detectará códigos automáticamente",
-                    "Simplemente escanea cualquier código de barras",
-                    "Los resultados se guardarán en la base de datos"
-                ]
+                "owner_worker": owner["worker"]
             }
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail={"error": "No se pudo iniciar el scanner USB-HID"}
-            )
+        
+        return {
+            "status": "success",
+            "message": f"Scanner {tipo_codigo} iniciado correctamente",
+            "listening": True,
+            "instructions": [
+                "El scanner está activo y detectará códigos automáticamente",
+                "Simplemente escanea cualquier código de barras",
+                "Los resultados se guardarán en la base de datos"
+            ]
+        }
             
     except Exception as e:
         logger.error(f"Error iniciando scanner: {e}")
@@ -134,8 +189,18 @@ async def stop_scanner():
     """
     try:
         scanner = get_scanner_instance()
+        ownership = get_scanner_ownership()
         
         if not scanner.is_listening:
+            # El scanner puede estar escuchando en otro worker
+            owner = ownership.request_stop()
+            if owner:
+                return {
+                    "status": "success",
+                    "message": f"Detención solicitada al worker {owner['worker']}",
+                    "listening": False,
+                    "owner_worker": owner["worker"]
+                }
             return {
                 "status": "info",
                 "message": "Scanner ya está detenido",
@@ -143,6 +208,7 @@ async def stop_scanner():
             }
         
         scanner.stop_listening()
+        ownership.release()
         
         return {
             "status": "success",
@@ -169,6 +235,13 @@ async def test_scanner(timeout: int = 30):
     try:
         scanner = get_scanner_instance()
         
+        owner = get_scanner_ownership().owned_elsewhere()
+        if owner:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"error": "Scanner en uso por otro worker", "owner_worker": owner["worker"]}
+            )
+        
         # Realizar prueba
         result = scanner.test_scanner(timeout_seconds=timeout)
         
@@ -192,6 +265,8 @@ async def test_scanner(timeout: int = 30):
                 ]
             }
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error probando scanner: {e}")
         raise HTTPException(
@@ -201,45 +276,44 @@ async def test_scanner(timeout: int = 30):
 
 
 @router.get("/recent-scans")
-async def get_recent_scans(db: Session = Depends(get_db), limit: int = 10):
+async def get_recent_scans(
+    db=Depends(get_async_db),
+    limit: int = 10,
+    since_id: Optional[int] = None
+):
     """
-    Obtener escaneos recientes del scanner USB-HID
+    Obtener escaneos recientes del scanner físico (USB-HID o serial)
+    
+    Args:
+        limit: Número máximo de escaneos a devolver
+        since_id: Cursor incremental - solo escaneos con id mayor a este valor
+    
+    El producto de cada escaneo se resuelve en la misma consulta (LEFT JOIN),
+    sin consultas adicionales por fila. Los clientes pueden reenviar el
+    ``last_id`` de la respuesta como ``since_id`` para recibir solo filas nuevas
+    (en orden ascendente, de a ``limit`` por página).
     """
     try:
-        # Consultar historial reciente filtrado por tipo USB-HID
-        escaneos = db.query(EscaneoHistorial).filter(
-            EscaneoHistorial.tipo_codigo == "USB-HID"
-        ).order_by(
-            EscaneoHistorial.timestamp.desc()
-        ).limit(limit).all()
+        # Historial de scanners físicos con su producto en una sola consulta
+        filas = await AsyncScanRepository(db).recent(SCANNER_TIPOS, since_id=since_id, limit=limit)
         
         # Formatear resultados
         resultados = []
-        for escaneo in escaneos:
-            # Buscar información del producto si se encontró
-            producto = None
-            if escaneo.encontrado:
-                producto = db.query(ProductoModel).filter(
-                    ProductoModel.codigo_barra == escaneo.codigo_barra
-                ).first()
-            
+        for escaneo, producto in filas:
             resultados.append({
+                "id": escaneo.id,
                 "codigo_barra": escaneo.codigo_barra,
                 "tipo_codigo": escaneo.tipo_codigo,
                 "encontrado": bool(escaneo.encontrado),
                 "timestamp": escaneo.timestamp,
-                "producto": {
-                    "nombre": producto.nombre,
-                    "precio": producto.precio,
-                    "stock": producto.stock,
-                    "categoria": producto.categoria
-                } if producto else None
+                "producto": _producto_resumen(producto) if escaneo.encontrado else None
             })
         
         return {
             "status": "success",
             "escaneos": resultados,
-            "total": len(resultados)
+            "total": len(resultados),
+            "last_id": max(r["id"] for r in resultados) if resultados else since_id
         }
         
     except Exception as e:
@@ -250,36 +324,108 @@ async def get_recent_scans(db: Session = Depends(get_db), limit: int = 10):
         )
 
 
+@router.get("/events")
+async def scan_events(
+    request: Request,
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Flujo Server-Sent Events con cada código detectado por el scanner
+
+    Cada evento ``scan`` incluye el producto ya resuelto, por lo que la UI
+    no necesita consultar ``/recent-scans`` ni ``/productos`` tras un escaneo.
+    Al reconectar, EventSource envía ``Last-Event-ID`` y se reenvían los
+    eventos perdidos que sigan en el historial en memoria.
+    """
+    return StreamingResponse(
+        stream_events(
+            get_scan_event_bus(),
+            last_event_id=last_event_id,
+            is_disconnected=request.is_disconnected
+        ),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+@router.get("/events/status")
+async def scan_events_status():
+    """
+    Estado del bus de eventos de escaneo (suscriptores, eventos publicados)
+    """
+    return {
+        "status": "success",
+        "events": get_scan_event_bus().get_status()
+    }
+
+
+@router.get("/config")
+async def get_scanner_config():
+    """
+    Obtener la configuración activa de los scanners y su versión
+    """
+    return {
+        "status": "success",
+        "configuration": get_scanner_config_store().current.to_dict()
+    }
+
+
 @router.post("/configure")
 async def configure_scanner(
-    min_length: int = 3,
-    max_length: int = 50,
-    speed_threshold: float = 100.0
+    min_length: Optional[int] = None,
+    max_length: Optional[int] = None,
+    speed_threshold: Optional[float] = None,
+    consistency_threshold: Optional[float] = None,
+    min_numeric_ratio: Optional[float] = None,
+    expected_version: Optional[int] = None
 ):
     """
-    Configurar parámetros del scanner USB-HID
+    Configurar parámetros de los scanners en caliente
+    
+    Los cambios se aplican de inmediato a todos los backends (USB-HID y
+    serial) sin detener la escucha, y se guardan en config/app_config.json.
+    Solo se modifican los parámetros enviados. Si se indica
+    ``expected_version`` y otra petición cambió la configuración antes,
+    se responde 409.
     """
+    changes = {
+        field: value
+        for field, value in (
+            ("min_barcode_length", min_length),
+            ("max_barcode_length", max_length),
+            ("speed_threshold_ms", speed_threshold),
+            ("consistency_threshold_ms", consistency_threshold),
+            ("min_numeric_ratio", min_numeric_ratio),
+        )
+        if value is not None
+    }
+    
     try:
-        scanner = get_scanner_instance()
-        
-        # Actualizar configuración
-        scanner.min_barcode_length = min_length
-        scanner.max_barcode_length = max_length  
-        scanner.scanner_speed_threshold = speed_threshold
+        config = get_scanner_config_store().update(expected_version=expected_version, **changes)
         
         return {
             "status": "success",
             "message": "Configuración actualizada correctamente",
-            "configuration": {
-                "min_barcode_length": min_length,
-                "max_barcode_length": max_length,
-                "speed_threshold_ms": speed_threshold
-            }
+            "configuration": config.to_dict()
         }
         
+    except ScannerConfigVersionError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"error": "La configuración cambió, vuelve a consultarla", "detail": str(e)}
+        )
+    except ScannerConfigError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"error": "Configuración de scanner inválida", "detail": str(e)}
+        )
     except Exception as e:
         logger.error(f"Error configurando scanner: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={"error": "Error al configurar scanner", "detail": str(e)}
-        )
\ No newline at end of file
+        )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, validator
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -46,6 +46,24 @@ class Producto(ProductoBase):
         from_attributes = True
 
 
+class ProductoSearchResponse(BaseModel):
+    """Schema para resultados de búsqueda de productos"""
+    query: str
+    mode: str  # prefix, fuzzy o like
+    total: int
+    resultados: List[Producto]
+
+
+class ProductoChangesResponse(BaseModel):
+    """Schema para sincronización incremental del catálogo"""
+    since: int
+    next_since: int  # Valor de since para la siguiente llamada
+    last_seq: int  # Secuencia más reciente del catálogo
+    has_more: bool
+    upserts: List[Producto]
+    deletes: List[str]  # Códigos eliminados (tombstones)
+
+
 class EscaneoResponse(BaseModel):
     """Schema para respuesta de escaneo"""
     codigo_barra: str
@@ -0,0 +1,7 @@
+"""
+Módulo de carritos de venta en memoria por carril (lane)
+"""
+
+from .cart_manager import CartManager, LaneCart, CartLine, ProductNotFoundError, OutOfStockError, get_cart_manager
+
+__all__ = ['CartManager', 'LaneCart', 'CartLine', 'ProductNotFoundError', 'OutOfStockError', 'get_cart_manager']
@@ -0,0 +1,371 @@
+"""
+CartManager - Carritos de venta del lado del servidor, uno por carril
+
+Cada escaneo se resuelve a una línea del carrito del carril:
+- Si el código ya está en el carrito solo se incrementa la cantidad
+- Si es nuevo se consulta el producto una sola vez y se guarda su snapshot
+- Cada cambio se publica al bus de eventos del carril (SSE)
+
+Los carritos se guardan en el estado compartido (``db.shared_state``) y
+cada cambio se hace bajo el lock del carril, así cualquier worker puede
+atender los escaneos y el cobro de cualquier carril.
+
+Con ``STOCK_RESERVATION_SECONDS > 0`` cada línea aparta sus unidades en
+``stock_reservations`` (ver ``db.stock_ledger``): otro carril no puede
+cobrar las unidades que este ya tiene escaneadas.
+
+El carrito no toca la base de datos hasta el cobro, donde se persiste
+completo como ``Sale``/``SaleItem`` en una única transacción.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, Dict, Optional
+
+from ..db.shared_state import InMemoryState, SharedState, get_shared_state
+from ..scanner.scan_events import ScanEventBus
+
+logger = logging.getLogger(__name__)
+
+
+class ProductNotFoundError(LookupError):
+    """El código escaneado no corresponde a ningún producto activo"""
+
+
+class OutOfStockError(RuntimeError):
+    """No hay stock libre para apartar la cantidad de la línea"""
+
+
+class CartLine:
+    """Línea del carrito con el snapshot del producto al momento del escaneo"""
+
+    def __init__(self, producto: dict, quantity: int = 0):
+        self.producto_id = producto["id"]
+        self.codigo_barra = producto["codigo_barra"]
+        self.nombre = producto["nombre"]
+        self.unit_price = Decimal(str(producto["precio"]))
+        self.tax_rate = Decimal(str(producto.get("tax_rate") or 0))
+        self.is_taxable = bool(producto.get("is_taxable", True))
+        self.quantity = quantity
+
+    @property
+    def line_total(self) -> Decimal:
+        return self.unit_price * self.quantity
+
+    def to_dict(self) -> dict:
+        return {
+            "producto_id": self.producto_id,
+            "codigo_barra": self.codigo_barra,
+            "nombre": self.nombre,
+            "unit_price": float(self.unit_price),
+            "quantity": self.quantity,
+            "line_total": float(self.line_total),
+        }
+
+    def to_state(self) -> dict:
+        """Snapshot serializable a JSON (el constructor lo acepta como producto)"""
+        return {
+            "id": self.producto_id,
+            "codigo_barra": self.codigo_barra,
+            "nombre": self.nombre,
+            "precio": str(self.unit_price),
+            "tax_rate": str(self.tax_rate),
+            "is_taxable": self.is_taxable,
+            "quantity": self.quantity,
+        }
+
+
+class LaneCart:
+    """Carrito de un carril de cobro"""
+
+    def __init__(self, lane_id: str):
+        self.lane_id = lane_id
+        self.lines: "OrderedDict[str, CartLine]" = OrderedDict()
+        self.version = 0
+        self.created_at = datetime.now()
+        self.updated_at = self.created_at
+
+    @property
+    def total(self) -> Decimal:
+        return sum((line.line_total for line in self.lines.values()), Decimal("0.00"))
+
+    @property
+    def items_count(self) -> int:
+        return sum(line.quantity for line in self.lines.values())
+
+    def touch(self):
+        """Marca el carrito como modificado"""
+        self.version += 1
+        self.updated_at = datetime.now()
+
+    def to_dict(self) -> dict:
+        return {
+            "lane_id": self.lane_id,
+            "version": self.version,
+            "lines": [line.to_dict() for line in self.lines.values()],
+            "items_count": self.items_count,
+            "total": float(self.total),
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+    def to_state(self) -> dict:
+        """Representación para el estado compartido"""
+        return {
+            "lane_id": self.lane_id,
+            "version": self.version,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+            "lines": [line.to_state() for line in self.lines.values()],
+        }
+
+    @classmethod
+    def from_state(cls, data: dict) -> "LaneCart":
+        cart = cls(data["lane_id"])
+        cart.version = data["version"]
+        cart.created_at = datetime.fromisoformat(data["created_at"])
+        cart.updated_at = datetime.fromisoformat(data["updated_at"])
+        for line in data["lines"]:
+            cart.lines[line["codigo_barra"]] = CartLine(line, line["quantity"])
+        return cart
+
+
+def _resolve_producto_db(codigo_barra: str) -> Optional[dict]:
+    """Resolver por defecto: consulta el producto activo en la base de datos"""
+    from ..db.database import SessionLocal
+    from ..db.repositories import ProductoRepository
+
+    db = SessionLocal()
+    try:
+        return ProductoRepository(db).get_cart_snapshot(codigo_barra)
+    finally:
+        db.close()
+
+
+def _hold_stock_db(lane_id: str, producto_id: int, quantity: int) -> bool:
+    """Reserva por defecto: aparta ``quantity`` unidades del producto para el carril"""
+    from ..db.database import SessionLocal
+    from ..db.stock_ledger import StockLedger
+
+    db = SessionLocal()
+    try:
+        held = StockLedger(db).reserve(lane_id, producto_id, quantity)
+        db.commit()
+        return held
+    finally:
+        db.close()
+
+
+class CartManager:
+    """
+    Gestor de carritos por carril
+
+    Es thread-safe y multi-proceso: los escaneos llegan desde los hilos de
+    los scanners mientras la API lee y modifica carritos desde el event
+    loop, posiblemente en otro worker. Sin ``state`` los carritos viven en
+    un estado en memoria propio.
+    """
+
+    def __init__(
+        self,
+        product_resolver: Optional[Callable[[str], Optional[dict]]] = None,
+        state: Optional[SharedState] = None,
+        stock_holder: Optional[Callable[[str, int, int], bool]] = None,
+    ):
+        from ..db.stock_ledger import reservations_enabled
+
+        self.product_resolver = product_resolver or _resolve_producto_db
+        self.state = state if state is not None else InMemoryState()
+        # (carril, producto_id, cantidad total) -> False si no alcanza el stock
+        if stock_holder is None and reservations_enabled():
+            stock_holder = _hold_stock_db
+        self.stock_holder = stock_holder
+        self._lock = threading.RLock()
+        self._buses: Dict[str, ScanEventBus] = {}
+
+    @staticmethod
+    def _key(lane_id: str) -> str:
+        return f"cart:{lane_id}"
+
+    def get_events(self, lane_id: str) -> ScanEventBus:
+        """Bus de eventos del carril (un flujo SSE por carril)"""
+        with self._lock:
+            if lane_id not in self._buses:
+                self._buses[lane_id] = ScanEventBus(
+                    history_size=50, channel=self._key(lane_id), state=self.state
+                )
+            return self._buses[lane_id]
+
+    def get_cart(self, lane_id: str) -> LaneCart:
+        """Snapshot actual del carrito de un carril (vacío si no existe)"""
+        data = self.state.get(self._key(lane_id))
+        return LaneCart.from_state(data) if data else LaneCart(lane_id)
+
+    def checkout_lock(self, lane_id: str, timeout: float = 60.0):
+        """
+        Lock de cobro del carril (context manager)
+
+        Se sostiene desde que se lee el carrito hasta ``consume``: un doble
+        click en "Cobrar" espera al primero y encuentra el carrito ya
+        descontado en vez de registrar la venta dos veces. Es distinto del
+        lock del carrito para que los escaneos sigan entrando durante el cobro
+        (y porque el lock de Redis no es reentrante).
+        """
+        return self.state.lock(f"checkout:{lane_id}", timeout=timeout)
+
+    def _hold(self, lane_id: str, line: CartLine, quantity: int):
+        """Ajusta la reserva de stock de la línea (si las reservas están activas)"""
+        if self.stock_holder is None:
+            return
+        if not self.stock_holder(lane_id, line.producto_id, quantity):
+            self.get_events(lane_id).publish("out_of_stock", {
+                "codigo_barra": line.codigo_barra,
+                "quantity": quantity,
+            })
+            raise OutOfStockError(line.codigo_barra)
+
+    def _commit(self, cart: LaneCart, action: str, codigo_barra: Optional[str] = None) -> dict:
+        """Guarda el carrito modificado y publica el cambio (con el lock del carril tomado)"""
+        cart.touch()
+        self.state.set(self._key(cart.lane_id), cart.to_state())
+        snapshot = cart.to_dict()
+        self.get_events(cart.lane_id).publish("cart", {
+            "action": action,
+            "codigo_barra": codigo_barra,
+            "cart": snapshot,
+        })
+        return snapshot
+
+    def scan(self, lane_id: str, codigo_barra: str, quantity: int = 1) -> dict:
+        """
+        Agrega un escaneo al carrito del carril
+
+        Args:
+            lane_id: Identificador del carril
+            codigo_barra: Código escaneado
+            quantity: Unidades a sumar
+
+        Returns:
+            Snapshot del carrito actualizado
+
+        Raises:
+            ProductNotFoundError: Si el código no corresponde a un producto
+            OutOfStockError: Si no se pudo reservar el stock (el carrito no cambia)
+        """
+        producto = None
+        if codigo_barra not in self.get_cart(lane_id).lines:
+            # Solo la primera vez que aparece el código se consulta el producto
+            producto = self.product_resolver(codigo_barra)
+            if producto is None:
+                self.get_events(lane_id).publish("not_found", {"codigo_barra": codigo_barra})
+                raise ProductNotFoundError(codigo_barra)
+
+        with self.state.lock(self._key(lane_id)):
+            cart = self.get_cart(lane_id)
+            line = cart.lines.get(codigo_barra)
+            if line is None:
+                if producto is None:
+                    # La línea se eliminó entre la lectura y el lock
+                    producto = self.product_resolver(codigo_barra)
+                    if producto is None:
+                        raise ProductNotFoundError(codigo_barra)
+                line = CartLine(producto)
+                cart.lines[codigo_barra] = line
+            self._hold(lane_id, line, line.quantity + quantity)
+            line.quantity += quantity
+            return self._commit(cart, "scan", codigo_barra)
+
+    def set_quantity(self, lane_id: str, codigo_barra: str, quantity: int) -> dict:
+        """Fija la cantidad de una línea (0 la elimina)"""
+        with self.state.lock(self._key(lane_id)):
+            cart = self.get_cart(lane_id)
+            if codigo_barra not in cart.lines:
+                raise ProductNotFoundError(codigo_barra)
+            self._hold(lane_id, cart.lines[codigo_barra], max(quantity, 0))
+            if quantity <= 0:
+                del cart.lines[codigo_barra]
+            else:
+                cart.lines[codigo_barra].quantity = quantity
+            return self._commit(cart, "update", codigo_barra)
+
+    def remove_line(self, lane_id: str, codigo_barra: str) -> dict:
+        """Elimina una línea del carrito"""
+        return self.set_quantity(lane_id, codigo_barra, 0)
+
+    def clear(self, lane_id: str, action: str = "clear") -> dict:
+        """Vacía el carrito del carril"""
+        with self.state.lock(self._key(lane_id)):
+            cart = self.get_cart(lane_id)
+            for line in cart.lines.values():
+                self._hold(lane_id, line, 0)
+            cart.lines.clear()
+            return self._commit(cart, action)
+
+    def consume(self, lane_id: str, quantities: Dict[str, int], action: str = "checkout") -> dict:
+        """
+        Descuenta del carrito las cantidades ya cobradas
+
+        Los escaneos que lleguen mientras se persiste la venta se conservan
+        en el carrito en lugar de perderse al vaciarlo.
+
+        Se llama con la venta ya confirmada, así que nunca falla por stock:
+        primero se quitan las líneas cobradas y se guarda el carrito; si lo
+        escaneado después ya no se puede apartar se publica ``out_of_stock``
+        y la línea queda en el carrito sin reserva.
+        """
+        with self.state.lock(self._key(lane_id)):
+            cart = self.get_cart(lane_id)
+            remaining = []
+            for codigo_barra, quantity in quantities.items():
+                line = cart.lines.get(codigo_barra)
+                if line is None:
+                    continue
+                line.quantity -= quantity
+                if line.quantity <= 0:
+                    del cart.lines[codigo_barra]
+                else:
+                    remaining.append(line)
+            snapshot = self._commit(cart, action)
+
+            # El cobro liberó la reserva; se aparta lo escaneado después
+            for line in remaining:
+                try:
+                    self._hold(lane_id, line, line.quantity)
+                except OutOfStockError:
+                    logger.warning(f"⚠️ Carril {lane_id}: sin stock para apartar {line.quantity} x {line.codigo_barra} tras el cobro")
+                except Exception as e:
+                    logger.error(f"❌ Carril {lane_id}: error apartando {line.codigo_barra} tras el cobro: {e}")
+            return snapshot
+
+    def get_status(self) -> dict:
+        """Resumen de carritos abiertos"""
+        lanes = {}
+        for key in self.state.keys(self._key("")):
+            cart = self.get_cart(key[len(self._key("")):])
+            lanes[cart.lane_id] = {
+                "items_count": cart.items_count,
+                "total": float(cart.total),
+                "version": cart.version,
+            }
+        return {"lanes": lanes}
+
+
+# Instancia global del gestor de carritos
+_cart_manager: Optional[CartManager] = None
+
+
+def get_cart_manager() -> CartManager:
+    """
+    Obtener la instancia global del gestor de carritos
+
+    Returns:
+        Instancia única de CartManager
+    """
+    global _cart_manager
+
+    if _cart_manager is None:
+        _cart_manager = CartManager(state=get_shared_state())
+
+    return _cart_manager
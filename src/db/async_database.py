@@ -0,0 +1,164 @@
+"""
+Acceso asíncrono a la base de datos (opcional)
+
+Con ``DB_ASYNC=true`` las rutas que dependen de ``get_async_db`` reciben una
+``AsyncSession`` sobre un ``AsyncEngine`` (aiosqlite para SQLite, asyncpg
+para PostgreSQL, derivado de ``DATABASE_URL``): mientras un request espera
+a la base, el event loop de uvicorn sigue atendiendo a los demás carriles.
+
+Con ``DB_ASYNC=false`` (por defecto) esas mismas rutas reciben una
+``ThreadedSession``: la sesión síncrona del request con la misma interfaz
+``await``, ejecutada en el threadpool para no bloquear el event loop. Así
+las rutas y los repositorios asíncronos (``db.async_repositories``) son
+uno solo y el cambio es solo de configuración.
+"""
+
+import logging
+import os
+
+import anyio
+
+from .database import DATABASE_URL, get_db
+from .pool_metrics import pool_options
+from .sqlite_pragmas import apply_sqlite_pragmas
+
+logger = logging.getLogger(__name__)
+
+_ASYNC_DRIVERS = {
+    "sqlite": ("sqlite+aiosqlite", "aiosqlite"),
+    "postgresql": ("postgresql+asyncpg", "asyncpg"),
+}
+
+_async_engine = None
+_async_sessionmaker = None
+
+
+def async_enabled() -> bool:
+    return os.getenv("DB_ASYNC", "false").lower() == "true"
+
+
+def to_async_url(url: str) -> str:
+    """URL equivalente con el driver asíncrono (``sqlite://`` -> ``sqlite+aiosqlite://``)"""
+    scheme, rest = url.split("://", 1)
+    dialect = scheme.split("+", 1)[0]
+
+    if dialect not in _ASYNC_DRIVERS:
+        raise ValueError(f"Sin driver asíncrono para {dialect}")
+
+    return f"{_ASYNC_DRIVERS[dialect][0]}://{rest}"
+
+
+def get_async_engine():
+    """
+    Obtener el AsyncEngine global (se crea al primer uso)
+
+    Returns:
+        AsyncEngine sobre ``DATABASE_URL`` con el pool y PRAGMAs del proyecto
+    """
+    global _async_engine
+
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+        url = to_async_url(DATABASE_URL)
+        # Mismos parámetros de pool, con la variante asíncrona de QueuePool
+        options = pool_options(DATABASE_URL)
+        if options:
+            options["poolclass"] = AsyncAdaptedQueuePool
+        try:
+            _async_engine = create_async_engine(url, **options)
+        except ImportError as e:
+            driver = _ASYNC_DRIVERS[url.split("+", 1)[0]][1]
+            raise RuntimeError(f"DB_ASYNC=true requiere el paquete '{driver}' ({e})") from e
+
+        apply_sqlite_pragmas(_async_engine.sync_engine)
+        logger.info(f"⚡ Engine asíncrono creado ({_async_engine.url.drivername})")
+
+    return _async_engine
+
+
+def get_async_sessionmaker():
+    """Fábrica de ``AsyncSession`` sobre el engine asíncrono global"""
+    global _async_sessionmaker
+
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        _async_sessionmaker = async_sessionmaker(
+            get_async_engine(), autoflush=False, expire_on_commit=False
+        )
+
+    return _async_sessionmaker
+
+
+async def dispose_async_engine():
+    """Cerrar las conexiones del engine asíncrono si se llegó a crear"""
+    global _async_engine, _async_sessionmaker
+
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_sessionmaker = None
+
+
+class ThreadedSession:
+    """
+    Subconjunto de la interfaz de ``AsyncSession`` sobre una ``Session``
+
+    Cada operación corre en el threadpool; los resultados se devuelven ya
+    leídos (con sus cargas ``selectinload``) para no tocar la base desde
+    el event loop.
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    async def execute(self, statement, params=None):
+        def run():
+            result = self.sync_session.execute(statement, params)
+            # Las sentencias sin filas (UPDATE, DELETE) no se pueden congelar
+            return result.freeze() if getattr(result, "returns_rows", True) else result
+
+        result = await anyio.to_thread.run_sync(run)
+        return result() if callable(result) else result
+
+    async def scalar(self, statement, params=None):
+        return (await self.execute(statement, params)).scalar()
+
+    async def scalars(self, statement, params=None):
+        return (await self.execute(statement, params)).scalars()
+
+    async def get(self, entity, ident):
+        return await anyio.to_thread.run_sync(self.sync_session.get, entity, ident)
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    async def flush(self):
+        await anyio.to_thread.run_sync(self.sync_session.flush)
+
+    async def commit(self):
+        await anyio.to_thread.run_sync(self.sync_session.commit)
+
+    async def rollback(self):
+        await anyio.to_thread.run_sync(self.sync_session.rollback)
+
+
+async def get_async_db():
+    """
+    Dependencia para rutas asíncronas
+
+    ``AsyncSession`` propia del request con ``DB_ASYNC=true``; si no, la
+    sesión del request (``get_db``) envuelta en ``ThreadedSession``.
+    """
+    if async_enabled():
+        async with get_async_sessionmaker()() as session:
+            yield session
+        return
+
+    db_gen = get_db()
+    db = next(db_gen)
+    try:
+        yield ThreadedSession(db)
+    finally:
+        db_gen.close()
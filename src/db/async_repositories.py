@@ -0,0 +1,82 @@
+"""
+Repositorios asíncronos
+
+Versiones ``await`` de los repositorios de ``db.repositories`` para las
+rutas que usan ``get_async_db``. Funcionan igual con una ``AsyncSession``
+(``DB_ASYNC=true``) o con una ``ThreadedSession`` y comparten las mismas
+sentencias que los repositorios síncronos.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+
+from .models import EscaneoHistorial
+from .models_advanced import Producto, Sale
+from .repositories import (
+    ProductoLookup,
+    PRODUCTO_LOOKUP_BY_CODE,
+    sale_detail_statement,
+    sales_page_statement,
+)
+
+
+class AsyncProductoRepository:
+    """Consultas sobre la tabla ``productos``"""
+
+    def __init__(self, db):
+        self.db = db
+
+    async def lookup(self, codigo_barra: str) -> Optional[ProductoLookup]:
+        """Columnas de lectura de un producto por código (activo o no)"""
+        row = (await self.db.execute(PRODUCTO_LOOKUP_BY_CODE, {"codigo": codigo_barra})).first()
+        return ProductoLookup(*row) if row else None
+
+
+class AsyncSaleRepository:
+    """Lecturas de ventas con planes de carga explícitos"""
+
+    def __init__(self, db):
+        self.db = db
+
+    async def list(self, **filters) -> List[Tuple[Sale, int]]:
+        """Página de ventas recientes con su cantidad de items (ver ``sales_page_statement``)"""
+        return [tuple(row) for row in await self.db.execute(sales_page_statement(**filters))]
+
+    async def get_detail(self, sale_id: int) -> Optional[Sale]:
+        """Venta con cajero, cliente, items (con producto) y pagos en tres consultas"""
+        return (await self.db.execute(sale_detail_statement(sale_id))).scalars().first()
+
+
+class AsyncScanRepository:
+    """Consultas sobre el historial de escaneos"""
+
+    def __init__(self, db):
+        self.db = db
+
+    async def recent(
+        self,
+        tipos: Sequence[str],
+        since_id: Optional[int] = None,
+        limit: int = 10,
+    ) -> List[Tuple[EscaneoHistorial, Optional[Producto]]]:
+        """
+        Escaneos más recientes de ciertos tipos con su producto
+
+        El producto se resuelve en la misma consulta (LEFT JOIN). Sin
+        ``since_id`` devuelve los ``limit`` más nuevos (del más reciente al
+        más antiguo). Con ``since_id`` es un cursor: los ``limit`` siguientes
+        a ese id en orden ascendente, así ninguna fila nueva se salta aunque
+        lleguen más de ``limit`` entre dos consultas.
+        """
+        statement = select(EscaneoHistorial, Producto).outerjoin(
+            Producto, Producto.codigo_barra == EscaneoHistorial.codigo_barra
+        ).where(EscaneoHistorial.tipo_codigo.in_(tipos))
+
+        if since_id is None:
+            statement = statement.order_by(EscaneoHistorial.id.desc())
+        else:
+            statement = statement.where(EscaneoHistorial.id > since_id).order_by(EscaneoHistorial.id)
+
+        result = await self.db.execute(statement.limit(limit))
+        return [tuple(row) for row in result]
@@ -0,0 +1,201 @@
+"""
+Índice materializado de categorías del catálogo
+
+La tabla ``producto_categorias`` guarda una fila por combinación
+categoría / subcategoría / marca con la cantidad de productos. Los
+triggers de SQLite la mantienen al insertar, modificar o borrar productos,
+de modo que listar categorías o armar el árbol con conteos cuesta
+O(categorías) en lugar de recorrer ``productos``.
+
+Las columnas ``subcategoria`` y ``marca`` solo existen en el esquema
+avanzado; el índice usa las que tenga la tabla. Si cambian las columnas o
+la definición de los triggers, el índice se recrea al arrancar (ver
+``db.ddl_versions``). Los valores nulos se
+guardan como cadena vacía para que formen parte de la clave primaria.
+"""
+
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from .ddl_versions import definition_hash, store_hash, stored_hash
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_TABLE = "producto_categorias"
+
+# Niveles de la jerarquía, de mayor a menor
+LEVELS = ("categoria", "subcategoria", "marca")
+
+_lock = threading.Lock()
+_ready: dict = {}
+
+
+def _key_values(ref: str, columns: Tuple[str, ...]) -> str:
+    return ", ".join(f"COALESCE({ref}.{c}, '')" for c in columns)
+
+
+def _increment(ref: str, columns: Tuple[str, ...]) -> str:
+    cols = ", ".join(columns)
+    return f"""
+        INSERT INTO {CATEGORY_TABLE}({cols}, productos) VALUES ({_key_values(ref, columns)}, 1)
+        ON CONFLICT({cols}) DO UPDATE SET productos = productos + 1;
+    """
+
+
+def _decrement(ref: str, columns: Tuple[str, ...]) -> str:
+    match = " AND ".join(f"{c} = COALESCE({ref}.{c}, '')" for c in columns)
+    return f"""
+        UPDATE {CATEGORY_TABLE} SET productos = productos - 1 WHERE {match};
+        DELETE FROM {CATEGORY_TABLE} WHERE productos <= 0;
+    """
+
+
+def _category_ddl(columns: Tuple[str, ...]) -> List[str]:
+    """Sentencias que crean la tabla de categorías y sus triggers"""
+    cols = ", ".join(columns)
+    column_defs = ", ".join(f"{c} VARCHAR NOT NULL DEFAULT ''" for c in columns)
+    # Solo cuando cambia algún nivel (no en cada descuento de stock)
+    changed = " OR ".join(f"old.{c} IS NOT new.{c}" for c in columns)
+
+    return [
+        f"""
+        CREATE TABLE {CATEGORY_TABLE} (
+            {column_defs},
+            productos INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY ({cols})
+        )
+        """,
+        f"""
+        CREATE TRIGGER {CATEGORY_TABLE}_ai AFTER INSERT ON productos BEGIN
+            {_increment('new', columns)}
+        END
+        """,
+        f"""
+        CREATE TRIGGER {CATEGORY_TABLE}_ad AFTER DELETE ON productos BEGIN
+            {_decrement('old', columns)}
+        END
+        """,
+        f"""
+        CREATE TRIGGER {CATEGORY_TABLE}_au AFTER UPDATE OF {cols} ON productos
+        WHEN {changed} BEGIN
+            {_decrement('old', columns)}
+            {_increment('new', columns)}
+        END
+        """,
+    ]
+
+
+def ensure_category_index(engine: Engine) -> Optional[Tuple[str, ...]]:
+    """
+    Crea (o recrea si cambió su definición) la tabla de categorías y sus triggers
+
+    Returns:
+        Niveles indexados (ej. ``('categoria', 'subcategoria', 'marca')``) o
+        None si el motor no es SQLite y hay que agrupar sobre ``productos``
+    """
+    key = str(engine.url)
+    if key in _ready:
+        return _ready[key]
+
+    with _lock:
+        if key in _ready:
+            return _ready[key]
+
+        if engine.dialect.name != "sqlite":
+            _ready[key] = None
+            return None
+
+        if not inspect(engine).has_table("productos"):
+            # Aún sin esquema: no se cachea para reintentar más tarde
+            return None
+
+        existing = {c["name"] for c in inspect(engine).get_columns("productos")}
+        columns = tuple(c for c in LEVELS if c in existing)
+        statements = _category_ddl(columns)
+        digest = definition_hash(statements)
+
+        with engine.begin() as conn:
+            if stored_hash(conn, CATEGORY_TABLE) != digest:
+                for suffix in ("ai", "ad", "au"):
+                    conn.execute(text(f"DROP TRIGGER IF EXISTS {CATEGORY_TABLE}_{suffix}"))
+                conn.execute(text(f"DROP TABLE IF EXISTS {CATEGORY_TABLE}"))
+                for statement in statements:
+                    conn.execute(text(statement))
+                cols = ", ".join(columns)
+                conn.execute(text(f"""
+                    INSERT INTO {CATEGORY_TABLE}({cols}, productos)
+                    SELECT {_key_values('productos', columns)}, COUNT(*) FROM productos
+                    GROUP BY {_key_values('productos', columns)}
+                """))
+                store_hash(conn, CATEGORY_TABLE, digest)
+                logger.info("✅ Índice de categorías creado")
+
+        _ready[key] = columns
+        return columns
+
+
+def _grouped_counts(db: Session, columns: Tuple[str, ...], filters: Dict[str, str]) -> List[tuple]:
+    """Filas (nivel1, nivel2, ..., productos) desde el índice o agrupando"""
+    cols = ", ".join(columns)
+    where = " AND ".join(f"{c} = :{c}" for c in filters) or "1 = 1"
+
+    if ensure_category_index(db.get_bind()) is not None:
+        stmt = f"SELECT {cols}, productos FROM {CATEGORY_TABLE} WHERE {where}"
+    else:
+        keys = _key_values("productos", columns)
+        where = " AND ".join(f"COALESCE({c}, '') = :{c}" for c in filters) or "1 = 1"
+        stmt = f"SELECT {keys}, COUNT(*) FROM productos WHERE {where} GROUP BY {keys}"
+
+    return [tuple(row) for row in db.execute(text(stmt), filters).all()]
+
+
+def get_categories(db: Session) -> List[str]:
+    """Categorías no vacías en orden alfabético"""
+    columns = ensure_category_index(db.get_bind())
+    if columns is None:
+        rows = db.execute(text("SELECT DISTINCT categoria FROM productos WHERE categoria IS NOT NULL")).all()
+    else:
+        rows = db.execute(text(f"SELECT DISTINCT categoria FROM {CATEGORY_TABLE} WHERE categoria != ''")).all()
+    return sorted(row[0] for row in rows if row[0])
+
+
+def get_category_tree(db: Session, **filters: Optional[str]) -> List[dict]:
+    """
+    Árbol categoría → subcategoría → marca con cantidad de productos
+
+    Args:
+        db: Sesión de base de datos
+        **filters: Nivel y valor para acotar el árbol (ej. ``categoria='Bebidas'``)
+
+    Returns:
+        Lista de nodos ``{"nombre", "productos", <hijos>}`` ordenados por nombre
+    """
+    engine = db.get_bind()
+    columns = ensure_category_index(engine)
+    if columns is None:
+        existing = {c["name"] for c in inspect(engine).get_columns("productos")}
+        columns = tuple(c for c in LEVELS if c in existing)
+
+    filters = {k: v for k, v in filters.items() if v is not None and k in columns}
+    rows = _grouped_counts(db, columns, filters)
+
+    def build(level: int, subset: List[tuple]) -> List[dict]:
+        groups: Dict[str, List[tuple]] = {}
+        for row in subset:
+            groups.setdefault(row[level], []).append(row)
+
+        nodes = []
+        for name in sorted(groups):
+            group = groups[name]
+            node = {"nombre": name or None, "productos": sum(row[-1] for row in group)}
+            if level + 1 < len(columns):
+                node[f"{columns[level + 1]}s"] = build(level + 1, group)
+            nodes.append(node)
+        return nodes
+
+    return build(0, rows)
@@ -0,0 +1,169 @@
+"""
+Registro de cambios del catálogo para sincronización incremental
+
+La tabla ``producto_changes`` guarda una secuencia monótona (``seq``) por
+cada alta, modificación o baja en ``productos``. Los triggers de SQLite la
+mantienen para cualquier escritura (ORM, SQL directo o upserts masivos).
+
+Solo se conserva el último cambio de cada código: al registrar uno nuevo se
+borra el anterior. Así la tabla no crece más que el catálogo (más las
+bajas) y un cliente con cualquier ``since`` recibe el estado final de cada
+producto modificado, incluidas las bajas como tombstones.
+
+La tabla y sus triggers se versionan en ``ddl_versions`` como los índices
+de ``search_index`` y ``category_index``.
+"""
+
+import logging
+import threading
+from typing import List, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from .ddl_versions import definition_hash, store_hash, stored_hash
+
+logger = logging.getLogger(__name__)
+
+CHANGES_TABLE = "producto_changes"
+
+OP_UPSERT = "upsert"
+OP_DELETE = "delete"
+
+_lock = threading.Lock()
+_ready: dict = {}
+
+
+def _record_change(ref: str, op: str) -> str:
+    """Sentencias del trigger: compacta el cambio previo y registra el nuevo"""
+    return f"""
+        DELETE FROM {CHANGES_TABLE} WHERE codigo_barra = {ref}.codigo_barra;
+        INSERT INTO {CHANGES_TABLE}(codigo_barra, operation) VALUES ({ref}.codigo_barra, '{op}');
+    """
+
+
+def _changes_ddl() -> List[str]:
+    """Sentencias que crean la tabla de cambios y sus triggers"""
+    return [
+        f"""
+        CREATE TABLE {CHANGES_TABLE} (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            codigo_barra VARCHAR NOT NULL,
+            operation VARCHAR(10) NOT NULL,
+            changed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        f"CREATE UNIQUE INDEX ix_{CHANGES_TABLE}_codigo ON {CHANGES_TABLE}(codigo_barra)",
+        f"""
+        CREATE TRIGGER {CHANGES_TABLE}_ai AFTER INSERT ON productos BEGIN
+            {_record_change('new', OP_UPSERT)}
+        END
+        """,
+        f"""
+        CREATE TRIGGER {CHANGES_TABLE}_au AFTER UPDATE ON productos BEGIN
+            {_record_change('new', OP_UPSERT)}
+        END
+        """,
+        # Cambio de código de barras: el código anterior queda como baja
+        f"""
+        CREATE TRIGGER {CHANGES_TABLE}_au_codigo AFTER UPDATE OF codigo_barra ON productos
+        WHEN old.codigo_barra IS NOT new.codigo_barra BEGIN
+            {_record_change('old', OP_DELETE)}
+        END
+        """,
+        f"""
+        CREATE TRIGGER {CHANGES_TABLE}_ad AFTER DELETE ON productos BEGIN
+            {_record_change('old', OP_DELETE)}
+        END
+        """,
+    ]
+
+
+def ensure_change_log(engine: Engine) -> bool:
+    """
+    Crea la tabla de cambios y sus triggers, o los recrea si su definición cambió
+
+    Al (re)crearla se registra todo el catálogo existente como un alta, de
+    modo que ``since=0`` equivale a una descarga completa. La secuencia
+    continúa desde la última de la tabla anterior y se conservan sus bajas:
+    un cliente con un ``since`` previo recibe todo el catálogo de nuevo y no
+    pierde ningún tombstone.
+
+    Returns:
+        True si el registro de cambios está disponible en este motor
+    """
+    key = str(engine.url)
+    if key in _ready:
+        return _ready[key]
+
+    with _lock:
+        if key in _ready:
+            return _ready[key]
+
+        if engine.dialect.name != "sqlite":
+            logger.warning("⚠️ Registro de cambios del catálogo solo disponible en SQLite")
+            _ready[key] = False
+            return False
+
+        if not inspect(engine).has_table("productos"):
+            # Aún sin esquema: no se cachea para reintentar más tarde
+            return False
+
+        statements = _changes_ddl()
+        digest = definition_hash(statements)
+
+        with engine.begin() as conn:
+            if stored_hash(conn, CHANGES_TABLE) != digest:
+                last_seq, tombstones = 0, []
+                if inspect(conn).has_table(CHANGES_TABLE):
+                    last_seq = conn.execute(text(f"SELECT COALESCE(MAX(seq), 0) FROM {CHANGES_TABLE}")).scalar()
+                    tombstones = [dict(row._mapping) for row in conn.execute(text(f"""
+                        SELECT seq, codigo_barra, operation, changed_at FROM {CHANGES_TABLE}
+                        WHERE operation = '{OP_DELETE}'
+                          AND codigo_barra NOT IN (SELECT codigo_barra FROM productos)
+                    """))]
+
+                for suffix in ("ai", "au", "au_codigo", "ad"):
+                    conn.execute(text(f"DROP TRIGGER IF EXISTS {CHANGES_TABLE}_{suffix}"))
+                conn.execute(text(f"DROP TABLE IF EXISTS {CHANGES_TABLE}"))
+                for statement in statements:
+                    conn.execute(text(statement))
+
+                if tombstones:
+                    conn.execute(text(f"""
+                        INSERT INTO {CHANGES_TABLE}(seq, codigo_barra, operation, changed_at)
+                        VALUES (:seq, :codigo_barra, :operation, :changed_at)
+                    """), tombstones)
+                conn.execute(text(f"""
+                    INSERT INTO {CHANGES_TABLE}(seq, codigo_barra, operation)
+                    SELECT :last_seq + ROW_NUMBER() OVER (ORDER BY rowid), codigo_barra, '{OP_UPSERT}'
+                    FROM productos WHERE codigo_barra IS NOT NULL
+                """), {"last_seq": last_seq})
+                store_hash(conn, CHANGES_TABLE, digest)
+                logger.info("✅ Registro de cambios del catálogo creado")
+
+        _ready[key] = True
+        return True
+
+
+def get_changes(db: Session, since: int, limit: int) -> Tuple[List[Tuple[int, str, str]], int]:
+    """
+    Cambios posteriores a ``since`` en orden de secuencia
+
+    Args:
+        db: Sesión de base de datos
+        since: Última secuencia que el cliente ya aplicó
+        limit: Máximo de cambios a devolver
+
+    Returns:
+        Tupla (lista de (seq, codigo_barra, operation), secuencia actual)
+    """
+    rows = db.execute(text(f"""
+        SELECT seq, codigo_barra, operation FROM {CHANGES_TABLE}
+        WHERE seq > :since ORDER BY seq LIMIT :limit
+    """), {"since": since, "limit": limit}).all()
+
+    current = db.execute(text(f"SELECT COALESCE(MAX(seq), 0) FROM {CHANGES_TABLE}")).scalar()
+
+    return [tuple(row) for row in rows], current
@@ -0,0 +1,159 @@
+"""
+Versiones de datos para caché HTTP (ETag)
+
+Cada espacio de nombres ("catalog", "config") agrupa una o más tablas.
+
+En SQLite la versión vive en la propia base: la tabla ``data_versions``
+(revisión 0006) tiene un contador por espacio de nombres que los triggers
+incrementan en cada escritura sobre las tablas vigiladas. Cualquier
+escritor (otro worker, un script, SQL directo) invalida el ETag, y leer la
+versión es una consulta por clave primaria antes de cualquier otra
+consulta del endpoint.
+
+Sin esa tabla (otros motores, o bases creadas con ``create_all``) se usa un
+contador en el estado compartido (``db.shared_state``): un listener sobre
+todos los engines detecta las sentencias que escriben en las tablas
+vigiladas y, cuando la transacción se confirma, lo incrementa. La versión
+incluye entonces una época aleatoria para que al reiniciar el servidor los
+ETag anteriores dejen de coincidir. Este modo solo ve las escrituras hechas
+por la aplicación, y con varios workers necesita un backend compartido.
+"""
+
+import logging
+import re
+import threading
+import uuid
+from typing import Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+from .shared_state import InMemoryState, SharedState, get_shared_state
+
+logger = logging.getLogger(__name__)
+
+# Tablas que invalidan cada espacio de nombres
+WATCHED_TABLES = {
+    "productos": "catalog",
+    "system_config": "config",
+}
+
+_WRITE_RE = re.compile(
+    r"^\s*(?:INSERT|UPDATE|DELETE|REPLACE)\b.*?\b(" + "|".join(WATCHED_TABLES) + r")\b",
+    re.IGNORECASE | re.DOTALL
+)
+
+# Clave en ``connection.info`` con los espacios modificados pendientes de commit
+_PENDING_KEY = "data_version_pending"
+
+# Tabla de versiones mantenida por triggers (revisión 0006, solo SQLite)
+VERSIONS_TABLE = "data_versions"
+
+# Claves en el estado compartido
+EPOCH_KEY = "data_version:epoch"
+_COUNTER_KEY = "data_version:{}"
+
+
+class DataVersions:
+    """
+    Versiones por espacio de nombres, leídas de la base o del estado compartido
+
+    Los contadores del estado compartido se incrementan tras el commit, y
+    los de la base dentro de la misma transacción que escribe: en ambos
+    casos una lectura concurrente con una escritura sin confirmar nunca
+    queda cacheada bajo la versión nueva.
+    """
+
+    def __init__(self, state: Optional[SharedState] = None, engine: Optional[Engine] = None):
+        self.state = state if state is not None else InMemoryState()
+        # Sin engine se usa el de la aplicación vigente
+        self.engine = engine
+        # El primer worker fija la época; el resto la adopta
+        self.epoch = self.state.setdefault(EPOCH_KEY, uuid.uuid4().hex[:8])
+
+    def _engine(self) -> Engine:
+        if self.engine is not None:
+            return self.engine
+        from . import database
+        return database.engine
+
+    def _db_version(self, namespace: str) -> Optional[int]:
+        """Contador de ``data_versions`` (None si la base no lo tiene)"""
+        engine = self._engine()
+        if engine.dialect.name != "sqlite":
+            return None
+        try:
+            with engine.connect() as conn:
+                return conn.execute(
+                    text(f"SELECT version FROM {VERSIONS_TABLE} WHERE namespace = :namespace"),
+                    {"namespace": namespace}
+                ).scalar()
+        except OperationalError:
+            # Base sin migrar a la revisión 0006
+            return None
+
+    def _version(self, namespace: str) -> int:
+        return self.state.get(_COUNTER_KEY.format(namespace)) or 0
+
+    def get(self, namespace: str) -> str:
+        """Versión actual del espacio de nombres (ej. ``'1792425600'`` o ``'3f9a1c2e-12'``)"""
+        version = self._db_version(namespace)
+        if version is not None:
+            return str(version)
+        return f"{self.epoch}-{self._version(namespace)}"
+
+    def bump(self, *namespaces: str):
+        """Marca los espacios de nombres como modificados (modo estado compartido)"""
+        for namespace in namespaces:
+            self.state.incr(_COUNTER_KEY.format(namespace))
+
+    def get_status(self) -> dict:
+        return {
+            "epoch": self.epoch,
+            "versions": {namespace: self.get(namespace) for namespace in set(WATCHED_TABLES.values())},
+        }
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    match = _WRITE_RE.match(statement)
+    if match:
+        conn.info.setdefault(_PENDING_KEY, set()).add(WATCHED_TABLES[match.group(1).lower()])
+
+
+def _on_commit(conn):
+    pending = conn.info.pop(_PENDING_KEY, None)
+    if pending:
+        get_data_versions().bump(*pending)
+
+
+def _on_rollback(conn):
+    conn.info.pop(_PENDING_KEY, None)
+
+
+# Instancia global de versiones
+_data_versions: Optional[DataVersions] = None
+_install_lock = threading.Lock()
+
+
+def get_data_versions() -> DataVersions:
+    """
+    Obtener la instancia global de versiones de datos
+
+    La primera llamada registra los listeners en todos los engines.
+
+    Returns:
+        Instancia única de DataVersions
+    """
+    global _data_versions
+
+    if _data_versions is None:
+        with _install_lock:
+            if _data_versions is None:
+                event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+                event.listen(Engine, "commit", _on_commit)
+                event.listen(Engine, "rollback", _on_rollback)
+                _data_versions = DataVersions(get_shared_state())
+                logger.debug("Seguimiento de versiones de datos activado")
+
+    return _data_versions
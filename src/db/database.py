@@ -4,25 +4,65 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from dotenv import load_dotenv
 
+from .pool_metrics import pool_options
+from .sqlite_pragmas import apply_sqlite_pragmas
+from .unit_of_work import current_unit_of_work
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./inventario_pos_advanced.db")
 
+# Réplica de lectura opcional para reportes (misma URL si no se define)
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL") or None
+
+
+def create_db_engine(url: str):
+    """
+    Crear un engine con la configuración de pool y PRAGMAs del proyecto
+    
+    Sirve igual para SQLite y PostgreSQL: solo cambia la URL.
+    """
+    db_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False} if url.startswith("sqlite") else {},
+        **pool_options(url)
+    )
+    
+    # PRAGMAs de rendimiento (WAL, synchronous=NORMAL, mmap...) en cada conexión
+    apply_sqlite_pragmas(db_engine)
+    
+    return db_engine
+
+
 # Crear engine de SQLAlchemy
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+engine = create_db_engine(DATABASE_URL)
+read_engine = create_db_engine(DATABASE_READ_URL) if DATABASE_READ_URL else engine
+
+# Herramienta de desarrollo: planes de ejecución de las consultas lentas
+if os.getenv("QUERY_ADVISOR", "false").lower() == "true":
+    from .query_advisor import get_query_advisor
+    get_query_advisor().install(engine)
 
-# Crear sessionmaker
+# Fábrica de sesiones única para todo el proceso
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 # Base para los modelos
 Base = declarative_base()
 
 
 def get_db():
-    """Dependencia para obtener una sesión de base de datos"""
+    """
+    Dependencia para obtener una sesión de base de datos
+    
+    Dentro de un request con ``UnitOfWorkMiddleware`` devuelve la sesión
+    compartida del request, que el middleware cierra al final.
+    """
+    uow = current_unit_of_work()
+    if uow is not None:
+        yield uow.session
+        return
+    
     db = SessionLocal()
     try:
         yield db
@@ -30,18 +70,35 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    """
+    Dependencia para consultas de solo lectura pesadas (reportes)
+    
+    Usa la réplica de ``DATABASE_READ_URL`` si está configurada; si no,
+    equivale a ``get_db``.
+    """
+    if read_engine is engine:
+        yield from get_db()
+        return
+    
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 def get_db_engine():
     """Obtener engine de base de datos"""
     return engine
 
 
 def create_tables():
-    """Crear todas las tablas en la base de datos"""
-    from .models import Base
-    Base.metadata.create_all(bind=engine)
+    """Crear o actualizar las tablas aplicando las migraciones pendientes"""
+    from .schema_migrations import ensure_schema
+    return ensure_schema(engine)
 
 
 def create_advanced_tables():
-    """Crear tablas del sistema avanzado"""
-    from .models_advanced import Base
-    Base.metadata.create_all(bind=engine)
+    """Crear tablas del sistema avanzado (mismo esquema unificado)"""
+    create_tables()
@@ -0,0 +1,45 @@
+"""
+Versiones de los objetos auxiliares creados con SQL directo
+
+Los índices FTS5 y el índice de categorías se crean al arrancar, fuera de
+Alembic. ``CREATE ... IF NOT EXISTS`` no sirve para actualizarlos: si
+cambia la definición de un trigger o de una tabla (o las columnas de
+``productos``) la base seguiría con la versión vieja.
+
+Cada objeto guarda en ``ddl_versions`` el hash de las sentencias que lo
+crearon. Si al arrancar el hash no coincide, el módulo dueño lo borra y lo
+vuelve a crear.
+"""
+
+import hashlib
+import re
+from typing import Iterable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+VERSIONS_TABLE = "ddl_versions"
+
+
+def definition_hash(statements: Iterable[str]) -> str:
+    """Hash de las sentencias DDL (ignora diferencias de espacios)"""
+    normalized = ";".join(re.sub(r"\s+", " ", statement).strip() for statement in statements)
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def stored_hash(conn: Connection, name: str) -> Optional[str]:
+    """Hash guardado para el objeto (None si nunca se registró)"""
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {VERSIONS_TABLE} (name VARCHAR PRIMARY KEY, hash VARCHAR NOT NULL)"
+    ))
+    return conn.execute(
+        text(f"SELECT hash FROM {VERSIONS_TABLE} WHERE name = :name"), {"name": name}
+    ).scalar()
+
+
+def store_hash(conn: Connection, name: str, digest: str):
+    """Registra el hash de la definición vigente del objeto"""
+    conn.execute(text(f"""
+        INSERT INTO {VERSIONS_TABLE}(name, hash) VALUES (:name, :hash)
+        ON CONFLICT(name) DO UPDATE SET hash = excluded.hash
+    """), {"name": name, "hash": digest})
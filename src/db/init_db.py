@@ -3,7 +3,8 @@ Script para inicializar la base de datos con datos de ejemplo
 """
 from sqlalchemy.orm import Session
 from .database import engine, SessionLocal
-from .models import Base, Producto, Usuario
+from .models import Producto, Usuario
+from .schema_migrations import ensure_schema
 from passlib.context import CryptContext
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -115,10 +116,15 @@ def init_database():
     """Inicializar la base de datos con datos de ejemplo"""
     print("🔧 Iniciando configuración de base de datos...")
     
-    # Crear todas las tablas
-    Base.metadata.create_all(bind=engine)
-    print("✅ Tablas de base de datos creadas")
+    # Aplicar migraciones pendientes
+    ensure_schema(engine)
+    print("✅ Esquema de base de datos al día")
     
+    seed_database()
+
+
+def seed_database():
+    """Cargar productos de ejemplo y usuario administrador si faltan"""
     # Crear sesión
     db = SessionLocal()
     
@@ -0,0 +1,131 @@
+"""
+Comparación de búsquedas de productos: instancias ORM vs. ``ProductoLookup``
+
+Mide, sobre una base SQLite en memoria con datos sintéticos:
+
+- latencia de una búsqueda por código como la hace un escaneo (consulta +
+  validación Pydantic de la respuesta)
+- memoria retenida al resolver muchos códigos de una vez (checkout grande,
+  precarga de carril)
+
+Uso::
+
+    python -m src.db.lookup_benchmark [productos] [busquedas]
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from . import models, models_advanced  # noqa: F401  (registran los modelos)
+from .database import Base
+from .repositories import ProductoRepository
+
+
+def _seed(db, productos: int):
+    repo = ProductoRepository(db)
+    for i in range(productos):
+        repo.add(
+            codigo_barra=f"75{i:011d}",
+            nombre=f"Producto {i}",
+            descripcion="Producto de prueba para el benchmark de búsquedas",
+            precio=Decimal("12.50"),
+            stock=100,
+            categoria="Abarrotes",
+            tax_rate=Decimal("16.00"),
+            is_taxable=True,
+            is_active=True,
+        )
+    db.commit()
+
+
+def _time_lookups(db, codigos, find) -> float:
+    from ..api.schemas import Producto as ProductoSchema
+
+    start = time.perf_counter()
+    for codigo in codigos:
+        producto = find(db, codigo)
+        ProductoSchema.model_validate(producto, from_attributes=True)
+        # Cada escaneo llega en un request distinto: sin caché de sesión
+        db.expunge_all()
+    return (time.perf_counter() - start) * 1000 / len(codigos)
+
+
+def _retained_kib(db, codigos, load) -> float:
+    db.expunge_all()
+    tracemalloc.start()
+    result = load(db, codigos)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    db.expunge_all()
+    return current / 1024
+
+
+def run(productos: int = 5000, busquedas: int = 2000) -> dict:
+    """
+    Ejecutar la comparación
+
+    Returns:
+        ``{"orm": {...}, "lookup": {...}}`` con ``lookup_ms`` (por búsqueda)
+        y ``memory_kib`` (al resolver todos los productos de una vez)
+    """
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+    try:
+        _seed(db, productos)
+        rng = random.Random(42)
+        codigos = [f"75{rng.randrange(productos):011d}" for _ in range(busquedas)]
+        todos = [f"75{i:011d}" for i in range(productos)]
+
+        paths = {
+            "orm": (
+                lambda db, codigo: ProductoRepository(db).get(codigo),
+                lambda db, codigos: ProductoRepository(db).get_many(codigos),
+            ),
+            "lookup": (
+                lambda db, codigo: ProductoRepository(db).lookup(codigo),
+                lambda db, codigos: ProductoRepository(db).lookup_many(codigos),
+            ),
+        }
+
+        return {
+            name: {
+                "lookup_ms": round(_time_lookups(db, codigos, find), 4),
+                "memory_kib": round(_retained_kib(db, todos, load), 1),
+            }
+            for name, (find, load) in paths.items()
+        }
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    productos = int(argv[0]) if argv else 5000
+    busquedas = int(argv[1]) if len(argv) > 1 else 2000
+
+    results = run(productos, busquedas)
+    orm, lookup = results["orm"], results["lookup"]
+
+    print(f"📊 {productos} productos, {busquedas} búsquedas")
+    print(f"{'':10}{'ms/búsqueda':>14}{'KiB retenidos':>16}")
+    for name, metrics in results.items():
+        print(f"{name:10}{metrics['lookup_ms']:>14.4f}{metrics['memory_kib']:>16.1f}")
+    print(
+        f"\nLookup: {orm['lookup_ms'] / lookup['lookup_ms']:.1f}x más rápido, "
+        f"{orm['memory_kib'] / lookup['memory_kib']:.1f}x menos memoria"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Entorno de Alembic
+
+Usa el engine del proyecto (``db.database``) para que las migraciones
+apliquen el mismo pool y PRAGMAs que la aplicación, y el ``Base`` unificado
+como metadata de referencia para ``--autogenerate``.
+
+Las tablas auxiliares creadas con SQL directo (índices FTS5, registro de
+cambios, índice de categorías y sus versiones de DDL) no están en la
+metadata y se ignoran.
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+
+from src.db.database import Base, engine
+from src.db import models, models_advanced  # noqa: F401  (registran los modelos)
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Ignorar tablas de la base que no pertenecen a los modelos"""
+    if type_ == "table" and reflected and compare_to is None:
+        return False
+    return True
+
+
+def run_migrations_offline() -> None:
+    """Generar el SQL de las migraciones sin conectarse"""
+    context.configure(
+        url=str(engine.url),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
+        include_object=include_object,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Aplicar las migraciones sobre la base configurada"""
+    connectable = config.attributes.get("connection") or engine
+
+    def run(connection):
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite no soporta la mayoría de ALTER TABLE: usar modo batch
+            render_as_batch=connection.dialect.name == "sqlite",
+            include_object=include_object,
+            # Cada revisión en su transacción: una migración de datos larga
+            # no deja pendientes las anteriores
+            transaction_per_migration=True,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+    if hasattr(connectable, "connect"):
+        with connectable.connect() as connection:
+            run(connection)
+    else:
+        run(connectable)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,42 @@
+"""Índices compuestos alineados con las consultas de reportes
+
+- ventas por (status, created_at) y por (cashier_id, created_at)
+- sale_items.producto_id (producto más vendido, joins desde productos)
+- payments.sale_id (pagos de cada venta)
+- scan_history por (user_id, timestamp)
+- escaneo_historial por (tipo_codigo, id) (polling de escaneos recientes)
+
+Se crean con IF NOT EXISTS porque las bases nuevas creadas con
+``create_all`` ya los tienen.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 02:28:16.564812
+"""
+from alembic import op
+
+
+# Identificadores de revisión usados por Alembic
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("ix_sales_status_created_at", "sales", ["status", "created_at"]),
+    ("ix_sales_cashier_id_created_at", "sales", ["cashier_id", "created_at"]),
+    ("ix_sale_items_producto_id", "sale_items", ["producto_id"]),
+    ("ix_payments_sale_id", "payments", ["sale_id"]),
+    ("ix_scan_history_user_id_timestamp", "scan_history", ["user_id", "timestamp"]),
+    ("ix_escaneo_historial_tipo_codigo_id", "escaneo_historial", ["tipo_codigo", "id"]),
+)
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
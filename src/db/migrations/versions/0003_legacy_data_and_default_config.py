@@ -0,0 +1,118 @@
+"""Datos de la migración al sistema avanzado
+
+Reemplaza los pasos de datos de ``migrate_to_advanced.py``:
+
+- productos del esquema simple (``productos_legacy``, ver 0001) al esquema
+  nuevo, luego se elimina la tabla apartada
+- usuarios de ``usuarios`` a ``users`` (admin conserva el rol ADMIN, el
+  resto queda como CASHIER); se omiten los que ya existen
+- configuraciones por defecto del sistema que falten
+
+Las copias se hacen por lotes de ``MIGRATION_BATCH_SIZE`` filas confirmados
+por separado.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 09:12:40.118305
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+from src.db.schema_migrations import backfill_in_chunks
+
+
+# Identificadores de revisión usados por Alembic
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+LEGACY_PRODUCTOS = 'productos_legacy'
+
+DEFAULT_CONFIG = (
+    # Configuración del negocio
+    ("business_name", "INVENTARIO BARRAS", "Nombre del negocio", "business"),
+    ("business_address", "", "Dirección del negocio", "business"),
+    ("business_phone", "", "Teléfono del negocio", "business"),
+    ("business_tax_id", "", "RFC/RUC del negocio", "business"),
+    # Configuración de impresión
+    ("printer_mode", "file", "Modo de impresión por defecto", "printer"),
+    ("printer_ip", "", "IP de impresora de red", "printer"),
+    ("printer_port", "9100", "Puerto de impresora de red", "printer"),
+    # Configuración fiscal
+    ("tax_rate", "16.00", "Tasa de impuesto por defecto (%)", "tax"),
+    ("tax_included", "false", "Precios incluyen impuestos", "tax"),
+    # Configuración de caja
+    ("cash_drawer_auto_open", "true", "Abrir cajón automáticamente", "pos"),
+    ("require_customer_info", "false", "Requerir información de cliente", "pos"),
+    # Configuración de backup
+    ("backup_enabled", "true", "Backup automático habilitado", "backup"),
+    ("backup_frequency", "daily", "Frecuencia de backup", "backup"),
+)
+
+COPY_PRODUCTOS = f"""
+    INSERT INTO productos (
+        codigo_barra, nombre, descripcion, precio, costo, stock,
+        categoria, is_active, created_at, updated_at
+    )
+    SELECT l.codigo_barra, l.nombre, l.descripcion, COALESCE(l.precio, 0), 0,
+           COALESCE(l.stock, 0), l.categoria, 1,
+           COALESCE(l.created_at, CURRENT_TIMESTAMP), l.updated_at
+    FROM {LEGACY_PRODUCTOS} AS l
+    WHERE (:after IS NULL OR l.codigo_barra > :after) AND l.codigo_barra <= :upto
+      AND NOT EXISTS (SELECT 1 FROM productos p WHERE p.codigo_barra = l.codigo_barra)
+"""
+
+COPY_USUARIOS = """
+    INSERT INTO users (
+        username, email, password_hash, full_name, role, is_active,
+        cash_drawer_access, created_at
+    )
+    SELECT u.username, u.email, u.hashed_password, u.username,
+           CASE WHEN u.username = 'admin' THEN 'ADMIN' ELSE 'CASHIER' END,
+           u.is_active = 1, 1, COALESCE(u.created_at, CURRENT_TIMESTAMP)
+    FROM usuarios AS u
+    WHERE (:after IS NULL OR u.id > :after) AND u.id <= :upto
+      AND NOT EXISTS (
+          SELECT 1 FROM users x WHERE x.username = u.username OR x.email = u.email
+      )
+"""
+
+
+def upgrade() -> None:
+    if context.is_offline_mode():
+        # Los lotes dependen de los datos; generar SQL solo cubre la configuración
+        _insert_default_config()
+        return
+
+    bind = op.get_bind()
+    tables = set(sa.inspect(bind).get_table_names())
+
+    with op.get_context().autocommit_block():
+        if LEGACY_PRODUCTOS in tables:
+            backfill_in_chunks(bind, LEGACY_PRODUCTOS, "codigo_barra", COPY_PRODUCTOS)
+
+        if "usuarios" in tables:
+            backfill_in_chunks(bind, "usuarios", "id", COPY_USUARIOS)
+
+    _insert_default_config()
+
+    if LEGACY_PRODUCTOS in tables:
+        op.drop_table(LEGACY_PRODUCTOS)
+
+
+def _insert_default_config() -> None:
+    for key, value, description, category in DEFAULT_CONFIG:
+        op.execute(
+            sa.text(
+                "INSERT INTO system_config (key, value, description, category) "
+                "SELECT :key, :value, :description, :category "
+                "WHERE NOT EXISTS (SELECT 1 FROM system_config WHERE key = :key)"
+            ).bindparams(key=key, value=value, description=description, category=category)
+        )
+
+
+def downgrade() -> None:
+    # Migración de datos: los usuarios, productos y configuraciones copiados
+    # quedan en su lugar
+    pass
@@ -0,0 +1,41 @@
+"""Secuencia de números de venta por día y carril
+
+Crea ``sale_sequences`` y la inicializa con el último número de cada día
+ya registrado en ``sales`` (formato ``POS-YYYYMMDD-NNNN``), así las ventas
+nuevas continúan la numeración sin repetir números existentes.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 14:05:22.407913
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# Identificadores de revisión usados por Alembic
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if context.is_offline_mode() or 'sale_sequences' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table('sale_sequences',
+        sa.Column('day', sa.String(length=8), nullable=False),
+        sa.Column('lane_id', sa.String(length=20), nullable=False),
+        sa.Column('last_value', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'lane_id')
+        )
+
+    op.execute(
+        "INSERT INTO sale_sequences (day, lane_id, last_value) "
+        "SELECT substr(sale_number, 5, 8), '', MAX(CAST(substr(sale_number, 14) AS INTEGER)) "
+        "FROM sales WHERE sale_number LIKE 'POS-________-%' "
+        "AND NOT EXISTS (SELECT 1 FROM sale_sequences s WHERE s.day = substr(sale_number, 5, 8) AND s.lane_id = '') "
+        "GROUP BY substr(sale_number, 5, 8)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('sale_sequences')
@@ -0,0 +1,64 @@
+"""Libro de movimientos de stock y reservas por carril
+
+- ``stock_movements``: cada descuento (venta) o devolución (cancelación)
+  de ``productos.stock``
+- ``stock_reservations``: unidades apartadas por el carrito de un carril,
+  con vencimiento
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 16:41:08.215570
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# Identificadores de revisión usados por Alembic
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def _existing_tables() -> set:
+    if context.is_offline_mode():
+        return set()
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    existing = _existing_tables()
+    if 'stock_movements' not in existing:
+        op.create_table('stock_movements',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('producto_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('reason', sa.String(length=20), nullable=False),
+        sa.Column('sale_id', sa.Integer(), nullable=True),
+        sa.Column('lane_id', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['producto_id'], ['productos.id'], ),
+        sa.ForeignKeyConstraint(['sale_id'], ['sales.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('stock_movements', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_stock_movements_id'), ['id'], unique=False)
+            batch_op.create_index('ix_stock_movements_producto_id_id', ['producto_id', 'id'], unique=False)
+
+    if 'stock_reservations' not in existing:
+        op.create_table('stock_reservations',
+        sa.Column('lane_id', sa.String(length=20), nullable=False),
+        sa.Column('producto_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['producto_id'], ['productos.id'], ),
+        sa.PrimaryKeyConstraint('lane_id', 'producto_id')
+        )
+        with op.batch_alter_table('stock_reservations', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_stock_reservations_expires_at'), ['expires_at'], unique=False)
+            batch_op.create_index(batch_op.f('ix_stock_reservations_producto_id'), ['producto_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table('stock_reservations')
+    op.drop_table('stock_movements')
@@ -0,0 +1,65 @@
+"""Versiones de datos para los ETag mantenidas por triggers
+
+``data_versions`` guarda un contador por espacio de nombres ("catalog",
+"config"). Los triggers lo incrementan en cada alta, modificación o baja de
+las tablas vigiladas, sin importar quién escriba (cualquier worker, otro
+proceso o SQL directo), así el ETag siempre refleja lo que hay en la base.
+
+El contador arranca en la hora de creación: una base recreada desde cero
+no repite versiones (ni ETag) de la anterior.
+
+Solo SQLite; en otros motores las versiones siguen en el estado compartido.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 18:12:40.531207
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# Identificadores de revisión usados por Alembic
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+# Tabla vigilada -> espacio de nombres que invalida
+VERSIONED_TABLES = {
+    'productos': 'catalog',
+    'system_config': 'config',
+}
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name != 'sqlite':
+        return
+
+    op.create_table('data_versions',
+    sa.Column('namespace', sa.String(length=20), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('namespace')
+    )
+    for namespace in sorted(set(VERSIONED_TABLES.values())):
+        op.execute(
+            "INSERT INTO data_versions (namespace, version) "
+            f"VALUES ('{namespace}', CAST(strftime('%s', 'now') AS INTEGER))"
+        )
+
+    for table, namespace in VERSIONED_TABLES.items():
+        for operation in ('INSERT', 'UPDATE', 'DELETE'):
+            op.execute(
+                f"CREATE TRIGGER data_versions_{table}_{operation.lower()} AFTER {operation} ON {table} BEGIN "
+                f"UPDATE data_versions SET version = version + 1 WHERE namespace = '{namespace}'; "
+                "END"
+            )
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != 'sqlite':
+        return
+
+    for table in VERSIONED_TABLES:
+        for operation in ('insert', 'update', 'delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS data_versions_{table}_{operation}")
+    op.drop_table('data_versions')
@@ -1,31 +1,25 @@
-from sqlalchemy import Column, String, Float, Integer, DateTime, Text
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.sql import func
-from datetime import datetime
+"""
+Modelos de escaneo y usuarios de la API de escáner
 
-Base = declarative_base()
+Todos los modelos comparten el ``Base`` declarativo de ``database``. La
+tabla ``productos`` tiene un único modelo, definido en ``models_advanced``
+y reexportado aquí para los módulos que ya lo importan desde este archivo.
+"""
 
+from sqlalchemy import Column, String, Integer, DateTime, Index
+from sqlalchemy.sql import func
 
-class Producto(Base):
-    """Modelo de producto para la base de datos"""
-    __tablename__ = "productos"
-    
-    codigo_barra = Column(String, primary_key=True, index=True)
-    nombre = Column(String, nullable=False)
-    precio = Column(Float, nullable=False)
-    descripcion = Column(Text, nullable=True)
-    stock = Column(Integer, default=0)
-    categoria = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    
-    def __repr__(self):
-        return f"<Producto(codigo_barra='{self.codigo_barra}', nombre='{self.nombre}')>"
+from .database import Base
+from .models_advanced import Producto  # noqa: F401
 
 
 class EscaneoHistorial(Base):
     """Modelo para guardar historial de escaneos"""
     __tablename__ = "escaneo_historial"
+    __table_args__ = (
+        # Escaneos recientes por tipo de scanner (polling incremental por id)
+        Index("ix_escaneo_historial_tipo_codigo_id", "tipo_codigo", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     codigo_barra = Column(String, nullable=False, index=True)
@@ -3,14 +3,13 @@ Modelos avanzados de base de datos para sistema POS completo
 Incluye ventas, usuarios, clientes, pagos y auditoría
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, JSON, DECIMAL, Enum
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, JSON, DECIMAL, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
 import enum
 
-Base = declarative_base()
+from .database import Base
 
 
 # === ENUMS PARA ESTADOS Y TIPOS ===
@@ -153,6 +152,12 @@ class Customer(Base):
 class Sale(Base):
     """Modelo completo de ventas"""
     __tablename__ = "sales"
+    __table_args__ = (
+        # Reportes: ventas completadas en un rango de fechas
+        Index("ix_sales_status_created_at", "status", "created_at"),
+        # Listado filtrado por cajero, más recientes primero
+        Index("ix_sales_cashier_id_created_at", "cashier_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     sale_number = Column(String(50), unique=True, nullable=False, index=True)  # SALE-2024-001234
@@ -200,6 +205,53 @@ class Sale(Base):
         return f"<Sale(number='{self.sale_number}', total={self.total_amount}, status='{self.status.value}')>"
 
 
+class SaleSequence(Base):
+    """Último número de venta asignado por día y carril (ver ``db.sale_numbers``)"""
+    __tablename__ = "sale_sequences"
+    
+    day = Column(String(8), primary_key=True)  # YYYYMMDD
+    lane_id = Column(String(20), primary_key=True, default="")  # "" = numeración general
+    last_value = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<SaleSequence(day='{self.day}', lane='{self.lane_id}', last={self.last_value})>"
+
+
+# === MODELOS DE INVENTARIO (ver ``db.stock_ledger``) ===
+
+class StockMovement(Base):
+    """Movimiento de stock: cada cambio de ``productos.stock`` por venta o cancelación"""
+    __tablename__ = "stock_movements"
+    __table_args__ = (
+        # Historial de un producto, más recientes primero
+        Index("ix_stock_movements_producto_id_id", "producto_id", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    producto_id = Column(Integer, ForeignKey('productos.id'), nullable=False)
+    quantity = Column(Integer, nullable=False)  # negativo = salida, positivo = entrada
+    reason = Column(String(20), nullable=False)  # sale, cancel
+    sale_id = Column(Integer, ForeignKey('sales.id'))
+    lane_id = Column(String(20))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<StockMovement(producto={self.producto_id}, qty={self.quantity}, reason='{self.reason}')>"
+
+
+class StockReservation(Base):
+    """Unidades apartadas por un carril mientras el carrito está abierto"""
+    __tablename__ = "stock_reservations"
+    
+    lane_id = Column(String(20), primary_key=True)
+    producto_id = Column(Integer, ForeignKey('productos.id'), primary_key=True, index=True)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<StockReservation(lane='{self.lane_id}', producto={self.producto_id}, qty={self.quantity})>"
+
+
 # === MODELO DE ITEMS DE VENTA ===
 
 class SaleItem(Base):
@@ -208,7 +260,7 @@ class SaleItem(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     sale_id = Column(Integer, ForeignKey('sales.id'), nullable=False, index=True)
-    producto_id = Column(Integer, ForeignKey('productos.id'), nullable=False)
+    producto_id = Column(Integer, ForeignKey('productos.id'), nullable=False, index=True)
     
     # Cantidades y precios
     quantity = Column(Integer, nullable=False)
@@ -240,7 +292,7 @@ class Payment(Base):
     __tablename__ = "payments"
     
     id = Column(Integer, primary_key=True, index=True)
-    sale_id = Column(Integer, ForeignKey('sales.id'), nullable=False)
+    sale_id = Column(Integer, ForeignKey('sales.id'), nullable=False, index=True)
     
     # Detalles del pago
     method = Column(Enum(PaymentMethod), nullable=False)
@@ -271,6 +323,10 @@ class Payment(Base):
 class ScanHistory(Base):
     """Historial expandido de escaneos"""
     __tablename__ = "scan_history"
+    __table_args__ = (
+        # Historial de escaneos de un usuario por fecha
+        Index("ix_scan_history_user_id_timestamp", "user_id", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     codigo_barra = Column(String(50), nullable=False, index=True)
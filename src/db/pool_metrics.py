@@ -0,0 +1,131 @@
+"""
+Configuración y métricas del pool de conexiones
+
+``pool_options`` arma los parámetros de ``create_engine`` a partir de
+variables de entorno, válidos tanto para un archivo SQLite como para
+PostgreSQL:
+
+- ``DB_POOL_SIZE`` (5): conexiones permanentes
+- ``DB_MAX_OVERFLOW`` (10): conexiones extra en picos
+- ``DB_POOL_TIMEOUT`` (30): segundos máximos esperando una conexión libre
+- ``DB_POOL_RECYCLE`` (1800): segundos antes de reemplazar una conexión
+- ``DB_POOL_PRE_PING`` (true): verificar la conexión antes de usarla
+
+``MeteredQueuePool`` mide además cuánto esperan los requests por una
+conexión, la métrica que indica que el pool quedó chico.
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class PoolWaitStats:
+    """Tiempos de espera para obtener una conexión del pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def record(self, wait_ms: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+            }
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool que registra el tiempo de espera de cada checkout"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.wait_stats.record((time.perf_counter() - start) * 1000, timed_out=True)
+            raise
+        self.wait_stats.record((time.perf_counter() - start) * 1000)
+        return connection
+
+    def recreate(self):
+        # Conservar las estadísticas si el engine recrea el pool
+        new_pool = super().recreate()
+        new_pool.wait_stats = self.wait_stats
+        return new_pool
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and (":memory:" in url or url.rstrip("/") in ("sqlite:", "sqlite://"))
+
+
+def pool_options(url: str) -> dict:
+    """
+    Argumentos de pool para ``create_engine`` según la URL
+
+    Las bases SQLite en memoria conservan el pool por defecto de SQLAlchemy
+    (una conexión por hilo); el resto usa ``MeteredQueuePool``.
+    """
+    if _is_memory_sqlite(url):
+        return {}
+
+    return {
+        "poolclass": MeteredQueuePool,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    }
+
+
+def get_pool_metrics(engine: Optional[Engine]) -> dict:
+    """
+    Estado del pool de un engine
+
+    Returns:
+        Diccionario con conexiones en uso, libres, overflow y esperas
+    """
+    if engine is None:
+        return {}
+
+    pool = engine.pool
+    metrics = {"pool_class": type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        metrics.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+        })
+
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        metrics["wait"] = wait_stats.to_dict()
+
+    return metrics
@@ -0,0 +1,215 @@
+"""
+Asesor de índices para desarrollo
+
+Captura las consultas lentas de un engine, obtiene su plan con
+``EXPLAIN QUERY PLAN`` (SQLite) o ``EXPLAIN`` (PostgreSQL) y marca las que
+recorren una tabla completa sin usar índice.
+
+Activación en la aplicación: ``QUERY_ADVISOR=true`` (umbral en
+``QUERY_ADVISOR_SLOW_MS``, por defecto 50 ms).
+
+Uso como herramienta::
+
+    python -m src.db.query_advisor
+
+muestra el plan de las consultas de reportes más frecuentes contra la base
+configurada en ``DATABASE_URL`` y señala los recorridos completos.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# "SCAN sales" es recorrido completo; "SCAN sales USING INDEX ..." no
+_SQLITE_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?!.*\b(?:USING (?:COVERING )?INDEX|VIRTUAL TABLE)\b)")
+_POSTGRES_FULL_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+_START_KEY = "query_advisor_start"
+
+
+def explain(connection, statement: str, parameters=None) -> List[str]:
+    """
+    Plan de ejecución de una sentencia
+
+    Args:
+        connection: Conexión SQLAlchemy
+        statement: SQL con parámetros del dialecto
+        parameters: Parámetros de la sentencia
+
+    Returns:
+        Líneas del plan
+    """
+    dbapi_connection = connection.connection.driver_connection
+    cursor = dbapi_connection.cursor()
+    try:
+        if connection.dialect.name == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+            return [row[-1] for row in cursor.fetchall()]
+        cursor.execute(f"EXPLAIN {statement}", parameters or None)
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def full_scans(plan: List[str]) -> List[str]:
+    """Tablas recorridas completas según el plan"""
+    tables = []
+    for line in plan:
+        match = _SQLITE_FULL_SCAN.match(line.strip()) or _POSTGRES_FULL_SCAN.search(line)
+        if match:
+            tables.append(match.group(1))
+    return tables
+
+
+class QueryAdvisor:
+    """Registro de consultas lentas con su plan de ejecución"""
+
+    def __init__(self, slow_ms: float = 50.0, max_entries: int = 200):
+        self.slow_ms = slow_ms
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+
+    def install(self, engine: Engine):
+        """Empieza a medir las consultas del engine"""
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+        logger.info(f"🔎 Asesor de índices activo (consultas > {self.slow_ms:.0f} ms)")
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get(_START_KEY)
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+
+        if elapsed_ms < self.slow_ms or executemany:
+            return
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE")):
+            return
+
+        with self._lock:
+            entry = self._entries.get(statement)
+            if entry is not None:
+                entry["count"] += 1
+                entry["total_ms"] += elapsed_ms
+                entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+                return
+            if len(self._entries) >= self.max_entries:
+                return
+
+        try:
+            plan = explain(conn, statement, parameters)
+        except Exception as e:
+            plan = [f"EXPLAIN no disponible: {e}"]
+
+        scans = full_scans(plan)
+        with self._lock:
+            self._entries.setdefault(statement, {
+                "statement": statement,
+                "count": 1,
+                "total_ms": elapsed_ms,
+                "max_ms": elapsed_ms,
+                "plan": plan,
+                "full_scans": scans,
+            })
+
+        if scans:
+            logger.warning(
+                f"⚠️ Consulta lenta ({elapsed_ms:.1f} ms) con recorrido completo de {', '.join(scans)}: "
+                f"{' '.join(statement.split())[:200]}"
+            )
+
+    def report(self) -> List[dict]:
+        """Consultas capturadas, las más costosas primero"""
+        with self._lock:
+            entries = [dict(entry) for entry in self._entries.values()]
+        for entry in entries:
+            entry["total_ms"] = round(entry["total_ms"], 3)
+            entry["max_ms"] = round(entry["max_ms"], 3)
+        return sorted(entries, key=lambda e: e["total_ms"], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Instancia global del asesor
+_query_advisor: Optional[QueryAdvisor] = None
+
+
+def get_query_advisor() -> QueryAdvisor:
+    """
+    Obtener la instancia global del asesor de índices
+
+    Returns:
+        Instancia única de QueryAdvisor
+    """
+    global _query_advisor
+
+    if _query_advisor is None:
+        _query_advisor = QueryAdvisor(slow_ms=float(os.getenv("QUERY_ADVISOR_SLOW_MS", "50")))
+
+    return _query_advisor
+
+
+def representative_queries():
+    """Consultas de reportes y listados que deben resolverse con índices"""
+    from datetime import datetime, timedelta
+    from sqlalchemy import func, select
+
+    from .models import EscaneoHistorial
+    from .models_advanced import Payment, Producto, Sale, SaleItem, SaleStatus, ScanHistory
+
+    since = datetime.now() - timedelta(days=30)
+
+    return {
+        "reporte diario de ventas": select(Sale).where(
+            Sale.status == SaleStatus.COMPLETED, Sale.created_at >= since
+        ),
+        "ventas por cajero": select(Sale).where(Sale.cashier_id == 1).order_by(Sale.created_at.desc()).limit(100),
+        "producto más vendido": select(SaleItem.producto_id, func.sum(SaleItem.quantity)).join(
+            Sale, SaleItem.sale_id == Sale.id
+        ).where(Sale.status == SaleStatus.COMPLETED, Sale.created_at >= since).group_by(SaleItem.producto_id),
+        "ventas de un producto": select(SaleItem).where(SaleItem.producto_id == 1),
+        "pagos de una venta": select(Payment).where(Payment.sale_id == 1),
+        "escaneos de un usuario": select(ScanHistory).where(
+            ScanHistory.user_id == 1, ScanHistory.timestamp >= since
+        ),
+        "escaneos recientes por scanner": select(EscaneoHistorial).where(
+            EscaneoHistorial.tipo_codigo.in_(["USB-HID", "SERIAL"])
+        ).order_by(EscaneoHistorial.id.desc()).limit(50),
+        "producto por código": select(Producto).where(Producto.codigo_barra == "7501000673209"),
+    }
+
+
+def main():
+    from .database import engine
+
+    flagged = 0
+    with engine.connect() as conn:
+        for name, stmt in representative_queries().items():
+            sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+            plan = explain(conn, sql)
+            scans = full_scans(plan)
+            flagged += bool(scans)
+            print(f"{'⚠️ ' if scans else '✅'} {name}")
+            for line in plan:
+                print(f"     {line}")
+
+    print(f"\n{flagged} consulta(s) con recorrido completo de tabla")
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,153 @@
+"""
+Perfil de consultas SQL por request
+
+Al terminar cada request, ``UnitOfWorkMiddleware`` registra aquí cuántas
+sentencias ejecutó, cuánto tardaron y cuántas veces se repitió cada forma
+de sentencia (el SQL sin valores). Una misma forma ejecutada más de
+``N_PLUS_ONE_THRESHOLD`` veces (10 por defecto) en un request es el patrón
+N+1 típico de una relación cargada de forma perezosa dentro de un bucle, y
+genera un warning en el log.
+
+El resumen por endpoint y los últimos requests se exponen en
+``GET /debug/queries`` con ``DEBUG=true``.
+"""
+
+import logging
+import os
+import re
+import threading
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_PYFORMAT_PARAM = re.compile(r"%\(\w+\)s")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+@lru_cache(maxsize=2048)
+def statement_shape(statement: str) -> str:
+    """
+    Forma normalizada de una sentencia
+
+    Unifica espacios, parámetros (``?`` / ``%(name)s``) y listas ``IN`` de
+    cualquier largo para que las ejecuciones de la misma consulta cuenten
+    juntas.
+    """
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _PYFORMAT_PARAM.sub("?", shape)
+    return _IN_LIST.sub("(?, ...)", shape)
+
+
+def route_key(scope: dict) -> str:
+    """Ruta del request con los parámetros de path como plantilla"""
+    # FastAPI deja en el scope la ruta que atendió el request
+    route = scope.get("route")
+    if getattr(route, "path", None):
+        return route.path
+
+    path = scope.get("path", "")
+    for name, value in (scope.get("path_params") or {}).items():
+        path = path.replace(f"/{value}", f"/{{{name}}}", 1)
+    return path
+
+
+class RequestQueryStats:
+    """Agregado de consultas SQL por endpoint y últimos requests"""
+
+    def __init__(self, n_plus_one_threshold: int = 10, max_recent: int = 100):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=max_recent)
+        self._endpoints: Dict[str, dict] = {}
+
+    def record(self, method: str, route: str, uow) -> List[Tuple[str, int]]:
+        """
+        Registrar el perfil de consultas de un request
+
+        Args:
+            method: Método HTTP
+            route: Plantilla de la ruta
+            uow: UnitOfWork del request
+
+        Returns:
+            Formas de sentencia que superaron el umbral de N+1 con su cantidad
+        """
+        suspects = [
+            (shape, count) for shape, count in uow.statements.most_common()
+            if count > self.n_plus_one_threshold
+        ]
+        key = f"{method} {route}"
+
+        with self._lock:
+            self._recent.append({
+                "endpoint": key,
+                "timestamp": datetime.now().isoformat(),
+                "query_count": uow.query_count,
+                "query_ms": round(uow.query_ms, 3),
+                "n_plus_one": [{"statement": shape, "count": count} for shape, count in suspects],
+            })
+
+            endpoint = self._endpoints.setdefault(key, {
+                "endpoint": key,
+                "requests": 0,
+                "total_queries": 0,
+                "max_queries": 0,
+                "total_ms": 0.0,
+                "n_plus_one_requests": 0,
+            })
+            endpoint["requests"] += 1
+            endpoint["total_queries"] += uow.query_count
+            endpoint["max_queries"] = max(endpoint["max_queries"], uow.query_count)
+            endpoint["total_ms"] += uow.query_ms
+            endpoint["n_plus_one_requests"] += bool(suspects)
+
+        for shape, count in suspects:
+            logger.warning(f"⚠️ Posible N+1 en {key}: {count} ejecuciones de '{shape[:200]}'")
+
+        return suspects
+
+    def report(self) -> dict:
+        """Resumen por endpoint (más consultas promedio primero) y últimos requests"""
+        with self._lock:
+            endpoints = [dict(endpoint) for endpoint in self._endpoints.values()]
+            recent = list(self._recent)
+
+        for endpoint in endpoints:
+            endpoint["avg_queries"] = round(endpoint["total_queries"] / endpoint["requests"], 2)
+            endpoint["avg_ms"] = round(endpoint.pop("total_ms") / endpoint["requests"], 3)
+
+        return {
+            "n_plus_one_threshold": self.n_plus_one_threshold,
+            "endpoints": sorted(endpoints, key=lambda e: e["avg_queries"], reverse=True),
+            "recent": list(reversed(recent)),
+        }
+
+    def reset(self):
+        with self._lock:
+            self._recent.clear()
+            self._endpoints.clear()
+
+
+# Instancia global de estadísticas
+_query_stats: Optional[RequestQueryStats] = None
+
+
+def get_query_stats() -> RequestQueryStats:
+    """
+    Obtener la instancia global de estadísticas de consultas
+
+    Returns:
+        Instancia única de RequestQueryStats
+    """
+    global _query_stats
+
+    if _query_stats is None:
+        _query_stats = RequestQueryStats(
+            n_plus_one_threshold=int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+        )
+
+    return _query_stats
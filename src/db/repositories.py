@@ -0,0 +1,255 @@
+"""
+Repositorios de acceso a datos compartidos por las rutas
+
+Las rutas de ambas APIs (escáner y POS avanzado) consultan productos,
+usuarios y ventas a través de estas clases en lugar de repetir los filtros en cada
+endpoint. Cada repositorio envuelve una ``Session`` ya abierta: no crea
+sesiones ni confirma transacciones, eso queda a cargo de quien lo usa.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, case, func, select, update
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from .models_advanced import Producto, Sale, SaleItem, SaleStatus, StockReservation, User
+
+
+class ProductoLookup(NamedTuple):
+    """
+    Producto de solo lectura para escaneos y cobro
+
+    Tupla con las columnas que necesitan esas rutas: no pasa por el mapa de
+    identidad ni el seguimiento de cambios de la sesión, y ocupa bastante
+    menos memoria que una instancia ORM (ver ``db.lookup_benchmark``).
+    """
+    id: int
+    codigo_barra: str
+    nombre: str
+    descripcion: Optional[str]
+    precio: Decimal
+    stock: int
+    categoria: Optional[str]
+    tax_rate: Optional[Decimal]
+    is_taxable: Optional[bool]
+    is_active: Optional[bool]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+
+_LOOKUP_COLUMNS = tuple(getattr(Producto, field) for field in ProductoLookup._fields)
+
+# Sentencias armadas una vez: se ejecutan por la conexión de la sesión (Core),
+# sin construir la consulta ni pasar por el ORM en cada escaneo
+PRODUCTO_LOOKUP_BY_CODE = select(*_LOOKUP_COLUMNS).where(Producto.codigo_barra == bindparam("codigo"))
+PRODUCTO_LOOKUP_BY_CODES = select(*_LOOKUP_COLUMNS).where(
+    Producto.codigo_barra.in_(bindparam("codigos", expanding=True))
+)
+
+
+class ProductoRepository:
+    """Consultas sobre la tabla ``productos``"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, codigo_barra: str) -> Optional[Producto]:
+        """Producto por código de barras (activo o no)"""
+        return self.db.query(Producto).filter(Producto.codigo_barra == codigo_barra).first()
+
+    def get_many(self, codigos: Iterable[str]) -> Dict[str, Producto]:
+        """Productos de varios códigos en una sola consulta, por código"""
+        codigos = list(dict.fromkeys(codigos))
+        if not codigos:
+            return {}
+        productos = self.db.query(Producto).filter(Producto.codigo_barra.in_(codigos)).all()
+        return {producto.codigo_barra: producto for producto in productos}
+
+    def lookup(self, codigo_barra: str) -> Optional[ProductoLookup]:
+        """
+        Columnas de lectura de un producto por código (activo o no)
+
+        No hace autoflush: los cambios pendientes de la sesión no se ven.
+        """
+        row = self.db.connection().execute(PRODUCTO_LOOKUP_BY_CODE, {"codigo": codigo_barra}).first()
+        return ProductoLookup(*row) if row else None
+
+    def lookup_many(self, codigos: Iterable[str]) -> Dict[str, ProductoLookup]:
+        """Columnas de lectura de varios productos en una sola consulta, por código"""
+        codigos = list(dict.fromkeys(codigos))
+        if not codigos:
+            return {}
+        rows = self.db.connection().execute(PRODUCTO_LOOKUP_BY_CODES, {"codigos": codigos})
+        return {row.codigo_barra: ProductoLookup(*row) for row in rows}
+
+    def decrement_stock(self, quantities: Dict[int, int], lane_id: Optional[str] = None) -> Set[int]:
+        """
+        Descuenta stock de varios productos en un solo ``UPDATE``
+
+        Cada fila solo se actualiza si alcanza el stock libre (``stock`` menos
+        las reservas vigentes de otros carriles, ver ``db.stock_ledger``); la
+        base evalúa la condición al escribir. Los ids que falten en el
+        resultado no tenían stock suficiente: quien llama debe revertir.
+
+        Args:
+            quantities: Cantidad a descontar por id de producto
+            lane_id: Carril que vende (sus propias reservas sí están disponibles)
+
+        Returns:
+            Ids de los productos actualizados
+        """
+        if not quantities:
+            return set()
+        quantity = case(quantities, value=Producto.id)
+        held = select(func.coalesce(func.sum(StockReservation.quantity), 0)).where(
+            StockReservation.producto_id == Producto.id,
+            StockReservation.expires_at > datetime.now(),
+        )
+        if lane_id:
+            held = held.where(StockReservation.lane_id != lane_id)
+        statement = (
+            update(Producto)
+            .where(Producto.id.in_(list(quantities)), Producto.stock - held.scalar_subquery() >= quantity)
+            .values(stock=Producto.stock - quantity)
+            .returning(Producto.id)
+        )
+        return set(self.db.connection().execute(statement).scalars())
+
+    def list(
+        self,
+        categoria: Optional[str] = None,
+        after: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[Producto]:
+        """
+        Página de productos ordenada por código de barras
+
+        Con ``after`` se pagina por cursor (keyset); si no, por ``skip``.
+        """
+        query = self.db.query(Producto)
+
+        if categoria:
+            query = query.filter(Producto.categoria == categoria)
+
+        query = query.order_by(Producto.codigo_barra)
+
+        if after is not None:
+            return query.filter(Producto.codigo_barra > after).limit(limit).all()
+        return query.offset(skip).limit(limit).all()
+
+    def get_cart_snapshot(self, codigo_barra: str) -> Optional[dict]:
+        """Columnas mínimas de un producto activo para una línea de carrito"""
+        row = self.db.query(
+            Producto.id,
+            Producto.codigo_barra,
+            Producto.nombre,
+            Producto.precio,
+            Producto.tax_rate,
+            Producto.is_taxable,
+        ).filter(
+            Producto.codigo_barra == codigo_barra,
+            Producto.is_active == True  # noqa: E712
+        ).first()
+        return dict(row._mapping) if row else None
+
+    def add(self, **values) -> Producto:
+        """Agrega un producto nuevo a la sesión (sin confirmar)"""
+        producto = Producto(**values)
+        self.db.add(producto)
+        return producto
+
+
+class UserRepository:
+    """Consultas sobre la tabla ``users`` del POS avanzado"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, user_id: int) -> Optional[User]:
+        return self.db.query(User).filter(User.id == user_id).first()
+
+    def get_by_username(self, username: str) -> Optional[User]:
+        return self.db.query(User).filter(User.username == username).first()
+
+    def get_by_email(self, email: str) -> Optional[User]:
+        return self.db.query(User).filter(User.email == email).first()
+
+
+def sales_page_statement(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cashier_id: Optional[int] = None,
+    status: Optional[SaleStatus] = None,
+    skip: int = 0,
+    limit: int = 100,
+):
+    """
+    Página de ventas recientes con su cantidad de items
+
+    Una sola consulta: cajero y cliente por JOIN y la cantidad de items
+    como subconsulta correlacionada (usa el índice de ``sale_id``). Las
+    filas son pares (venta, cantidad de items).
+    """
+    items_count = (
+        select(func.count(SaleItem.id))
+        .where(SaleItem.sale_id == Sale.id)
+        .correlate(Sale)
+        .scalar_subquery()
+        .label("items_count")
+    )
+    statement = select(Sale, items_count).options(
+        joinedload(Sale.cashier, innerjoin=True),
+        joinedload(Sale.customer),
+    )
+
+    if start:
+        statement = statement.where(Sale.created_at >= start)
+    if end:
+        statement = statement.where(Sale.created_at <= end)
+    if cashier_id:
+        statement = statement.where(Sale.cashier_id == cashier_id)
+    if status:
+        statement = statement.where(Sale.status == status)
+
+    return statement.order_by(Sale.created_at.desc()).offset(skip).limit(limit)
+
+
+def sale_detail_statement(sale_id: int):
+    """Venta con cajero, cliente, items (con producto) y pagos en tres consultas"""
+    return select(Sale).options(
+        joinedload(Sale.cashier, innerjoin=True),
+        joinedload(Sale.customer),
+        selectinload(Sale.items).joinedload(SaleItem.producto),
+        selectinload(Sale.payments),
+    ).where(Sale.id == sale_id)
+
+
+class SaleRepository:
+    """
+    Lecturas de ventas con planes de carga explícitos
+
+    Las relaciones que usa cada listado se cargan en la misma consulta
+    (``joinedload`` para cajero y cliente) o en una consulta por relación
+    (``selectinload`` para items y pagos), nunca una por fila.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def list(self, **filters) -> List[Tuple[Sale, int]]:
+        """
+        Página de ventas recientes con su cantidad de items
+
+        Acepta los filtros de ``sales_page_statement``.
+
+        Returns:
+            Pares (venta, cantidad de items)
+        """
+        return [tuple(row) for row in self.db.execute(sales_page_statement(**filters))]
+
+    def get_detail(self, sale_id: int) -> Optional[Sale]:
+        """Venta con cajero, cliente, items (con producto) y pagos en tres consultas"""
+        return self.db.execute(sale_detail_statement(sale_id)).scalars().first()
@@ -0,0 +1,142 @@
+"""
+Asignación de números de venta
+
+Cada día (y opcionalmente cada carril) tiene una fila en ``sale_sequences``
+con el último número asignado. Reservar números es un único
+``INSERT ... ON CONFLICT DO UPDATE ... RETURNING``: O(1), sin recorrer
+``sales`` con ``LIKE`` y sin colisiones entre cobros concurrentes, porque
+la base serializa el incremento de la fila.
+
+Con ``SALE_NUMBER_BLOCK=1`` (por defecto) el número se reserva dentro de la
+transacción de la venta: si la venta se revierte el número se libera y la
+numeración no tiene huecos. Con bloques mayores cada proceso reserva N
+números en una transacción corta propia y los reparte en memoria; la base
+deja de tocarse en casi todas las ventas, a cambio de huecos si el proceso
+se reinicia con números sin usar y de que el orden entre workers no sea
+estrictamente creciente.
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from .models_advanced import SaleSequence
+
+logger = logging.getLogger(__name__)
+
+SALE_NUMBER_BLOCK = int(os.getenv("SALE_NUMBER_BLOCK", "1"))
+
+_sequences = SaleSequence.__table__
+
+
+def _upsert_insert(dialect_name: str):
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise ValueError(f"Secuencia de ventas no soportada en {dialect_name}")
+    return insert
+
+
+def reserve(connection, day: str, lane_id: str = "", count: int = 1) -> int:
+    """
+    Reserva ``count`` números consecutivos de la secuencia
+
+    Args:
+        connection: Conexión (o sesión) en la transacción que debe contener la reserva
+        day: Día en formato ``YYYYMMDD``
+        lane_id: Carril ("" para la numeración general)
+        count: Cantidad de números a reservar
+
+    Returns:
+        Último número del bloque reservado (el bloque es ``last - count + 1 .. last``)
+    """
+    bind = connection.get_bind() if isinstance(connection, Session) else connection
+    insert = _upsert_insert(bind.dialect.name)
+    statement = insert(_sequences).values(day=day, lane_id=lane_id, last_value=count)
+    statement = statement.on_conflict_do_update(
+        index_elements=[_sequences.c.day, _sequences.c.lane_id],
+        set_={"last_value": _sequences.c.last_value + count},
+    ).returning(_sequences.c.last_value)
+    return connection.execute(statement).scalar_one()
+
+
+def format_sale_number(day: str, value: int, lane_id: str = "") -> str:
+    """``POS-YYYYMMDD-0001`` o ``POS-YYYYMMDD-<carril>-0001``"""
+    if lane_id:
+        return f"POS-{day}-{lane_id}-{value:04d}"
+    return f"POS-{day}-{value:04d}"
+
+
+class SaleNumberAllocator:
+    """
+    Reparte números de venta por día y carril
+
+    Es thread-safe; con ``block_size > 1`` guarda en memoria el bloque
+    reservado de cada día y carril.
+    """
+
+    def __init__(self, block_size: int = SALE_NUMBER_BLOCK):
+        self.block_size = max(1, block_size)
+        self._lock = threading.Lock()
+        # (día, carril) -> (siguiente número, último número del bloque)
+        self._blocks: Dict[Tuple[str, str], Tuple[int, int]] = {}
+
+    def next_number(self, db: Session, lane_id: Optional[str] = None, day: Optional[str] = None) -> str:
+        """
+        Siguiente número de venta
+
+        Args:
+            db: Sesión de la venta (con bloques de 1 la reserva va en su transacción)
+            lane_id: Carril con numeración propia (opcional)
+            day: Día ``YYYYMMDD`` (por defecto hoy)
+        """
+        day = day or datetime.now().strftime("%Y%m%d")
+        lane_id = lane_id or ""
+
+        if self.block_size == 1:
+            value = reserve(db, day, lane_id)
+        else:
+            value = self._next_from_block(db, day, lane_id)
+
+        return format_sale_number(day, value, lane_id)
+
+    def _next_from_block(self, db: Session, day: str, lane_id: str) -> int:
+        key = (day, lane_id)
+        with self._lock:
+            next_value, last_value = self._blocks.get(key, (1, 0))
+            if next_value > last_value:
+                # Transacción propia: el bloque queda reservado aunque la venta falle
+                with db.get_bind().begin() as connection:
+                    last_value = reserve(connection, day, lane_id, self.block_size)
+                next_value = last_value - self.block_size + 1
+                # Los bloques de días anteriores ya no se usan
+                self._blocks = {k: v for k, v in self._blocks.items() if k[0] == day}
+                logger.debug(f"Bloque de ventas {day}/{lane_id or '-'}: {next_value}..{last_value}")
+
+            self._blocks[key] = (next_value + 1, last_value)
+            return next_value
+
+
+# Instancia global del asignador
+_allocator: Optional[SaleNumberAllocator] = None
+
+
+def get_sale_number_allocator() -> SaleNumberAllocator:
+    """
+    Obtener la instancia global del asignador de números de venta
+
+    Returns:
+        Instancia única de SaleNumberAllocator
+    """
+    global _allocator
+
+    if _allocator is None:
+        _allocator = SaleNumberAllocator()
+
+    return _allocator
@@ -0,0 +1,151 @@
+"""
+Migraciones del esquema al arrancar
+
+``ensure_schema`` reemplaza a ``create_all``: lee la revisión guardada en
+``alembic_version`` y solo ejecuta ``alembic upgrade head`` si difiere de la
+última revisión del proyecto. Con la base al día el arranque cuesta una
+consulta, sin importar cuántas tablas tenga el esquema.
+
+Las bases creadas antes con ``create_all`` (sin ``alembic_version``) se
+adoptan solas: la revisión base solo crea las tablas que falten.
+
+``backfill_in_chunks`` copia datos entre tablas en lotes confirmados por
+separado, para que una migración de datos grande no bloquee la base en una
+sola transacción.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+# Filas por lote en las migraciones de datos
+BACKFILL_CHUNK_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "500"))
+
+_head_revision: Optional[str] = None
+
+
+class SchemaStatus(NamedTuple):
+    """Resultado de ``ensure_schema``"""
+    previous: Optional[str]
+    current: str
+    upgraded: bool
+
+
+def alembic_config(connection: Optional[Connection] = None):
+    """Configuración de Alembic del proyecto, opcionalmente sobre una conexión"""
+    from alembic.config import Config
+
+    config = Config(str(ALEMBIC_INI))
+    # No reemplazar el logging de la aplicación con el de alembic.ini
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def head_revision() -> str:
+    """Última revisión disponible en ``src/db/migrations/versions``"""
+    global _head_revision
+
+    if _head_revision is None:
+        from alembic.script import ScriptDirectory
+        _head_revision = ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+    return _head_revision
+
+
+def current_revision(engine: Engine) -> Optional[str]:
+    """Revisión aplicada en la base (None si nunca se migró)"""
+    from alembic.migration import MigrationContext
+
+    with engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+
+def ensure_schema(engine: Optional[Engine] = None) -> SchemaStatus:
+    """
+    Llevar la base a la última revisión
+
+    Args:
+        engine: Engine a migrar (por defecto el de la aplicación)
+
+    Returns:
+        Revisión anterior, revisión actual y si se aplicaron migraciones
+    """
+    if engine is None:
+        from .database import engine
+
+    head = head_revision()
+    previous = current_revision(engine)
+    if previous == head:
+        logger.debug(f"Esquema al día (revisión {head})")
+        return SchemaStatus(previous, head, False)
+
+    from alembic import command
+
+    logger.info(f"🔧 Migrando esquema: {previous or 'sin versión'} -> {head}")
+    # Conexión sin transacción abierta: cada revisión confirma la suya y
+    # las migraciones de datos pueden confirmar por lotes
+    with engine.connect() as conn:
+        command.upgrade(alembic_config(conn), "head")
+        conn.commit()
+
+    logger.info(f"✅ Esquema migrado a la revisión {head}")
+    return SchemaStatus(previous, head, True)
+
+
+def backfill_in_chunks(
+    connection: Connection,
+    source: str,
+    key: str,
+    insert_sql: str,
+    chunk_size: Optional[int] = None,
+) -> int:
+    """
+    Ejecutar un ``INSERT ... SELECT`` por rangos de la clave de origen
+
+    ``insert_sql`` debe filtrar la tabla de origen con
+    ``(:after IS NULL OR {key} > :after) AND {key} <= :upto``. Cada lote es
+    una sentencia independiente; llamar dentro de
+    ``op.get_context().autocommit_block()`` para que se confirme por separado.
+
+    Args:
+        connection: Conexión de la migración
+        source: Tabla de origen
+        key: Columna ordenable y única de la tabla de origen
+        insert_sql: Sentencia que copia un lote
+        chunk_size: Filas por lote
+
+    Returns:
+        Filas insertadas
+    """
+    chunk_size = chunk_size or BACKFILL_CHUNK_SIZE
+    after = None
+    total = 0
+
+    while True:
+        where = f"WHERE {key} > :after" if after is not None else ""
+        upto = connection.execute(
+            text(f"SELECT MAX({key}) FROM (SELECT {key} FROM {source} {where} ORDER BY {key} LIMIT :limit) AS chunk"),
+            {"after": after, "limit": chunk_size},
+        ).scalar()
+        if upto is None:
+            break
+
+        result = connection.execute(
+            text(insert_sql),
+            {"after": after, "upto": upto},
+        )
+        total += max(result.rowcount, 0)
+        after = upto
+
+    return total
+
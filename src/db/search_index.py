@@ -0,0 +1,238 @@
+"""
+Índice de búsqueda de productos con SQLite FTS5
+
+Crea dos tablas virtuales con contenido externo sobre ``productos``:
+
+- ``productos_fts``: tokenizador unicode61 sin acentos, para búsqueda por
+  palabras con prefijo (type-ahead: "coc" encuentra "Coca Cola")
+- ``productos_fts_trigram``: tokenizador trigram, para la búsqueda difusa
+  cuando la consulta tiene errores de tipeo ("cocacola", "leche entra")
+
+Los triggers mantienen ambos índices sincronizados con cualquier escritura
+sobre ``productos`` (ORM, SQL directo o upserts masivos). Si cambia su
+definición (o las columnas de ``productos``) se recrean al arrancar, ver
+``db.ddl_versions``. En motores que no son SQLite, o si FTS5 no está
+disponible, la búsqueda cae a ``LIKE``.
+"""
+
+import logging
+import re
+import threading
+from typing import List, Optional, Tuple
+
+from sqlalchemy import inspect, or_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from .ddl_versions import definition_hash, store_hash, stored_hash
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "productos_fts"
+TRIGRAM_TABLE = "productos_fts_trigram"
+
+# Columnas indexables y su peso en el ranking bm25
+SEARCH_COLUMNS = (
+    ("nombre", 10.0),
+    ("marca", 5.0),
+    ("categoria", 2.0),
+    ("descripcion", 1.0),
+)
+
+_lock = threading.Lock()
+_ready: dict = {}
+
+
+class SearchIndexInfo:
+    """Estado del índice de búsqueda para un engine"""
+
+    def __init__(self, fts: bool, trigram: bool, columns: Tuple[str, ...]):
+        self.fts = fts
+        self.trigram = trigram
+        self.columns = columns
+
+
+def _fts_ddl(table: str, columns: Tuple[str, ...], tokenize: str, prefix: bool) -> List[str]:
+    """Sentencias que crean la tabla FTS y sus triggers"""
+    cols = ", ".join(columns)
+    options = f"content='productos', content_rowid='rowid', tokenize='{tokenize}'"
+    if prefix:
+        options += ", prefix='2 3'"
+
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+
+    return [
+        f"CREATE VIRTUAL TABLE {table} USING fts5({cols}, {options})",
+        f"""
+        CREATE TRIGGER {table}_ai AFTER INSERT ON productos BEGIN
+            INSERT INTO {table}(rowid, {cols}) VALUES (new.rowid, {new_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER {table}_ad AFTER DELETE ON productos BEGIN
+            INSERT INTO {table}({table}, rowid, {cols}) VALUES ('delete', old.rowid, {old_values});
+        END
+        """,
+        # Solo se reindexa si cambian columnas de texto (no en cada descuento de stock)
+        f"""
+        CREATE TRIGGER {table}_au AFTER UPDATE OF {cols} ON productos BEGIN
+            INSERT INTO {table}({table}, rowid, {cols}) VALUES ('delete', old.rowid, {old_values});
+            INSERT INTO {table}(rowid, {cols}) VALUES (new.rowid, {new_values});
+        END
+        """,
+    ]
+
+
+def _ensure_fts_table(conn, table: str, columns: Tuple[str, ...], tokenize: str, prefix: bool) -> bool:
+    """
+    Crea la tabla FTS, o la recrea si su definición cambió
+
+    Returns:
+        True si se (re)creó y reconstruyó el índice
+    """
+    statements = _fts_ddl(table, columns, tokenize, prefix)
+    digest = definition_hash(statements)
+    if stored_hash(conn, table) == digest:
+        return False
+
+    for suffix in ("ai", "ad", "au"):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {table}_{suffix}"))
+    conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+    for statement in statements:
+        conn.execute(text(statement))
+    conn.execute(text(f"INSERT INTO {table}({table}) VALUES ('rebuild')"))
+    store_hash(conn, table, digest)
+    return True
+
+
+def ensure_search_index(engine: Engine) -> SearchIndexInfo:
+    """
+    Crea (o recrea si cambió su definición) las tablas FTS5 y sus triggers
+
+    Es idempotente y se cachea por engine; se puede llamar en el arranque
+    o de forma perezosa desde el endpoint de búsqueda.
+    """
+    key = str(engine.url)
+    if key in _ready:
+        return _ready[key]
+
+    with _lock:
+        if key in _ready:
+            return _ready[key]
+
+        info = SearchIndexInfo(False, False, ())
+
+        if engine.dialect.name == "sqlite":
+            if not inspect(engine).has_table("productos"):
+                # Aún sin esquema: no se cachea para reintentar más tarde
+                return info
+
+            existing = {c["name"] for c in inspect(engine).get_columns("productos")}
+            columns = tuple(c for c, _ in SEARCH_COLUMNS if c in existing)
+            info.columns = columns
+
+            try:
+                with engine.begin() as conn:
+                    if _ensure_fts_table(conn, FTS_TABLE, columns, "unicode61 remove_diacritics 2", prefix=True):
+                        logger.info("✅ Índice FTS5 de productos creado")
+                info.fts = True
+            except Exception as e:
+                logger.warning(f"⚠️ FTS5 no disponible, se usará LIKE: {e}")
+
+            if info.fts:
+                try:
+                    with engine.begin() as conn:
+                        if _ensure_fts_table(conn, TRIGRAM_TABLE, columns, "trigram", prefix=False):
+                            logger.info("✅ Índice trigram de productos creado")
+                    info.trigram = True
+                except Exception as e:
+                    # Tokenizador trigram requiere SQLite >= 3.34
+                    logger.warning(f"⚠️ Búsqueda difusa trigram no disponible: {e}")
+
+        _ready[key] = info
+        return info
+
+
+def _terms(query: str) -> List[str]:
+    """Palabras de la consulta sin operadores FTS"""
+    return [t for t in re.findall(r"\w+", query.lower()) if t]
+
+
+def _prefix_query(terms: List[str]) -> str:
+    """Cada palabra como prefijo, todas requeridas: "coca"* "col"*"""
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+def _trigram_query(terms: List[str]) -> Optional[str]:
+    """Trigramas de la consulta unidos con OR; bm25 premia los que comparten más"""
+    grams = []
+    for term in terms:
+        grams.extend(term[i:i + 3] for i in range(len(term) - 2))
+    grams = list(dict.fromkeys(grams))
+    if not grams:
+        return None
+    return " OR ".join(f'"{g}"' for g in grams)
+
+
+def _weights(info: SearchIndexInfo) -> str:
+    weights = dict(SEARCH_COLUMNS)
+    return ", ".join(str(weights[c]) for c in info.columns)
+
+
+def search_productos(db: Session, model, query: str, limit: int = 20) -> Tuple[list, str]:
+    """
+    Busca productos por texto libre
+
+    Args:
+        db: Sesión de base de datos
+        model: Modelo ORM mapeado a la tabla ``productos``
+        query: Texto escrito por el usuario
+        limit: Máximo de resultados
+
+    Returns:
+        Tupla (productos ordenados por relevancia, modo usado:
+        'prefix', 'fuzzy' o 'like')
+    """
+    terms = _terms(query)
+    if not terms:
+        return [], "prefix"
+
+    info = ensure_search_index(db.get_bind())
+
+    if info.fts:
+        stmt = text(f"""
+            SELECT productos.* FROM {FTS_TABLE}
+            JOIN productos ON productos.rowid = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH :match
+            ORDER BY bm25({FTS_TABLE}, {_weights(info)})
+            LIMIT :limit
+        """)
+        results = db.query(model).from_statement(stmt).params(
+            match=_prefix_query(terms), limit=limit
+        ).all()
+        if results:
+            return results, "prefix"
+
+        trigram_match = _trigram_query(terms) if info.trigram else None
+        if trigram_match:
+            stmt = text(f"""
+                SELECT productos.* FROM {TRIGRAM_TABLE}
+                JOIN productos ON productos.rowid = {TRIGRAM_TABLE}.rowid
+                WHERE {TRIGRAM_TABLE} MATCH :match
+                ORDER BY bm25({TRIGRAM_TABLE}, {_weights(info)})
+                LIMIT :limit
+            """)
+            results = db.query(model).from_statement(stmt).params(
+                match=trigram_match, limit=limit
+            ).all()
+            return results, "fuzzy"
+
+        return [], "prefix"
+
+    # Motor sin FTS5: búsqueda por subcadena en las columnas disponibles
+    columns = [getattr(model, c) for c, _ in SEARCH_COLUMNS if hasattr(model, c)]
+    q = db.query(model)
+    for term in terms:
+        q = q.filter(or_(*[column.ilike(f"%{term}%") for column in columns]))
+    return q.order_by(model.nombre).limit(limit).all(), "like"
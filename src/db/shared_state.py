@@ -0,0 +1,374 @@
+"""
+Estado compartido entre workers
+
+Con un solo proceso de uvicorn, los contadores de versión (ETag), los
+carritos por carril, el pub/sub de escaneos y los límites de intentos
+pueden vivir en memoria. Con varios workers (``python run.py --prod``)
+cada proceso tendría su propia copia: un worker serviría un 304 con datos
+viejos o un cliente SSE no vería los escaneos recibidos por otro worker.
+
+Este módulo define una interfaz mínima con dos implementaciones:
+
+- ``InMemoryState``: en el proceso (por defecto, ``SHARED_STATE_URL=memory://``)
+- ``RedisState``: un servidor local compatible con Redis
+  (``SHARED_STATE_URL=redis://localhost:6379/0``), requiere el paquete ``redis``
+
+Los valores deben ser serializables a JSON.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SHARED_STATE_URL = os.getenv("SHARED_STATE_URL", "memory://")
+
+# Prefijo de todas las claves (permite compartir el servidor Redis)
+KEY_PREFIX = "pos:"
+
+
+class SharedState(ABC):
+    """
+    Interfaz del estado compartido
+
+    Contadores, valores con expiración, locks con nombre y pub/sub por canal.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        pass
+
+    @abstractmethod
+    def setdefault(self, key: str, value: Any) -> Any:
+        """Guarda ``value`` solo si la clave no existe y devuelve el valor vigente"""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        pass
+
+    @abstractmethod
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """
+        Incrementa un contador de forma atómica
+
+        Con ``ttl`` la clave expira ``ttl`` segundos después de crearse
+        (ventana fija, ver ``RateLimiter``).
+        """
+        pass
+
+    @abstractmethod
+    def keys(self, prefix: str) -> List[str]:
+        """Claves que empiezan por ``prefix``"""
+        pass
+
+    @abstractmethod
+    def lock(self, name: str, timeout: float = 10.0):
+        """Lock con nombre (context manager) visible por todos los workers"""
+        pass
+
+    @abstractmethod
+    def publish(self, channel: str, message: Dict[str, Any]):
+        pass
+
+    @abstractmethod
+    def subscribe(self, channel: str, callback: Callable[[Dict[str, Any]], None]):
+        """
+        Registra ``callback`` para los mensajes del canal
+
+        El callback se ejecuta en el hilo que publica (memoria) o en un hilo
+        de escucha (Redis), nunca en el event loop: debe ser thread-safe.
+        """
+        pass
+
+    def close(self):
+        pass
+
+    @abstractmethod
+    def get_status(self) -> dict:
+        pass
+
+
+class InMemoryState(SharedState):
+    """Estado en el proceso; los callbacks de ``subscribe`` se llaman al publicar"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self._locks: Dict[str, threading.RLock] = {}
+        self._subscribers: Dict[str, List[Callable]] = {}
+
+    def _live(self, key: str) -> Optional[Tuple[Any, Optional[float]]]:
+        entry = self._values.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._values[key]
+            return None
+        return entry
+
+    @staticmethod
+    def _expiry(ttl: Optional[float]) -> Optional[float]:
+        return time.monotonic() + ttl if ttl else None
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._live(key)
+            return entry[0] if entry else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._values[key] = (value, self._expiry(ttl))
+
+    def setdefault(self, key: str, value: Any) -> Any:
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                entry = self._values[key] = (value, None)
+            return entry[0]
+
+    def delete(self, key: str):
+        with self._lock:
+            self._values.pop(key, None)
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        with self._lock:
+            entry = self._live(key)
+            value, expires_at = entry if entry else (0, self._expiry(ttl))
+            value += amount
+            self._values[key] = (value, expires_at)
+            return value
+
+    def keys(self, prefix: str) -> List[str]:
+        with self._lock:
+            return [key for key in list(self._values) if key.startswith(prefix) and self._live(key)]
+
+    def lock(self, name: str, timeout: float = 10.0):
+        with self._lock:
+            return self._locks.setdefault(name, threading.RLock())
+
+    def publish(self, channel: str, message: Dict[str, Any]):
+        with self._lock:
+            callbacks = list(self._subscribers.get(channel, ()))
+        for callback in callbacks:
+            callback(message)
+
+    def subscribe(self, channel: str, callback: Callable[[Dict[str, Any]], None]):
+        with self._lock:
+            self._subscribers.setdefault(channel, []).append(callback)
+
+    def get_status(self) -> dict:
+        with self._lock:
+            return {"backend": "memory", "keys": len(self._values), "channels": len(self._subscribers)}
+
+
+class RedisState(SharedState):
+    """
+    Estado en un servidor compatible con Redis (Redis, Valkey, KeyDB...)
+
+    Un único hilo de escucha por proceso reparte los mensajes de todos los
+    canales suscritos.
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(f"SHARED_STATE_URL={url} requiere el paquete 'redis' ({e})") from e
+
+        self.url = url
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self._lock = threading.Lock()
+        self._callbacks: Dict[str, List[Callable]] = {}
+        self._pubsub = None
+        self._listener = None
+
+    def _key(self, key: str) -> str:
+        return KEY_PREFIX + key
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self._key(key))
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.client.set(self._key(key), json.dumps(value, default=str), px=int(ttl * 1000) if ttl else None)
+
+    def setdefault(self, key: str, value: Any) -> Any:
+        self.client.set(self._key(key), json.dumps(value, default=str), nx=True)
+        return self.get(key)
+
+    def delete(self, key: str):
+        self.client.delete(self._key(key))
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        value = self.client.incrby(self._key(key), amount)
+        # La ventana empieza con el primer incremento
+        if ttl and value == amount:
+            self.client.pexpire(self._key(key), int(ttl * 1000))
+        return value
+
+    def keys(self, prefix: str) -> List[str]:
+        start = len(KEY_PREFIX)
+        return [key[start:] for key in self.client.scan_iter(match=self._key(prefix) + "*")]
+
+    def lock(self, name: str, timeout: float = 10.0):
+        return self.client.lock(self._key(f"lock:{name}"), timeout=timeout)
+
+    def publish(self, channel: str, message: Dict[str, Any]):
+        self.client.publish(self._key(channel), json.dumps(message, default=str))
+
+    def _dispatch(self, raw: dict):
+        channel = raw["channel"][len(KEY_PREFIX):]
+        message = json.loads(raw["data"])
+        with self._lock:
+            callbacks = list(self._callbacks.get(channel, ()))
+        for callback in callbacks:
+            try:
+                callback(message)
+            except Exception as e:
+                logger.error(f"❌ Error en suscriptor de {channel}: {e}")
+
+    def subscribe(self, channel: str, callback: Callable[[Dict[str, Any]], None]):
+        with self._lock:
+            first = channel not in self._callbacks
+            self._callbacks.setdefault(channel, []).append(callback)
+            if not first:
+                return
+            if self._pubsub is None:
+                self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(**{self._key(channel): self._dispatch})
+            if self._listener is None:
+                self._listener = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+        self.client.close()
+
+    def get_status(self) -> dict:
+        with self._lock:
+            channels = len(self._callbacks)
+        return {
+            "backend": "redis",
+            "host": self.client.connection_pool.connection_kwargs.get("host"),
+            "channels": channels,
+        }
+
+
+class RateLimiter:
+    """
+    Límite de eventos por clave en una ventana fija
+
+    El contador vive en el estado compartido, así el límite es global y no
+    por worker.
+    """
+
+    def __init__(self, state: SharedState, name: str, limit: int, window_seconds: float):
+        self.state = state
+        self.name = name
+        self.limit = limit
+        self.window_seconds = window_seconds
+
+    def _key(self, key: str) -> str:
+        return f"ratelimit:{self.name}:{key}"
+
+    def hit(self, key: str) -> int:
+        """Registra un evento y devuelve cuántos van en la ventana"""
+        return self.state.incr(self._key(key), ttl=self.window_seconds)
+
+    def exceeded(self, key: str) -> bool:
+        """Indica si la clave ya alcanzó el límite (sin registrar nada)"""
+        return (self.state.get(self._key(key)) or 0) >= self.limit
+
+    def reset(self, key: str):
+        self.state.delete(self._key(key))
+
+
+def create_shared_state(url: str = None) -> SharedState:
+    """
+    Crear el backend indicado por la URL
+
+    Args:
+        url: ``memory://`` o ``redis://host:puerto/db`` (por defecto ``SHARED_STATE_URL``)
+    """
+    url = url or SHARED_STATE_URL
+    scheme = url.split("://", 1)[0]
+
+    if scheme == "memory":
+        return InMemoryState()
+    if scheme in ("redis", "rediss", "unix"):
+        return RedisState(url)
+
+    raise ValueError(f"Backend de estado compartido no soportado: {scheme}")
+
+
+def is_external_state(url: str = None) -> bool:
+    """Indica si el backend lo comparten varios procesos (todo salvo ``memory://``)"""
+    return not (url or SHARED_STATE_URL).startswith("memory://")
+
+
+def prepare_workers(workers: int, url: str = None) -> int:
+    """
+    Preparar el arranque de uvicorn con ``workers`` procesos
+
+    Con estado en memoria cada worker tendría sus propios ETag, carritos,
+    eventos y límites: se fuerza un único worker. Las migraciones se
+    aplican una sola vez antes de que arranquen los workers (en lugar de
+    que cada lifespan compita por aplicarlas) y se inicia una nueva época
+    de ETag.
+
+    Returns:
+        Número de workers a lanzar
+    """
+    url = url or SHARED_STATE_URL
+    if workers > 1 and not is_external_state(url):
+        logger.warning(f"⚠️ {workers} workers con SHARED_STATE_URL={url}: el estado en memoria "
+                       "no se comparte entre procesos, se usa un solo worker")
+        workers = 1
+
+    from .data_version import EPOCH_KEY
+    from .schema_migrations import ensure_schema
+
+    schema = ensure_schema()
+    logger.info(f"✅ Esquema de base de datos en la revisión {schema.current}")
+
+    # Nueva época de ETag: las respuestas cacheadas antes del reinicio se revalidan
+    state = create_shared_state(url)
+    state.delete(EPOCH_KEY)
+    state.close()
+
+    return workers
+
+
+# Instancia global del estado compartido
+_shared_state: Optional[SharedState] = None
+_state_lock = threading.Lock()
+
+
+def get_shared_state() -> SharedState:
+    """
+    Obtener la instancia global del estado compartido
+
+    Returns:
+        Backend configurado en ``SHARED_STATE_URL``
+    """
+    global _shared_state
+
+    if _shared_state is None:
+        with _state_lock:
+            if _shared_state is None:
+                _shared_state = create_shared_state()
+                logger.info(f"🔗 Estado compartido: {_shared_state.get_status()['backend']}")
+
+    return _shared_state
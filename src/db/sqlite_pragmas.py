@@ -0,0 +1,97 @@
+"""
+Perfil de rendimiento para SQLite
+
+Aplica PRAGMAs a cada conexión nueva del engine:
+
+- ``journal_mode=WAL``: los lectores (dashboards) no bloquean al escritor
+  (cobro) ni viceversa
+- ``synchronous=NORMAL``: en WAL solo se sincroniza en los checkpoints, no
+  en cada commit; una caída de energía puede perder la última transacción
+  pero nunca corrompe la base
+- ``mmap_size``, ``cache_size``, ``temp_store``: menos lecturas a disco
+- ``busy_timeout``: esperar al lock en lugar de fallar con "database is locked"
+
+Cada valor se puede cambiar con ``SQLITE_<PRAGMA>`` (ej.
+``SQLITE_SYNCHRONOUS=FULL``) y el perfil completo se desactiva con
+``SQLITE_PRAGMAS_ENABLED=false``.
+"""
+
+import logging
+import os
+from typing import Dict
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": "268435456",  # 256 MB
+    "cache_size": "-65536",  # Negativo = KiB (64 MB)
+    "temp_store": "MEMORY",
+    "busy_timeout": "5000",  # ms
+}
+
+# Valores que SQLite devuelve como número para cada nombre
+_ENUM_NAMES = {
+    "synchronous": {"0": "OFF", "1": "NORMAL", "2": "FULL", "3": "EXTRA"},
+    "temp_store": {"0": "DEFAULT", "1": "FILE", "2": "MEMORY"},
+}
+
+
+def get_pragma_profile() -> Dict[str, str]:
+    """Perfil activo: valores por defecto sobrescritos por variables de entorno"""
+    if os.getenv("SQLITE_PRAGMAS_ENABLED", "true").lower() != "true":
+        return {}
+    return {
+        name: os.getenv(f"SQLITE_{name.upper()}", default)
+        for name, default in DEFAULT_PRAGMAS.items()
+    }
+
+
+def apply_sqlite_pragmas(engine: Engine, profile: Dict[str, str] = None):
+    """
+    Registra el hook que aplica el perfil en cada conexión nueva
+
+    No hace nada si el engine no es SQLite.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    profile = get_pragma_profile() if profile is None else profile
+    if not profile:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in profile.items():
+                try:
+                    cursor.execute(f"PRAGMA {name}={value}")
+                except Exception as e:
+                    logger.warning(f"⚠️ No se pudo aplicar PRAGMA {name}={value}: {e}")
+        finally:
+            cursor.close()
+
+    logger.debug(f"Perfil SQLite configurado: {profile}")
+
+
+def get_sqlite_settings(engine: Engine) -> Dict[str, str]:
+    """
+    Valores efectivos de los PRAGMAs del perfil en una conexión del pool
+
+    Returns:
+        Diccionario nombre -> valor (vacío si el engine no es SQLite)
+    """
+    if engine.dialect.name != "sqlite":
+        return {}
+
+    settings = {}
+    with engine.connect() as conn:
+        for name in DEFAULT_PRAGMAS:
+            value = str(conn.execute(text(f"PRAGMA {name}")).scalar())
+            settings[name] = _ENUM_NAMES.get(name, {}).get(value, value)
+    return settings
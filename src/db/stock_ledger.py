@@ -0,0 +1,162 @@
+"""
+Libro de stock: descuentos condicionados, devoluciones y reservas por carril
+
+Todas las escrituras sobre ``productos.stock`` de ventas y cancelaciones
+pasan por aquí:
+
+- ``sell`` descuenta con un único ``UPDATE ... WHERE stock - reservado >= ?``
+  (ver ``ProductoRepository.decrement_stock``): dos cobros simultáneos no
+  pueden vender la misma unidad y la base nunca queda con stock negativo.
+  No se lee el stock para escribirlo después, así que la transacción no
+  mantiene el lock de escritura más de lo necesario.
+- ``restock`` devuelve unidades con ``stock = stock + ?``.
+- Cada cambio queda en ``stock_movements`` (cantidad con signo, motivo,
+  venta y carril).
+
+Las reservas (opcionales, ``STOCK_RESERVATION_SECONDS > 0``) apartan las
+unidades escaneadas en el carrito de un carril durante unos minutos. La
+reserva es un único ``INSERT ... SELECT ... WHERE`` condicionado al stock
+libre; vence sola (las consultas ignoran las vencidas, y cada reserva
+nueva borra las vencidas del producto) y se libera al vaciar el carrito,
+al quitar la línea o al cobrar.
+"""
+
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Set
+
+from sqlalchemy import case, delete, insert, select, text, update
+from sqlalchemy.orm import Session
+
+from .models_advanced import Producto, StockMovement, StockReservation
+from .repositories import ProductoRepository
+
+logger = logging.getLogger(__name__)
+
+STOCK_RESERVATION_SECONDS = int(os.getenv("STOCK_RESERVATION_SECONDS", "0"))
+
+MOVEMENT_SALE = "sale"
+MOVEMENT_CANCEL = "cancel"
+
+# Reserva absoluta de un carril: solo se escribe si el stock libre alcanza
+_RESERVE_SQL = text("""
+    INSERT INTO stock_reservations (lane_id, producto_id, quantity, expires_at)
+    SELECT :lane_id, :producto_id, :quantity, :expires_at
+    WHERE (SELECT stock FROM productos WHERE id = :producto_id) - (
+        SELECT COALESCE(SUM(quantity), 0) FROM stock_reservations
+        WHERE producto_id = :producto_id AND lane_id != :lane_id AND expires_at > :now
+    ) >= :quantity
+    ON CONFLICT (lane_id, producto_id)
+    DO UPDATE SET quantity = excluded.quantity, expires_at = excluded.expires_at
+""")
+
+
+def reservations_enabled() -> bool:
+    return STOCK_RESERVATION_SECONDS > 0
+
+
+class StockLedger:
+    """
+    Operaciones de stock sobre una ``Session`` abierta
+
+    Como los repositorios, no confirma la transacción: quien la usa hace
+    ``commit`` (o ``rollback`` si ``sell`` no pudo descontar todo).
+    """
+
+    def __init__(self, db: Session, reservation_seconds: int = STOCK_RESERVATION_SECONDS):
+        self.db = db
+        self.reservation_seconds = reservation_seconds
+
+    def _record(self, quantities: Dict[int, int], sign: int, reason: str,
+                sale_id: Optional[int], lane_id: Optional[str]):
+        self.db.execute(insert(StockMovement), [
+            {"producto_id": producto_id, "quantity": sign * quantity, "reason": reason,
+             "sale_id": sale_id, "lane_id": lane_id}
+            for producto_id, quantity in quantities.items()
+        ])
+
+    def sell(self, quantities: Dict[int, int], sale_id: Optional[int] = None,
+             lane_id: Optional[str] = None) -> Set[int]:
+        """
+        Descuenta las cantidades vendidas y las registra en el libro
+
+        Las reservas del carril que vende cuentan como disponibles y se
+        liberan para los productos vendidos.
+
+        Returns:
+            Ids de los productos sin stock suficiente (vacío si se descontó todo)
+        """
+        if not quantities:
+            return set()
+
+        updated = ProductoRepository(self.db).decrement_stock(quantities, lane_id=lane_id)
+        missing = set(quantities) - updated
+        if missing:
+            return missing
+
+        self._record(quantities, -1, MOVEMENT_SALE, sale_id, lane_id)
+        if lane_id:
+            self.db.execute(delete(StockReservation).where(
+                StockReservation.lane_id == lane_id,
+                StockReservation.producto_id.in_(list(quantities)),
+            ))
+        return set()
+
+    def restock(self, quantities: Dict[int, int], sale_id: Optional[int] = None,
+                reason: str = MOVEMENT_CANCEL):
+        """Devuelve unidades al stock (cancelación) y las registra en el libro"""
+        if not quantities:
+            return
+        self.db.connection().execute(
+            update(Producto)
+            .where(Producto.id.in_(list(quantities)))
+            .values(stock=Producto.stock + case(quantities, value=Producto.id))
+        )
+        self._record(quantities, 1, reason, sale_id, None)
+
+    def reserve(self, lane_id: str, producto_id: int, quantity: int) -> bool:
+        """
+        Fija las unidades apartadas por un carril (0 libera la reserva)
+
+        Returns:
+            False si el stock libre no alcanza (la reserva anterior se conserva)
+        """
+        if quantity <= 0:
+            self.release(lane_id, producto_id)
+            return True
+
+        if self.db.get_bind().dialect.name != "sqlite":
+            # En SQLite la escritura ya es exclusiva; en PostgreSQL se serializan
+            # las reservas del producto con el lock de su fila
+            self.db.execute(select(Producto.id).where(Producto.id == producto_id).with_for_update())
+
+        # Solo las del producto: ya están serializadas por el lock de arriba
+        self.release_expired(producto_id)
+
+        now = datetime.now()
+        result = self.db.execute(_RESERVE_SQL, {
+            "lane_id": lane_id,
+            "producto_id": producto_id,
+            "quantity": quantity,
+            "expires_at": now + timedelta(seconds=self.reservation_seconds),
+            "now": now,
+        })
+        return result.rowcount > 0
+
+    def release(self, lane_id: str, producto_id: Optional[int] = None):
+        """Libera las reservas de un carril (o solo la de un producto)"""
+        statement = delete(StockReservation).where(StockReservation.lane_id == lane_id)
+        if producto_id is not None:
+            statement = statement.where(StockReservation.producto_id == producto_id)
+        self.db.execute(statement)
+
+    def release_expired(self, producto_id: Optional[int] = None) -> int:
+        """Borra las reservas vencidas (ya no cuentan, solo ocupan espacio)"""
+        statement = delete(StockReservation).where(StockReservation.expires_at <= datetime.now())
+        if producto_id is not None:
+            statement = statement.where(StockReservation.producto_id == producto_id)
+        result = self.db.execute(statement)
+        if result.rowcount:
+            logger.debug(f"{result.rowcount} reservas de stock vencidas liberadas")
+        return result.rowcount
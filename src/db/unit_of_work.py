@@ -0,0 +1,112 @@
+"""
+Unidad de trabajo por request
+
+Cada request HTTP abre una ``UnitOfWork`` (ver ``api.db_middleware``) que
+guarda una única sesión de base de datos, creada la primera vez que una
+dependencia la pide. Todas las dependencias del mismo request (usuario
+autenticado, endpoint, etc.) comparten esa sesión, y se cierra al terminar
+de enviar la respuesta.
+
+La unidad de trabajo también mide cuántas sentencias SQL ejecutó el request,
+cuánto tardaron, cuántas veces se repitió cada forma de sentencia (ver
+``db.query_stats``) y cuánto tiempo estuvo abierta la sesión.
+"""
+
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from .query_stats import statement_shape
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar[Optional["UnitOfWork"]] = ContextVar("db_unit_of_work", default=None)
+
+_START_KEY = "unit_of_work_query_start"
+
+
+class UnitOfWork:
+    """Sesión compartida y métricas de base de datos de un request"""
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        self.session_factory = session_factory
+        self.query_count = 0
+        self.query_ms = 0.0
+        self.statements: Counter = Counter()
+        self._session: Optional[Session] = None
+        self._opened_at: Optional[float] = None
+        self._session_seconds = 0.0
+
+    @property
+    def session(self) -> Session:
+        """Sesión del request (se crea al primer uso)"""
+        if self._session is None:
+            self._session = self.session_factory()
+            self._opened_at = time.perf_counter()
+        return self._session
+
+    @property
+    def session_ms(self) -> float:
+        """Milisegundos que la sesión lleva (o estuvo) abierta"""
+        seconds = self._session_seconds
+        if self._opened_at is not None:
+            seconds += time.perf_counter() - self._opened_at
+        return seconds * 1000
+
+    def close(self):
+        """Cierra la sesión si se llegó a abrir"""
+        if self._session is not None:
+            try:
+                self._session.close()
+            finally:
+                self._session_seconds += time.perf_counter() - self._opened_at
+                self._session = None
+                self._opened_at = None
+
+    def metrics_headers(self) -> dict:
+        return {
+            "X-DB-Query-Count": str(self.query_count),
+            "X-DB-Query-Ms": f"{self.query_ms:.2f}",
+            "X-DB-Session-Ms": f"{self.session_ms:.2f}",
+        }
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    """Unidad de trabajo activa en el contexto actual (o None)"""
+    return _current.get()
+
+
+@contextmanager
+def unit_of_work(session_factory: Callable[[], Session]):
+    """Activa una unidad de trabajo para el bloque y la cierra al salir"""
+    uow = UnitOfWork(session_factory)
+    token = _current.set(uow)
+    try:
+        yield uow
+    finally:
+        uow.close()
+        _current.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    uow = _current.get()
+    if uow is not None:
+        uow.query_count += 1
+        uow.statements[statement_shape(statement)] += 1
+        conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _time_query(conn, cursor, statement, parameters, context, executemany):
+    uow = _current.get()
+    starts = conn.info.get(_START_KEY)
+    if uow is not None and starts:
+        uow.query_ms += (time.perf_counter() - starts.pop()) * 1000
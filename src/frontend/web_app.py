@@ -10,7 +10,7 @@ from pathlib import Path
 from typing import Optional
 
 from fastapi import FastAPI, Request, Form, HTTPException, Depends
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 import httpx
@@ -251,6 +251,28 @@ async def api_usb_scanner_recent_scans(limit: int = 10):
         return {"status": "error", "escaneos": [], "message": f"Error: {str(e)}"}
 
 
+@app.get("/api/usb-scanner/events")
+async def api_usb_scanner_events(request: Request):
+    """Proxy del flujo SSE de escaneos del scanner USB"""
+    headers = {}
+    if request.headers.get("last-event-id"):
+        headers["Last-Event-ID"] = request.headers["last-event-id"]
+    
+    async def relay():
+        async with httpx.AsyncClient(timeout=None) as client:
+            async with client.stream("GET", f"{API_BASE_URL}/usb-scanner/events", headers=headers) as response:
+                async for chunk in response.aiter_text():
+                    if await request.is_disconnected():
+                        break
+                    yield chunk
+    
+    return StreamingResponse(
+        relay(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/api/scan/camera")
 async def api_scan_camera():
     """Proxy para escaneo desde cámara"""
@@ -0,0 +1,228 @@
+"""
+Bus de eventos en memoria para detecciones de scanner
+=====================================================
+
+Los scanners (USB-HID, serial) ejecutan sus callbacks en hilos propios,
+mientras que los clientes SSE viven en el event loop de FastAPI. Este
+módulo hace de puente entre ambos mundos:
+
+- ``publish`` es thread-safe y se puede llamar desde cualquier hilo
+- Cada suscriptor recibe los eventos en su propia ``asyncio.Queue``
+- Se guarda un historial acotado para reenviar eventos perdidos
+  (cabecera ``Last-Event-ID`` de EventSource)
+- Los eventos pasan por el estado compartido (``db.shared_state``): con
+  varios workers, un escaneo recibido por uno llega a los clientes SSE
+  conectados a cualquiera de ellos
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from ..db.shared_state import InMemoryState, SharedState, get_shared_state
+
+logger = logging.getLogger(__name__)
+
+
+class ScanEventBus:
+    """
+    Pub/sub de eventos de escaneo
+
+    Cada evento publicado recibe un ``id`` incremental (contador del estado
+    compartido) que los clientes pueden usar como cursor para reanudar la
+    suscripción. Sin ``state`` el bus es local al proceso.
+    """
+
+    def __init__(
+        self,
+        history_size: int = 200,
+        queue_size: int = 100,
+        channel: str = "scans",
+        state: Optional[SharedState] = None,
+    ):
+        self.history_size = history_size
+        self.queue_size = queue_size
+        self.channel = channel
+        self.state = state if state is not None else InMemoryState()
+
+        self._lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._last_id = 0
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        self._subscribers: Dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+
+        # Estadísticas
+        self.published_count = 0
+        self.dropped_count = 0
+
+        self.state.subscribe(f"events:{channel}", self._receive)
+
+    @property
+    def last_id(self) -> int:
+        """Id del último evento publicado"""
+        return self._last_id
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Publica un evento para todos los suscriptores (thread-safe)
+
+        Args:
+            event_type: Tipo de evento SSE (ej. 'scan')
+            data: Payload serializable a JSON
+
+        Returns:
+            Evento publicado con su id y timestamp
+        """
+        # Id y envío juntos: los eventos de este proceso llegan en orden
+        with self._publish_lock:
+            event = {
+                "id": self.state.incr(f"events:{self.channel}:id"),
+                "type": event_type,
+                "timestamp": datetime.now().isoformat(),
+                "data": data,
+            }
+            self.published_count += 1
+            self.state.publish(f"events:{self.channel}", event)
+
+        return event
+
+    def _receive(self, event: Dict[str, Any]):
+        """Guarda un evento del canal (de cualquier worker) y lo reparte localmente"""
+        with self._lock:
+            self._last_id = max(self._last_id, event["id"])
+            self._history.append(event)
+            subscribers = list(self._subscribers.items())
+
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                # El loop del suscriptor ya se cerró
+                self.unsubscribe(queue)
+
+    def _deliver(self, queue: asyncio.Queue, event: Dict[str, Any]):
+        """Entrega un evento en la cola del suscriptor (dentro de su loop)"""
+        if queue.full():
+            # Cliente lento: se descarta el evento más antiguo
+            try:
+                queue.get_nowait()
+                self.dropped_count += 1
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(event)
+
+    def subscribe(self) -> asyncio.Queue:
+        """
+        Registra un nuevo suscriptor
+
+        Debe llamarse desde dentro del event loop que consumirá la cola.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers[queue] = loop
+        logger.debug(f"Nuevo suscriptor de escaneos ({len(self._subscribers)} activos)")
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Elimina un suscriptor"""
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def events_since(self, last_id: int) -> List[Dict[str, Any]]:
+        """Eventos del historial posteriores a ``last_id``"""
+        with self._lock:
+            return [event for event in self._history if event["id"] > last_id]
+
+    def get_status(self) -> dict:
+        """Estado del bus de eventos"""
+        with self._lock:
+            subscribers = len(self._subscribers)
+        return {
+            "subscribers": subscribers,
+            "last_event_id": self._last_id,
+            "published": self.published_count,
+            "dropped": self.dropped_count,
+            "history_size": self.history_size,
+            "channel": self.channel,
+        }
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """
+    Serializa un evento al formato text/event-stream
+
+    Args:
+        event: Evento publicado por ``ScanEventBus``
+
+    Returns:
+        Bloque SSE listo para enviar
+    """
+    payload = json.dumps(event["data"], default=str, ensure_ascii=False)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n"
+
+
+async def stream_events(
+    bus: ScanEventBus,
+    last_event_id: Optional[int] = None,
+    keepalive_seconds: float = 15.0,
+    is_disconnected=None,
+):
+    """
+    Generador asíncrono de eventos SSE para ``StreamingResponse``
+
+    Args:
+        bus: Bus del que leer
+        last_event_id: Si se indica, se reenvían primero los eventos posteriores
+        keepalive_seconds: Intervalo de comentarios keep-alive
+        is_disconnected: Corutina opcional que indica si el cliente se fue
+    """
+    queue = bus.subscribe()
+    try:
+        # Indicar al navegador el tiempo de reconexión
+        yield "retry: 2000\n\n"
+
+        # Lo publicado entre la suscripción y la lectura del historial llega
+        # por ambos caminos: la cola no repite lo ya reenviado
+        replayed = 0
+        if last_event_id is not None:
+            for event in bus.events_since(last_event_id):
+                replayed = max(replayed, event["id"])
+                yield format_sse(event)
+
+        while True:
+            if is_disconnected is not None and await is_disconnected():
+                break
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=keepalive_seconds)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event["id"] <= replayed:
+                continue
+            yield format_sse(event)
+    finally:
+        bus.unsubscribe(queue)
+
+
+# Instancia global del bus
+_scan_event_bus: Optional[ScanEventBus] = None
+
+
+def get_scan_event_bus() -> ScanEventBus:
+    """
+    Obtener la instancia global del bus de eventos de escaneo
+
+    Returns:
+        Instancia única de ScanEventBus
+    """
+    global _scan_event_bus
+
+    if _scan_event_bus is None:
+        _scan_event_bus = ScanEventBus(state=get_shared_state())
+
+    return _scan_event_bus
@@ -0,0 +1,202 @@
+"""
+Configuración de scanners recargable en caliente
+================================================
+
+Los parámetros de detección (longitudes, umbrales de velocidad) viven en
+un objeto ``ScannerConfig`` inmutable. Cambiar la configuración construye
+un objeto nuevo y lo intercambia de forma atómica en ``ScannerConfigStore``;
+los scanners leen la referencia actual en cada evento, de modo que los
+cambios se aplican sin detener el hook de teclado ni el hilo serial.
+
+La configuración se persiste en la sección ``scanner`` de
+``config/app_config.json`` y tiene prioridad sobre las variables de entorno.
+"""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parents[2] / "config" / "app_config.json"
+
+
+class ScannerConfig(NamedTuple):
+    """Parámetros de detección compartidos por todos los backends"""
+    version: int = 1
+    min_barcode_length: int = 8
+    max_barcode_length: int = 50
+    speed_threshold_ms: float = 150.0
+    consistency_threshold_ms: float = 80.0
+    min_numeric_ratio: float = 0.7
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+
+# Campos que se pueden modificar (todos menos la versión)
+EDITABLE_FIELDS = tuple(f for f in ScannerConfig._fields if f != "version")
+
+
+class ScannerConfigError(ValueError):
+    """Configuración de scanner inválida"""
+
+
+class ScannerConfigVersionError(ScannerConfigError):
+    """La versión esperada no coincide con la configuración activa"""
+
+
+def _validate(config: ScannerConfig):
+    """Valida la coherencia de una configuración"""
+    if config.min_barcode_length < 1:
+        raise ScannerConfigError("min_barcode_length debe ser al menos 1")
+    if config.max_barcode_length < config.min_barcode_length:
+        raise ScannerConfigError("max_barcode_length debe ser mayor o igual a min_barcode_length")
+    if config.speed_threshold_ms <= 0 or config.consistency_threshold_ms <= 0:
+        raise ScannerConfigError("Los umbrales de tiempo deben ser positivos")
+    if not 0 <= config.min_numeric_ratio <= 1:
+        raise ScannerConfigError("min_numeric_ratio debe estar entre 0 y 1")
+
+
+def _config_from_env() -> ScannerConfig:
+    """Configuración inicial desde variables de entorno"""
+    return ScannerConfig(
+        min_barcode_length=int(os.getenv('MIN_BARCODE_LENGTH', '8')),
+        max_barcode_length=int(os.getenv('MAX_BARCODE_LENGTH', '50')),
+        speed_threshold_ms=float(os.getenv('SCANNER_SPEED_MS', '150')),
+    )
+
+
+class ScannerConfigStore:
+    """
+    Contenedor de la configuración activa con intercambio atómico
+
+    ``current`` siempre devuelve un ``ScannerConfig`` completo y coherente;
+    las lecturas no necesitan lock porque la asignación de la referencia
+    es atómica.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else Path(os.getenv('SCANNER_CONFIG_PATH', DEFAULT_CONFIG_PATH))
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[ScannerConfig], None]] = []
+        self._current = self._load()
+
+    @property
+    def current(self) -> ScannerConfig:
+        return self._current
+
+    def _read_file(self) -> dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"❌ No se pudo leer {self.path}: {e}")
+            return {}
+
+    def _load(self) -> ScannerConfig:
+        """Variables de entorno sobrescritas por la sección persistida"""
+        config = _config_from_env()
+        persisted = self._read_file().get("scanner", {})
+
+        values = {k: v for k, v in persisted.items() if k in ScannerConfig._fields}
+        if values:
+            try:
+                candidate = config._replace(**values)
+                _validate(candidate)
+                config = candidate
+            except (ScannerConfigError, TypeError) as e:
+                logger.error(f"❌ Configuración de scanner persistida inválida, se ignora: {e}")
+
+        return config
+
+    def _persist(self, config: ScannerConfig):
+        """Escribe la sección ``scanner`` conservando el resto del archivo"""
+        data = self._read_file()
+        data["scanner"] = config.to_dict()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def update(self, expected_version: Optional[int] = None, persist: bool = True, **changes) -> ScannerConfig:
+        """
+        Aplica cambios creando una nueva versión de la configuración
+
+        Args:
+            expected_version: Si se indica, falla si la versión activa es otra
+            persist: Guardar la nueva versión en el archivo de configuración
+            **changes: Campos de ``ScannerConfig`` a modificar
+
+        Returns:
+            Nueva configuración activa
+
+        Raises:
+            ScannerConfigError: Si los valores son inválidos o la versión no coincide
+        """
+        unknown = set(changes) - set(EDITABLE_FIELDS)
+        if unknown:
+            raise ScannerConfigError(f"Campos desconocidos: {sorted(unknown)}")
+
+        with self._lock:
+            current = self._current
+            if expected_version is not None and expected_version != current.version:
+                raise ScannerConfigVersionError(
+                    f"Versión desactualizada: activa {current.version}, esperada {expected_version}"
+                )
+
+            new_config = current._replace(version=current.version + 1, **changes)
+            _validate(new_config)
+
+            if persist:
+                self._persist(new_config)
+            self._current = new_config
+            listeners = list(self._listeners)
+
+        logger.info(f"✅ Configuración de scanner actualizada a versión {new_config.version}")
+
+        for listener in listeners:
+            try:
+                listener(new_config)
+            except Exception as e:
+                logger.error(f"❌ Error notificando cambio de configuración: {e}")
+
+        return new_config
+
+    def reload(self) -> ScannerConfig:
+        """Recarga la configuración desde el archivo (ej. editado a mano)"""
+        loaded = self._load()
+        with self._lock:
+            self._current = loaded._replace(version=max(loaded.version, self._current.version + 1))
+            return self._current
+
+    def subscribe(self, listener: Callable[[ScannerConfig], None]):
+        """Registra una función que se llama con cada nueva configuración"""
+        with self._lock:
+            self._listeners.append(listener)
+
+
+# Instancia global del almacén de configuración
+_scanner_config_store: Optional[ScannerConfigStore] = None
+
+
+def get_scanner_config_store() -> ScannerConfigStore:
+    """
+    Obtener la instancia global de configuración de scanners
+
+    Returns:
+        Instancia única de ScannerConfigStore
+    """
+    global _scanner_config_store
+
+    if _scanner_config_store is None:
+        _scanner_config_store = ScannerConfigStore()
+
+    return _scanner_config_store
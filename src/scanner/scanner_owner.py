@@ -0,0 +1,166 @@
+"""
+Dueño único del scanner físico entre workers
+
+El scanner (hook de teclado USB-HID o puerto serie) es un recurso del
+equipo, no del proceso: con varios workers de uvicorn, ``/usb-scanner/start``
+atendido por dos workers distintos instalaría dos hooks (escaneos
+duplicados) o abriría dos veces el mismo puerto.
+
+El worker que arranca el hardware se registra como dueño en el estado
+compartido (``scanner:owner``, con expiración renovada por un latido
+mientras escucha). El arranque se hace bajo el lock ``scanner``: si otro
+worker ya es dueño no se toca el hardware y se informa el dueño. Los demás
+workers leen de ahí el estado del scanner y piden la detención por el
+canal ``scanner:control``, que solo atiende el dueño.
+"""
+
+import logging
+import os
+import socket
+import threading
+from datetime import datetime
+from typing import Callable, Optional
+
+from ..db.shared_state import SharedState, get_shared_state
+
+logger = logging.getLogger(__name__)
+
+OWNER_KEY = "scanner:owner"
+CONTROL_CHANNEL = "scanner:control"
+LOCK_NAME = "scanner"
+
+# Segundos sin latido tras los que otro worker puede tomar el scanner
+SCANNER_OWNER_TTL = float(os.getenv("SCANNER_OWNER_TTL", "30"))
+
+
+class ScannerOwnership:
+    """Registro del worker que controla el scanner físico"""
+
+    def __init__(self, state: Optional[SharedState] = None, worker_id: Optional[str] = None,
+                 ttl: float = SCANNER_OWNER_TTL):
+        self.state = state if state is not None else get_shared_state()
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.ttl = ttl
+        self._scanner = None
+        self._since = None
+        self._heartbeat: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self.state.subscribe(CONTROL_CHANNEL, self._on_control)
+
+    def owner(self) -> Optional[dict]:
+        """Registro del dueño actual (None si nadie controla el scanner)"""
+        return self.state.get(OWNER_KEY)
+
+    def owned_elsewhere(self) -> Optional[dict]:
+        """Registro del dueño si es otro worker"""
+        owner = self.owner()
+        if owner and owner["worker"] != self.worker_id:
+            return owner
+        return None
+
+    def _write(self, scanner):
+        self.state.set(OWNER_KEY, {
+            "worker": self.worker_id,
+            "since": self._since,
+            "status": scanner.get_status(),
+        }, ttl=self.ttl)
+
+    def acquire(self, scanner, start: Callable[[], bool]) -> Optional[dict]:
+        """
+        Arranca el scanner en este worker si ningún otro lo controla
+
+        Args:
+            scanner: Scanner local (``get_scanner_instance()``)
+            start: Configura el callback y arranca la escucha; devuelve si pudo
+
+        Returns:
+            None si este worker es el dueño; el registro del otro dueño si no
+
+        Raises:
+            RuntimeError: Si el hardware no se pudo iniciar
+        """
+        with self.state.lock(LOCK_NAME):
+            owner = self.owned_elsewhere()
+            if owner:
+                return owner
+            if not start():
+                raise RuntimeError("No se pudo iniciar el scanner")
+            self._scanner = scanner
+            self._since = self._since or datetime.now().isoformat()
+            self._write(scanner)
+
+        self._start_heartbeat()
+        logger.info(f"📷 Scanner controlado por el worker {self.worker_id}")
+        return None
+
+    def release(self):
+        """Deja de ser dueño (tras detener el scanner local)"""
+        self._stopped.set()
+        with self.state.lock(LOCK_NAME):
+            owner = self.owner()
+            if owner and owner["worker"] == self.worker_id:
+                self.state.delete(OWNER_KEY)
+        self._scanner = None
+        self._since = None
+
+    def request_stop(self) -> Optional[dict]:
+        """
+        Pide al dueño (otro worker) que detenga el scanner
+
+        Returns:
+            Registro del dueño al que se envió la orden, o None si no hay otro dueño
+        """
+        owner = self.owned_elsewhere()
+        if owner:
+            self.state.publish(CONTROL_CHANNEL, {"action": "stop", "worker": owner["worker"]})
+        return owner
+
+    def _on_control(self, message: dict):
+        if message.get("worker") != self.worker_id or message.get("action") != "stop":
+            return
+        scanner = self._scanner
+        if scanner is not None and scanner.is_listening:
+            scanner.stop_listening()
+            logger.info("⏹️ Scanner detenido a pedido de otro worker")
+        self.release()
+
+    def _start_heartbeat(self):
+        if self._heartbeat is not None and self._heartbeat.is_alive():
+            return
+        self._stopped.clear()
+        self._heartbeat = threading.Thread(target=self._beat, daemon=True, name="scanner-owner")
+        self._heartbeat.start()
+
+    def _beat(self):
+        """Renueva el registro mientras el scanner local escucha"""
+        while not self._stopped.wait(self.ttl / 3):
+            scanner = self._scanner
+            if scanner is None or not scanner.is_listening:
+                self.release()
+                return
+            try:
+                self._write(scanner)
+            except Exception as e:
+                logger.error(f"❌ Error renovando el dueño del scanner: {e}")
+
+
+# Instancia global del registro de dueño
+_ownership: Optional[ScannerOwnership] = None
+_ownership_lock = threading.Lock()
+
+
+def get_scanner_ownership() -> ScannerOwnership:
+    """
+    Obtener la instancia global del registro de dueño del scanner
+
+    Returns:
+        Instancia única de ScannerOwnership
+    """
+    global _ownership
+
+    if _ownership is None:
+        with _ownership_lock:
+            if _ownership is None:
+                _ownership = ScannerOwnership()
+
+    return _ownership
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Módulo para Scanner de Código de Barras Serial / USB CDC-ACM
+============================================================
+
+Muchos lectores pueden configurarse en modo "USB COM" (CDC-ACM) o RS-232
+en lugar de emular un teclado. En ese modo el código llega como una trama
+de bytes terminada en CR/LF por un puerto serie, sin ambigüedad de tiempos
+entre teclas y sin capturar el teclado global.
+
+Funcionalidades:
+- Hilo lector dedicado por puerto
+- Tramas delimitadas por terminador configurable (CR, LF o CRLF)
+- Reconexión automática con backoff si el puerto desaparece
+- Estadísticas por puerto
+- Misma interfaz de callbacks que ``USBHIDScanner``
+"""
+
+import os
+import time
+import threading
+import queue
+import logging
+from typing import Optional, Callable, Dict
+from dotenv import load_dotenv
+
+from .scanner_config import ScannerConfig, ScannerConfigStore, get_scanner_config_store
+
+# Importar biblioteca para puertos serie
+try:
+    import serial
+    SERIAL_AVAILABLE = True
+except ImportError:
+    SERIAL_AVAILABLE = False
+
+# Cargar variables de entorno
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SERIAL_PORT = "COM3" if os.name == "nt" else "/dev/ttyACM0"
+
+
+class SerialScanner:
+    """
+    Clase para manejar lectores de código de barras en modo serie
+
+    Características:
+    - Lectura de tramas completas desde el puerto (sin heurística de velocidad)
+    - Reconexión automática al desconectar/reconectar el lector
+    - Callbacks con la misma firma que el scanner USB-HID
+    - Estadísticas de tramas, errores y reconexiones
+    """
+
+    def __init__(self, port: Optional[str] = None, baudrate: Optional[int] = None,
+                 config_store: Optional[ScannerConfigStore] = None):
+        # Configuración del puerto desde variables de entorno
+        self.port = port or os.getenv('SERIAL_SCANNER_PORT', DEFAULT_SERIAL_PORT)
+        self.baudrate = baudrate or int(os.getenv('SERIAL_SCANNER_BAUDRATE', '9600'))
+        # Parámetros de detección recargables en caliente
+        self.config_store = config_store or get_scanner_config_store()
+        self.read_timeout = float(os.getenv('SERIAL_SCANNER_TIMEOUT_S', '0.1'))
+        self.reconnect_max_delay = float(os.getenv('SERIAL_SCANNER_RECONNECT_MAX_S', '5'))
+
+        # Bytes que delimitan una trama (CR y/o LF)
+        self.terminators = b'\r\n'
+
+        # Estado interno
+        self.is_listening = False
+        self.listening_thread: Optional[threading.Thread] = None
+        self.callback_function: Optional[Callable] = None
+        self._stop_event = threading.Event()
+        self._serial = None
+        self._buffer = bytearray()
+
+        # Estadísticas del puerto
+        self.stats: Dict[str, object] = {
+            'connected': False,
+            'bytes_read': 0,
+            'frames': 0,
+            'barcodes': 0,
+            'rejected': 0,
+            'errors': 0,
+            'reconnects': 0,
+            'last_barcode': None,
+            'last_scan_at': None,
+            'last_error': None,
+        }
+
+        logger.info(f"Inicializando Scanner serial en {self.port} @ {self.baudrate} baudios")
+
+        if not SERIAL_AVAILABLE:
+            logger.error("❌ Biblioteca 'pyserial' no disponible")
+
+    @property
+    def config(self) -> ScannerConfig:
+        """Configuración activa (se relee en cada trama)"""
+        return self.config_store.current
+
+    @property
+    def min_barcode_length(self) -> int:
+        return self.config.min_barcode_length
+
+    @property
+    def max_barcode_length(self) -> int:
+        return self.config.max_barcode_length
+
+    def _open_port(self) -> bool:
+        """
+        Abre el puerto serie configurado
+
+        Returns:
+            True si el puerto quedó abierto
+        """
+        try:
+            self._serial = serial.Serial(
+                self.port,
+                self.baudrate,
+                timeout=self.read_timeout
+            )
+            self._buffer.clear()
+            self.stats['connected'] = True
+            logger.info(f"✅ Puerto serie {self.port} abierto")
+            return True
+        except (serial.SerialException, OSError) as e:
+            self.stats['connected'] = False
+            self.stats['last_error'] = str(e)
+            logger.debug(f"No se pudo abrir {self.port}: {e}")
+            return False
+
+    def _close_port(self):
+        """Cierra el puerto serie si está abierto"""
+        if self._serial is not None:
+            try:
+                self._serial.close()
+            except Exception:
+                pass
+        self._serial = None
+        self.stats['connected'] = False
+
+    def _reader_loop(self):
+        """
+        Bucle del hilo lector: abre el puerto, lee tramas y reconecta
+        """
+        delay = 0.25
+        first_attempt = True
+
+        while not self._stop_event.is_set():
+            if self._serial is None:
+                if not first_attempt:
+                    self.stats['reconnects'] += 1
+                first_attempt = False
+
+                if not self._open_port():
+                    # Backoff exponencial hasta el máximo configurado
+                    self._stop_event.wait(delay)
+                    delay = min(delay * 2, self.reconnect_max_delay)
+                    continue
+                delay = 0.25
+
+            try:
+                data = self._serial.read(self._serial.in_waiting or 1)
+            except (serial.SerialException, OSError) as e:
+                self.stats['errors'] += 1
+                self.stats['last_error'] = str(e)
+                logger.warning(f"⚠️ Puerto {self.port} desconectado: {e}")
+                self._close_port()
+                continue
+
+            if data:
+                self.stats['bytes_read'] += len(data)
+                self._feed(data)
+
+        self._close_port()
+
+    def _feed(self, data: bytes):
+        """
+        Acumula bytes y procesa cada trama completa
+
+        Args:
+            data: Bytes recibidos del puerto
+        """
+        self._buffer.extend(data)
+
+        while True:
+            # Buscar el primer terminador en el buffer
+            positions = [self._buffer.find(t) for t in self.terminators]
+            positions = [p for p in positions if p >= 0]
+            if not positions:
+                break
+
+            end = min(positions)
+            frame = bytes(self._buffer[:end])
+            del self._buffer[:end + 1]
+
+            if frame:
+                self._process_frame(frame)
+
+        # Descartar basura si no llega terminador
+        if len(self._buffer) > self.max_barcode_length * 4:
+            self.stats['rejected'] += 1
+            self._buffer.clear()
+
+    def _process_frame(self, frame: bytes):
+        """
+        Valida una trama y ejecuta el callback
+
+        Args:
+            frame: Trama sin terminador
+        """
+        self.stats['frames'] += 1
+
+        config = self.config
+        barcode = frame.decode('ascii', errors='ignore').strip()
+
+        if not (config.min_barcode_length <= len(barcode) <= config.max_barcode_length):
+            self.stats['rejected'] += 1
+            logger.debug(f"Trama con longitud inválida ignorada: '{barcode}'")
+            return
+
+        self.stats['barcodes'] += 1
+        self.stats['last_barcode'] = barcode
+        self.stats['last_scan_at'] = time.time()
+        logger.info(f"📷 Código de barras serial detectado: '{barcode}'")
+
+        if self.callback_function:
+            try:
+                self.callback_function(barcode)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"❌ Error en callback del scanner serial: {e}")
+
+    def set_barcode_callback(self, callback_function: Callable):
+        """
+        Establece la función que se llamará cuando se escanee un código de barras
+
+        Args:
+            callback_function: Función que recibe el código escaneado como parámetro
+        """
+        self.callback_function = callback_function
+        logger.info("✅ Función callback configurada para scanner serial")
+
+    def start_listening(self) -> bool:
+        """
+        Inicia el hilo lector del puerto serie
+
+        El puerto no necesita estar presente: el hilo reintenta la conexión
+        hasta que el lector se conecte.
+
+        Returns:
+            True si se inició correctamente, False en caso contrario
+        """
+        if not SERIAL_AVAILABLE:
+            logger.error("❌ No se puede iniciar: biblioteca 'pyserial' no disponible")
+            return False
+
+        if self.is_listening:
+            logger.warning("⚠️ El scanner serial ya está escuchando")
+            return True
+
+        self._stop_event.clear()
+        self.listening_thread = threading.Thread(
+            target=self._reader_loop,
+            name=f"serial-scanner-{self.port}",
+            daemon=True
+        )
+        self.listening_thread.start()
+        self.is_listening = True
+        logger.info(f"🎧 Escucha del scanner serial iniciada en {self.port}")
+        return True
+
+    def stop_listening(self):
+        """
+        Detiene el hilo lector y cierra el puerto
+        """
+        if not self.is_listening:
+            return
+
+        self._stop_event.set()
+        if self.listening_thread is not None:
+            self.listening_thread.join(timeout=2)
+        self.listening_thread = None
+        self.is_listening = False
+        self._buffer.clear()
+        logger.info("✅ Escucha del scanner serial detenida")
+
+    def test_scanner(self, timeout_seconds: int = 30) -> Optional[str]:
+        """
+        Función de prueba para verificar que el scanner funciona
+
+        Args:
+            timeout_seconds: Tiempo máximo a esperar por un código
+
+        Returns:
+            Código escaneado o None si no se detectó ninguno
+        """
+        logger.info(f"🧪 Iniciando prueba de scanner serial (timeout: {timeout_seconds}s)...")
+
+        test_queue = queue.Queue()
+
+        original_callback = self.callback_function
+        self.set_barcode_callback(test_queue.put)
+
+        was_listening = self.is_listening
+        if not was_listening:
+            if not self.start_listening():
+                self.callback_function = original_callback
+                return None
+
+        try:
+            barcode = test_queue.get(timeout=timeout_seconds)
+            logger.info(f"✅ Código detectado en prueba: '{barcode}'")
+            return barcode
+
+        except queue.Empty:
+            logger.warning("⏰ Timeout: No se detectó ningún código de barras")
+            return None
+
+        finally:
+            self.callback_function = original_callback
+            if not was_listening:
+                self.stop_listening()
+
+    def get_status(self) -> dict:
+        """
+        Obtiene el estado actual del scanner serial
+
+        Returns:
+            Diccionario con información del estado y estadísticas del puerto
+        """
+        return {
+            'type': 'SERIAL',
+            'available': SERIAL_AVAILABLE,
+            'listening': self.is_listening,
+            'serial_library': SERIAL_AVAILABLE,
+            'port': self.port,
+            'baudrate': self.baudrate,
+            'config_version': self.config.version,
+            'min_barcode_length': self.min_barcode_length,
+            'max_barcode_length': self.max_barcode_length,
+            'buffer_length': len(self._buffer),
+            'stats': dict(self.stats)
+        }
+
+
+# Instancias globales, una por puerto
+_serial_scanner_instances: Dict[str, SerialScanner] = {}
+
+def get_serial_scanner(port: Optional[str] = None) -> SerialScanner:
+    """
+    Función para obtener la instancia global del scanner serial de un puerto
+
+    Args:
+        port: Puerto serie (por defecto SERIAL_SCANNER_PORT)
+
+    Returns:
+        Instancia única de SerialScanner para ese puerto
+    """
+    port = port or os.getenv('SERIAL_SCANNER_PORT', DEFAULT_SERIAL_PORT)
+
+    if port not in _serial_scanner_instances:
+        _serial_scanner_instances[port] = SerialScanner(port=port)
+
+    return _serial_scanner_instances[port]
+
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    """
+    Script de prueba para verificar el funcionamiento del scanner serial
+    """
+    import sys
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    scanner = SerialScanner(port=sys.argv[1] if len(sys.argv) > 1 else None)
+
+    def on_barcode_scanned(barcode):
+        print(f"\n🎯 ¡CÓDIGO ESCANEADO!: '{barcode}'")
+        print(f"📏 Longitud: {len(barcode)} caracteres")
+        print("-" * 50)
+
+    scanner.set_barcode_callback(on_barcode_scanned)
+
+    if not SERIAL_AVAILABLE:
+        print("\n❌ No se puede continuar sin la biblioteca 'pyserial'")
+        print("📦 Instala con: pip install pyserial")
+        exit(1)
+
+    print(f"\n🎧 Escuchando scanner serial en {scanner.port}...")
+    print("⏹️  Presiona Ctrl+C para salir")
+    print("-" * 50)
+
+    if scanner.start_listening():
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("\n🛑 Deteniendo scanner...")
+            scanner.stop_listening()
+            print(f"📊 Estadísticas: {scanner.get_status()['stats']}")
+            print("👋 ¡Adiós!")
@@ -19,10 +19,11 @@ import time
 import threading
 import queue
 import logging
-import os
 from typing import Optional, Callable, List
 from dotenv import load_dotenv
 
+from .scanner_config import ScannerConfig, ScannerConfigStore, get_scanner_config_store
+
 # Importar biblioteca para captura de teclado
 try:
     import keyboard
@@ -50,11 +51,9 @@ class USBHIDScanner:
     - Buffer configurable para acumular caracteres
     """
     
-    def __init__(self):
-        # Configuración desde variables de entorno (más estricta para evitar captura de teclado)
-        self.min_barcode_length = int(os.getenv('MIN_BARCODE_LENGTH', '8'))  # Mínimo 8 caracteres
-        self.max_barcode_length = int(os.getenv('MAX_BARCODE_LENGTH', '50'))
-        self.scanner_speed_threshold = float(os.getenv('SCANNER_SPEED_MS', '150'))  # Más rápido para scanners reales
+    def __init__(self, config_store: Optional[ScannerConfigStore] = None):
+        # Configuración recargable en caliente (variables de entorno + config/app_config.json)
+        self.config_store = config_store or get_scanner_config_store()
         
         # Caracteres terminadores comunes en scanners
         self.terminator_chars = [
@@ -78,13 +77,31 @@ class USBHIDScanner:
         if not KEYBOARD_AVAILABLE:
             logger.error("❌ Biblioteca 'keyboard' no disponible")
 
-    def _is_scanner_input(self, char_times: List[float]) -> bool:
+    @property
+    def config(self) -> ScannerConfig:
+        """Configuración activa (se relee en cada evento)"""
+        return self.config_store.current
+
+    @property
+    def min_barcode_length(self) -> int:
+        return self.config.min_barcode_length
+
+    @property
+    def max_barcode_length(self) -> int:
+        return self.config.max_barcode_length
+
+    @property
+    def scanner_speed_threshold(self) -> float:
+        return self.config.speed_threshold_ms
+
+    def _is_scanner_input(self, char_times: List[float], config: Optional[ScannerConfig] = None) -> bool:
         """
         Determina si la entrada viene del scanner basándose en la velocidad
         Los scanners escriben muy rápido y consistente
         
         Args:
             char_times: Lista de tiempos entre caracteres
+            config: Configuración a usar (por defecto la activa)
             
         Returns:
             True si parece entrada de scanner, False si es teclado manual
@@ -92,6 +109,8 @@ class USBHIDScanner:
         if len(char_times) < 2:
             return False
         
+        config = config or self.config
+        
         # Calcular tiempo promedio entre caracteres
         avg_time = sum(char_times) / len(char_times)
         
@@ -101,8 +120,8 @@ class USBHIDScanner:
         # Criterios para detectar scanner (ajustados para evitar teclado manual):
         # 1. Velocidad promedio rápida (< 150ms entre caracteres)
         # 2. Variación baja en la velocidad (muy consistente)
-        is_fast = avg_time < self.scanner_speed_threshold
-        is_consistent = time_variance < 80  # ms (más estricto)
+        is_fast = avg_time < config.speed_threshold_ms
+        is_consistent = time_variance < config.consistency_threshold_ms
         
         logger.debug(f"Análisis de entrada - Promedio: {avg_time:.1f}ms, Variación: {time_variance:.1f}ms")
         
@@ -159,21 +178,24 @@ class USBHIDScanner:
             if not self.current_barcode:
                 return
             
+            # Una sola lectura de la configuración para todo el análisis
+            config = self.config
+            
             # Verificar longitud mínima
-            if len(self.current_barcode) < self.min_barcode_length:
+            if len(self.current_barcode) < config.min_barcode_length:
                 logger.debug(f"Código muy corto ignorado: '{self.current_barcode}'")
                 self._reset_buffer()
                 return
             
             # Verificar que sea principalmente numérico (códigos de barras típicos)
             numeric_chars = sum(1 for c in self.current_barcode if c.isdigit())
-            if numeric_chars < len(self.current_barcode) * 0.7:  # Al menos 70% números
+            if numeric_chars < len(self.current_barcode) * config.min_numeric_ratio:
                 logger.debug(f"Código con pocas cifras ignorado: '{self.current_barcode}' ({numeric_chars}/{len(self.current_barcode)} números)")
                 self._reset_buffer()
                 return
             
             # Verificar si parece entrada de scanner basándose en velocidad
-            if len(self.key_times) > 1 and self._is_scanner_input(self.key_times):
+            if len(self.key_times) > 1 and self._is_scanner_input(self.key_times, config):
                 barcode = self.current_barcode.strip()
                 logger.info(f"📷 Código de barras detectado: '{barcode}'")
                 
@@ -310,13 +332,16 @@ class USBHIDScanner:
         Returns:
             Diccionario con información del estado
         """
+        config = self.config
         return {
             'type': 'USB-HID',
+            'available': KEYBOARD_AVAILABLE,
             'listening': self.is_listening,
             'keyboard_library': KEYBOARD_AVAILABLE,
-            'min_barcode_length': self.min_barcode_length,
-            'max_barcode_length': self.max_barcode_length,
-            'speed_threshold_ms': self.scanner_speed_threshold,
+            'config_version': config.version,
+            'min_barcode_length': config.min_barcode_length,
+            'max_barcode_length': config.max_barcode_length,
+            'speed_threshold_ms': config.speed_threshold_ms,
             'current_buffer': self.current_barcode,
             'buffer_length': len(self.current_barcode)
         }
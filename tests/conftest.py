@@ -0,0 +1,44 @@
+"""
+Configuración compartida de los tests
+
+La base de la aplicación se crea en un directorio temporal: los tests
+nunca escriben en ``inventario_pos_advanced.db`` del proyecto.
+``DATABASE_URL`` se lee al importar ``src.db.database``, por eso se fija
+aquí, antes de que los módulos de test importen la aplicación.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Agregar src al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+_db_dir = tempfile.mkdtemp(prefix="pos-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_db_dir) / 'pos_test.db'}"
+
+
+@pytest.fixture(scope="session")
+def client():
+    """
+    Cliente de la API con el lifespan ejecutado
+
+    El arranque aplica las migraciones, carga los datos de ejemplo (usuario
+    admin, productos) y crea los índices, igual que en producción.
+    """
+    from fastapi.testclient import TestClient
+    from src.api.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+def pytest_sessionfinish(session, exitstatus):
+    from src.db.database import engine
+
+    engine.dispose()
+    shutil.rmtree(_db_dir, ignore_errors=True)
@@ -1,34 +1,32 @@
+import json
 import pytest
 import sys
 from pathlib import Path
-from fastapi.testclient import TestClient
 
 # Agregar src al path para importar módulos
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from src.api.main import app
-from src.db.init_db import init_database
-
-client = TestClient(app)
-
 
 class TestAPI:
     """Tests básicos para la API"""
     
-    def test_health_check(self):
+    def test_health_check(self, client):
         """Test del endpoint de health check"""
         response = client.get("/health")
         assert response.status_code == 200
         data = response.json()
         assert data["status"] == "healthy"
         assert "version" in data
+        assert data["sqlite"]["journal_mode"] == "wal"
+        assert data["sqlite"]["synchronous"] == "NORMAL"
+        assert data["sqlite"]["temp_store"] == "MEMORY"
     
-    def test_root_redirect(self):
+    def test_root_redirect(self, client):
         """Test de redirección a docs"""
         response = client.get("/", follow_redirects=False)
         assert response.status_code == 307  # Redirect
     
-    def test_api_info(self):
+    def test_api_info(self, client):
         """Test del endpoint de información de la API"""
         response = client.get("/api/v1")
         assert response.status_code == 200
@@ -41,14 +39,34 @@ class TestAPI:
 class TestProductos:
     """Tests para endpoints de productos"""
     
-    def test_get_productos(self):
+    def test_get_productos(self, client):
         """Test para obtener lista de productos"""
         response = client.get("/api/v1/productos/")
         assert response.status_code == 200
         data = response.json()
         assert isinstance(data, list)
     
-    def test_get_producto_existing(self):
+    def test_resumen_categorias(self, client):
+        """El índice de categorías se mantiene al crear y mover productos"""
+        token = client.post("/api/v1/auth/login", data={"username": "admin", "password": "admin123"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        
+        def contar(categoria):
+            arbol = client.get(f"/api/v1/productos/categorias/resumen?categoria={categoria}").json()["categorias"]
+            return arbol[0]["productos"] if arbol else 0
+        
+        client.post("/api/v1/productos/", json={"codigo_barra": "9900000000200", "nombre": "Indice", "precio": 1.0, "categoria": "IndiceA"}, headers=headers)
+        assert contar("IndiceA") == 1
+        assert "IndiceA" in client.get("/api/v1/productos/categorias/").json()
+        
+        client.put("/api/v1/productos/9900000000200", json={"categoria": "IndiceB"}, headers=headers)
+        assert contar("IndiceA") == 0
+        assert contar("IndiceB") == 1
+        
+        client.delete("/api/v1/productos/9900000000200", headers=headers)
+        assert "IndiceB" not in client.get("/api/v1/productos/categorias/").json()
+    
+    def test_get_producto_existing(self, client):
         """Test para obtener un producto existente"""
         # Primero obtener la lista para usar un código real
         response = client.get("/api/v1/productos/")
@@ -61,14 +79,128 @@ class TestProductos:
             data = response.json()
             assert data["codigo_barra"] == codigo_barra
     
-    def test_get_producto_not_found(self):
+    def test_get_producto_not_found(self, client):
         """Test para producto no encontrado"""
         response = client.get("/api/v1/productos/999999999999")
         assert response.status_code == 404
         data = response.json()
         assert "error" in data["detail"]
     
-    def test_get_categorias(self):
+    def test_get_productos_keyset(self, client):
+        """Paginación por cursor recorre el catálogo sin repetir productos"""
+        response = client.get("/api/v1/productos/?limit=3")
+        assert response.status_code == 200
+        first_page = [p["codigo_barra"] for p in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        
+        if cursor:
+            assert cursor == first_page[-1]
+            response = client.get(f"/api/v1/productos/?limit=3&after={cursor}")
+            second_page = [p["codigo_barra"] for p in response.json()]
+            assert second_page and min(second_page) > cursor
+            assert not set(first_page) & set(second_page)
+        
+        # El límite conserva su comportamiento anterior (sin tope)
+        response = client.get("/api/v1/productos/?limit=5000")
+        assert response.status_code == 200
+        assert "X-Next-Cursor" not in response.headers
+    
+    def test_export_productos_ndjson(self, client):
+        """La exportación NDJSON devuelve un producto por línea"""
+        response = client.get("/api/v1/productos/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        total = len(client.get("/api/v1/productos/?limit=1000").json())
+        assert len(lines) == total
+        assert all("codigo_barra" in line and "precio" in line for line in lines)
+    
+    def test_search_productos(self, client):
+        """Búsqueda por prefijo y difusa con errores de tipeo"""
+        response = client.get("/api/v1/productos/search?q=coc")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["mode"] == "prefix"
+        assert data["resultados"][0]["nombre"] == "Coca Cola 600ml"
+        
+        response = client.get("/api/v1/productos/search?q=frijoels")
+        data = response.json()
+        assert data["mode"] in ("fuzzy", "like")
+        if data["mode"] == "fuzzy":
+            assert data["resultados"][0]["codigo_barra"] == "7501000674123"
+    
+    def test_bulk_import_productos(self, client):
+        """Importación masiva CSV: upsert por lotes y reporte de filas inválidas"""
+        token = client.post("/api/v1/auth/login", data={"username": "admin", "password": "admin123"}).json()["access_token"]
+        csv_data = (
+            "codigo_barra,nombre,precio,stock,categoria,proveedor\n"
+            "9900000000001,Bulk Uno,10.5,3,Bulk,Acme\n"
+            "9900000000002,Bulk Dos,-1,3,Bulk,Acme\n"
+            "9900000000003,Bulk Tres,7,,Bulk,\n"
+            "9900000000001,Bulk Uno Editado,11,4,Bulk,Acme\n"
+        )
+        response = client.post(
+            "/api/v1/productos/bulk?chunk_size=2",
+            files={"file": ("productos.csv", csv_data, "text/csv")},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 200
+        report = response.json()
+        assert report["processed"] == 4
+        assert report["upserted"] == 3
+        assert report["error_count"] == 1
+        assert report["errors"][0]["row"] == 3
+        assert report["ignored_columns"] == ["proveedor"]
+        
+        producto = client.get("/api/v1/productos/9900000000001").json()
+        assert producto["nombre"] == "Bulk Uno Editado"
+        assert producto["stock"] == 4
+    
+    def test_productos_changes(self, client):
+        """Sincronización incremental: altas, modificaciones y bajas desde una secuencia"""
+        token = client.post("/api/v1/auth/login", data={"username": "admin", "password": "admin123"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        
+        response = client.get("/api/v1/productos/changes?since=0&limit=5000")
+        assert response.status_code == 200
+        full = response.json()
+        assert len(full["upserts"]) > 0
+        since = full["next_since"]
+        
+        client.post("/api/v1/productos/", json={"codigo_barra": "9900000000100", "nombre": "Delta", "precio": 1.0}, headers=headers)
+        client.put("/api/v1/productos/7501000674123", json={"stock": 77}, headers=headers)
+        client.delete("/api/v1/productos/9900000000100", headers=headers)
+        
+        delta = client.get(f"/api/v1/productos/changes?since={since}").json()
+        assert [p["codigo_barra"] for p in delta["upserts"]] == ["7501000674123"]
+        assert delta["upserts"][0]["stock"] == 77
+        assert delta["deletes"] == ["9900000000100"]
+        assert delta["next_since"] == delta["last_seq"]
+        
+        empty = client.get(f"/api/v1/productos/changes?since={delta['next_since']}").json()
+        assert empty["upserts"] == [] and empty["deletes"] == []
+    
+    def test_productos_etag(self, client):
+        """GET condicional: 304 mientras el catálogo no cambia"""
+        response = client.get("/api/v1/productos/?limit=5")
+        etag = response.headers["ETag"]
+        assert response.headers["Cache-Control"] == "no-cache"
+        
+        response = client.get("/api/v1/productos/?limit=5", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        
+        # Otra página tiene su propia etiqueta
+        other = client.get("/api/v1/productos/?limit=6", headers={"If-None-Match": etag})
+        assert other.status_code == 200
+        
+        token = client.post("/api/v1/auth/login", data={"username": "admin", "password": "admin123"}).json()["access_token"]
+        client.put("/api/v1/productos/7501000674123", json={"stock": 50}, headers={"Authorization": f"Bearer {token}"})
+        
+        response = client.get("/api/v1/productos/?limit=5", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+    
+    def test_get_categorias(self, client):
         """Test para obtener categorías"""
         response = client.get("/api/v1/productos/categorias/")
         assert response.status_code == 200
@@ -79,7 +211,7 @@ class TestProductos:
 class TestAuth:
     """Tests para autenticación"""
     
-    def test_login_success(self):
+    def test_login_success(self, client):
         """Test de login exitoso con credenciales por defecto"""
         login_data = {
             "username": "admin",
@@ -91,7 +223,7 @@ class TestAuth:
         assert "access_token" in data
         assert data["token_type"] == "bearer"
     
-    def test_login_invalid(self):
+    def test_login_invalid(self, client):
         """Test de login con credenciales inválidas"""
         login_data = {
             "username": "invalid",
@@ -102,7 +234,7 @@ class TestAuth:
         data = response.json()
         assert "error" in data["detail"]
     
-    def test_protected_endpoint_without_token(self):
+    def test_protected_endpoint_without_token(self, client):
         """Test de endpoint protegido sin token"""
         product_data = {
             "codigo_barra": "1234567890123",
@@ -117,7 +249,7 @@ class TestAuth:
 class TestScanner:
     """Tests para funcionalidad de escáner"""
     
-    def test_camera_status(self):
+    def test_camera_status(self, client):
         """Test para verificar estado de cámara"""
         response = client.get("/api/v1/scan/camera/status")
         assert response.status_code == 200
@@ -126,12 +258,12 @@ class TestScanner:
         assert "camera_index" in data
         assert "message" in data
     
-    def test_scan_image_without_file(self):
+    def test_scan_image_without_file(self, client):
         """Test de escaneo sin archivo"""
         response = client.post("/api/v1/scan/image")
         assert response.status_code == 422  # Validation error
     
-    def test_camera_stop(self):
+    def test_camera_stop(self, client):
         """Test para detener cámara"""
         response = client.post("/api/v1/scan/camera/stop")
         assert response.status_code == 200
@@ -139,6 +271,40 @@ class TestScanner:
         assert "message" in data
 
 
+class TestUSBScanner:
+    """Tests para el historial del scanner USB-HID"""
+    
+    def test_recent_scans_incremental(self, client):
+        """Los escaneos recientes traen el producto y soportan since_id"""
+        from src.db.database import SessionLocal
+        from src.db.models import EscaneoHistorial
+        
+        response = client.get("/api/v1/usb-scanner/recent-scans?limit=1")
+        assert response.status_code == 200
+        cursor = response.json()["last_id"] or 0
+        
+        db = SessionLocal()
+        try:
+            db.add_all([
+                EscaneoHistorial(codigo_barra="7501000673209", tipo_codigo="USB-HID", encontrado=1),
+                EscaneoHistorial(codigo_barra="000000000000", tipo_codigo="USB-HID", encontrado=0),
+            ])
+            db.commit()
+        finally:
+            db.close()
+        
+        response = client.get(f"/api/v1/usb-scanner/recent-scans?since_id={cursor}")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 2
+        assert data["last_id"] == data["escaneos"][-1]["id"]
+        assert data["escaneos"][0]["producto"]["nombre"] == "Coca Cola 600ml"
+        assert data["escaneos"][1]["producto"] is None
+        
+        response = client.get(f"/api/v1/usb-scanner/recent-scans?since_id={data['last_id']}")
+        assert response.json()["total"] == 0
+
+
 if __name__ == "__main__":
     # Ejecutar tests con pytest
     pytest.main([__file__, "-v"])
\ No newline at end of file
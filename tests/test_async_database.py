@@ -0,0 +1,144 @@
+import asyncio
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Agregar src al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.db import models_advanced
+from src.db.async_database import ThreadedSession, to_async_url
+from src.db.async_repositories import AsyncProductoRepository, AsyncSaleRepository, AsyncScanRepository
+from src.db.database import Base
+from src.db.models import EscaneoHistorial
+
+
+def _seed(db):
+    cashier = models_advanced.User(username="cajero1", email="c1@pos.local", password_hash="x", full_name="Cajero Uno")
+    producto = models_advanced.Producto(codigo_barra="7501", nombre="Agua", precio=Decimal("8.00"), stock=10)
+    sale = models_advanced.Sale(
+        sale_number="POS-0001", cashier=cashier, subtotal=Decimal("16.00"), total_amount=Decimal("16.00"),
+        payment_method=models_advanced.PaymentMethod.CASH, status=models_advanced.SaleStatus.COMPLETED,
+    )
+    sale.items.append(models_advanced.SaleItem(producto=producto, quantity=2, unit_price=Decimal("8.00"),
+                                               line_total=Decimal("16.00")))
+    sale.payments.append(models_advanced.Payment(method=models_advanced.PaymentMethod.CASH, amount=Decimal("16.00")))
+    db.add(sale)
+    db.add(EscaneoHistorial(codigo_barra="7501", tipo_codigo="USB-HID", encontrado=1))
+    db.commit()
+    return sale.id
+
+
+async def _exercise(db, sale_id):
+    """Mismo código de ruta para AsyncSession y ThreadedSession"""
+    producto = await AsyncProductoRepository(db).lookup("7501")
+    sales = await AsyncSaleRepository(db).list(limit=10)
+    detail = await AsyncSaleRepository(db).get_detail(sale_id)
+    db.add(EscaneoHistorial(codigo_barra="999", tipo_codigo="SERIAL", encontrado=0))
+    await db.commit()
+    recent = await AsyncScanRepository(db).recent(("USB-HID", "SERIAL"), limit=5)
+    return {
+        "precio": producto.precio,
+        "items_count": sales[0][1],
+        "detail": [item.producto.nombre for item in detail.items] + [p.method.value for p in detail.payments],
+        "recent": [(escaneo.codigo_barra, producto.nombre if producto else None) for escaneo, producto in recent],
+    }
+
+
+EXPECTED = {
+    "precio": Decimal("8.00"),
+    "items_count": 1,
+    "detail": ["Agua", "cash"],
+    "recent": [("999", None), ("7501", "Agua")],
+}
+
+
+def test_async_urls():
+    assert to_async_url("sqlite:///./pos.db") == "sqlite+aiosqlite:///./pos.db"
+    assert to_async_url("postgresql+psycopg2://pos@db/pos") == "postgresql+asyncpg://pos@db/pos"
+    with pytest.raises(ValueError):
+        to_async_url("mysql://pos@db/pos")
+
+
+def test_repositories_over_threaded_session():
+    """DB_ASYNC=false: la sesión síncrona corre en el threadpool"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    sale_id = _seed(db)
+
+    assert asyncio.run(_exercise(ThreadedSession(db), sale_id)) == EXPECTED
+    db.close()
+
+
+def test_repositories_over_async_engine(tmp_path):
+    """DB_ASYNC=true: AsyncSession sobre aiosqlite"""
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        sale_id = _seed(db)
+    engine.dispose()
+
+    async def run():
+        async_engine = create_async_engine(to_async_url(url))
+        try:
+            async with async_sessionmaker(async_engine, expire_on_commit=False)() as session:
+                return await _exercise(session, sale_id)
+        finally:
+            await async_engine.dispose()
+
+    assert asyncio.run(run()) == EXPECTED
+
+
+def test_recent_scans_cursor_does_not_skip_rows():
+    """Llegan más escaneos que ``limit`` entre dos consultas: el cursor los recorre todos"""
+    from src.api.routes.usb_scanner import get_recent_scans
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    _seed(db)
+
+    first = asyncio.run(get_recent_scans(db=ThreadedSession(db), limit=3))
+    db.add_all(EscaneoHistorial(codigo_barra=f"75{i:02d}", tipo_codigo="SERIAL", encontrado=0) for i in range(7))
+    db.commit()
+
+    seen, since_id = [], first["last_id"]
+    while True:
+        page = asyncio.run(get_recent_scans(db=ThreadedSession(db), limit=3, since_id=since_id))
+        if not page["escaneos"]:
+            break
+        seen += [escaneo["codigo_barra"] for escaneo in page["escaneos"]]
+        since_id = page["last_id"]
+
+    assert seen == [f"75{i:02d}" for i in range(7)]
+    assert since_id == page["last_id"] == first["last_id"] + 7
+    db.close()
+
+
+def test_api_switch_to_async_engine(monkeypatch):
+    """Con DB_ASYNC=true la ruta de producto usa el AsyncEngine global"""
+    pytest.importorskip("aiosqlite")
+    from fastapi.testclient import TestClient
+
+    from src.api.main import app
+    from src.db import async_database
+
+    monkeypatch.setenv("DB_ASYNC", "true")
+    with TestClient(app) as client:
+        response = client.get("/api/v1/productos/7501000673209")
+        assert async_database._async_engine is not None
+
+    assert response.status_code == 200
+    assert response.json()["nombre"] == "Coca Cola 600ml"
+    # El cierre de la aplicación libera el engine asíncrono
+    assert async_database._async_engine is None
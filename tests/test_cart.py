@@ -0,0 +1,123 @@
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Agregar src al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.cart import CartManager, ProductNotFoundError
+from src.db.models_advanced import Base, Producto, User, Sale, SaleItem, PaymentMethod
+
+
+@pytest.fixture
+def db_session():
+    """Base de datos avanzada en memoria con un cajero y un producto"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+    db.add(User(username="cajero1", email="c1@pos.local", password_hash="x", full_name="Cajero Uno"))
+    db.add(Producto(codigo_barra="7501000673209", nombre="Coca Cola 600ml", precio=Decimal("18.50"), stock=10))
+    db.commit()
+    yield db
+    db.close()
+
+
+def make_resolver(db):
+    calls = []
+    
+    def resolver(codigo_barra):
+        calls.append(codigo_barra)
+        producto = db.query(Producto).filter_by(codigo_barra=codigo_barra).first()
+        if producto is None:
+            return None
+        return {
+            "id": producto.id,
+            "codigo_barra": producto.codigo_barra,
+            "nombre": producto.nombre,
+            "precio": producto.precio,
+            "tax_rate": producto.tax_rate,
+            "is_taxable": producto.is_taxable,
+        }
+    
+    return resolver, calls
+
+
+class TestCartManager:
+    """Tests para los carritos en memoria por carril"""
+    
+    def test_repeated_scans_increment_without_lookup(self, db_session):
+        """Escanear el mismo código solo consulta el producto una vez"""
+        resolver, calls = make_resolver(db_session)
+        manager = CartManager(product_resolver=resolver)
+        
+        for _ in range(3):
+            cart = manager.scan("lane-1", "7501000673209")
+        
+        assert calls == ["7501000673209"]
+        assert cart["items_count"] == 3
+        assert cart["total"] == pytest.approx(55.5)
+        assert manager.get_events("lane-1").last_id == 3
+    
+    def test_unknown_code(self, db_session):
+        """Un código desconocido no altera el carrito"""
+        resolver, _ = make_resolver(db_session)
+        manager = CartManager(product_resolver=resolver)
+        
+        with pytest.raises(ProductNotFoundError):
+            manager.scan("lane-1", "000")
+        assert manager.get_cart("lane-1").items_count == 0
+    
+    def test_checkout_persists_sale_once(self, db_session):
+        """El cobro persiste el carrito como una venta y descuenta lo cobrado"""
+        from src.api.routes.sales import process_sale, CreateSaleRequest, SaleItemRequest, PaymentRequest
+        
+        resolver, _ = make_resolver(db_session)
+        manager = CartManager(product_resolver=resolver)
+        manager.scan("lane-1", "7501000673209", quantity=2)
+        cart = manager.get_cart("lane-1").to_dict()
+        
+        result = process_sale(CreateSaleRequest(
+            cashier_username="cajero1",
+            items=[
+                SaleItemRequest(codigo_barra=line["codigo_barra"], quantity=line["quantity"])
+                for line in cart["lines"]
+            ],
+            payments=[PaymentRequest(method=PaymentMethod.CASH, amount=Decimal("37.00"))]
+        ), db_session)
+        manager.consume("lane-1", {line["codigo_barra"]: line["quantity"] for line in cart["lines"]})
+        
+        assert result["status"] == "success"
+        assert db_session.query(Sale).count() == 1
+        assert db_session.query(SaleItem).one().quantity == 2
+        assert db_session.query(Producto).one().stock == 8
+        assert manager.get_cart("lane-1").items_count == 0
+
+
+def test_lane_id_is_validated():
+    """Un carril que no cabe en las columnas de carril se rechaza con 422"""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from src.api.routes import cart
+
+    app = FastAPI()
+    app.include_router(cart.router)
+    client = TestClient(app)
+
+    assert client.get("/cart/lane-1").status_code == 200
+    assert client.get(f"/cart/{'x' * 21}").status_code == 422
+    assert client.get("/cart/lane 1").status_code == 422
+    assert client.post(f"/cart/{'x' * 21}/checkout", json={"cashier_username": "cajero1", "payments": []}).status_code == 422
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,118 @@
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+
+# Agregar src al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.db import category_index, change_log, search_index
+from src.db.ddl_versions import VERSIONS_TABLE
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Base con una tabla de productos mínima (sin marca ni descripción)"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'indices.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE productos (id INTEGER PRIMARY KEY, codigo_barra VARCHAR, nombre VARCHAR, categoria VARCHAR)"
+        ))
+        conn.execute(text("INSERT INTO productos (codigo_barra, nombre, categoria) VALUES ('7501', 'Leche entera', 'Lácteos')"))
+    yield engine
+    engine.dispose()
+
+
+def _reload(module, engine):
+    """Simula un reinicio: sin la caché por engine del proceso anterior"""
+    module._ready.clear()
+    return engine
+
+
+def _matches(engine, table, query):
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT rowid FROM {table} WHERE {table} MATCH :q"), {"q": query}).all()
+
+
+def test_search_index_recreated_when_definition_changes(engine):
+    info = search_index.ensure_search_index(_reload(search_index, engine))
+    assert info.columns == ("nombre", "categoria")
+    with engine.connect() as conn:
+        hashes = dict(conn.execute(text(f"SELECT name, hash FROM {VERSIONS_TABLE}")).all())
+    assert set(hashes) == {search_index.FTS_TABLE, search_index.TRIGRAM_TABLE}
+
+    # Mismo esquema: no se toca nada al reiniciar
+    search_index.ensure_search_index(_reload(search_index, engine))
+    with engine.connect() as conn:
+        assert dict(conn.execute(text(f"SELECT name, hash FROM {VERSIONS_TABLE}")).all()) == hashes
+
+    # Nueva columna indexable: índice y triggers se recrean con ella
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE productos ADD COLUMN marca VARCHAR"))
+        conn.execute(text("UPDATE productos SET marca = 'Lala'"))
+    info = search_index.ensure_search_index(_reload(search_index, engine))
+    assert info.columns == ("nombre", "marca", "categoria")
+    assert _matches(engine, search_index.FTS_TABLE, "lala") == [(1,)]
+
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE productos SET marca = 'Alpura'"))
+    assert _matches(engine, search_index.FTS_TABLE, "alpura") == [(1,)]
+    assert _matches(engine, search_index.FTS_TABLE, "lala") == []
+    search_index._ready.clear()
+
+
+def test_category_index_recreated_when_levels_change(engine):
+    assert category_index.ensure_category_index(_reload(category_index, engine)) == ("categoria",)
+
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE productos ADD COLUMN marca VARCHAR"))
+        conn.execute(text("UPDATE productos SET marca = 'Lala'"))
+        conn.execute(text("INSERT INTO productos (codigo_barra, nombre, categoria, marca) VALUES ('7502', 'Yogurt', 'Lácteos', 'Lala')"))
+
+    columns = category_index.ensure_category_index(_reload(category_index, engine))
+    assert columns == ("categoria", "marca")
+    with engine.connect() as conn:
+        assert conn.execute(text(f"SELECT categoria, marca, productos FROM {category_index.CATEGORY_TABLE}")).all() == [
+            ("Lácteos", "Lala", 2)
+        ]
+
+    # Los triggers nuevos mantienen el nivel agregado
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE productos SET marca = 'Alpura' WHERE codigo_barra = '7502'"))
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"SELECT marca, productos FROM {category_index.CATEGORY_TABLE} ORDER BY marca")).all()
+    assert rows == [("Alpura", 1), ("Lala", 1)]
+    category_index._ready.clear()
+
+
+def test_change_log_recreated_without_rewinding_cursors(engine):
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO productos (codigo_barra, nombre, categoria) VALUES ('7502', 'Yogurt', 'Lácteos')"))
+    assert change_log.ensure_change_log(_reload(change_log, engine))
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM productos WHERE codigo_barra = '7502'"))
+        # Base creada por una versión anterior: trigger distinto y sin hash guardado
+        conn.execute(text(f"DROP TRIGGER {change_log.CHANGES_TABLE}_au_codigo"))
+        conn.execute(text(f"DELETE FROM {VERSIONS_TABLE} WHERE name = :name"), {"name": change_log.CHANGES_TABLE})
+    with engine.connect() as conn:
+        cursor = conn.execute(text(f"SELECT MAX(seq) FROM {change_log.CHANGES_TABLE}")).scalar()
+    assert cursor == 3
+
+    assert change_log.ensure_change_log(_reload(change_log, engine))
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            f"SELECT seq, codigo_barra, operation FROM {change_log.CHANGES_TABLE} ORDER BY seq"
+        )).all()
+    # La baja se conserva y el catálogo se vuelve a publicar después del cursor del cliente
+    assert rows == [(3, "7502", change_log.OP_DELETE), (4, "7501", change_log.OP_UPSERT)]
+
+    # El trigger recreado vuelve a registrar el código anterior como baja
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE productos SET codigo_barra = '7503' WHERE codigo_barra = '7501'"))
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            f"SELECT codigo_barra, operation FROM {change_log.CHANGES_TABLE} WHERE seq > 4 ORDER BY seq"
+        )).all()
+    assert rows == [("7501", change_log.OP_DELETE), ("7503", change_log.OP_UPSERT)]
+    change_log._ready.clear()
@@ -0,0 +1,44 @@
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+# Agregar src al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.db.database import create_db_engine
+from src.db.pool_metrics import MeteredQueuePool, get_pool_metrics, pool_options
+
+
+def test_pool_options_from_env(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "3")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+    options = pool_options("postgresql://pos@db/pos")
+    assert options["pool_size"] == 3
+    assert options["pool_pre_ping"] is False
+    assert pool_options("sqlite://") == {}
+
+
+def test_pool_metrics_and_wait_timeout(tmp_path, monkeypatch):
+    """Conexiones en uso y timeouts de espera se reflejan en las métricas"""
+    monkeypatch.setenv("DB_POOL_SIZE", "1")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "0")
+    monkeypatch.setenv("DB_POOL_TIMEOUT", "0.05")
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'pool.db'}")
+    assert isinstance(engine.pool, MeteredQueuePool)
+
+    conn = engine.connect()
+    conn.execute(text("SELECT 1"))
+    metrics = get_pool_metrics(engine)
+    assert metrics["checked_out"] == 1
+    assert metrics["wait"]["checkouts"] == 1
+
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    assert get_pool_metrics(engine)["wait"]["timeouts"] == 1
+
+    conn.close()
+    assert get_pool_metrics(engine)["checked_out"] == 0
+    engine.dispose()
@@ -0,0 +1,71 @@
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+
+# Agregar src al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.db import models, models_advanced  # noqa: F401  (registran los modelos)
+from src.db.database import Base
+from src.db.query_advisor import QueryAdvisor, explain, full_scans, representative_queries
+
+
+def test_full_scan_detection():
+    assert full_scans(["SCAN sales"]) == ["sales"]
+    assert full_scans(["SCAN sales USING INDEX ix_sales_status_created_at"]) == []
+    assert full_scans(["SEARCH sales USING INDEX ix_sales_id (id=?)"]) == []
+    assert full_scans(["SCAN productos_fts VIRTUAL TABLE INDEX 0:M1"]) == []
+    assert full_scans(["Seq Scan on sales  (cost=0.00..1.00 rows=1 width=4)"]) == ["sales"]
+
+
+def test_advisor_flags_full_scans():
+    """Las consultas capturadas guardan su plan y los recorridos completos"""
+    engine = create_engine("sqlite://")
+    advisor = QueryAdvisor(slow_ms=0)
+    advisor.install(engine)
+
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE t (a INTEGER, b INTEGER)"))
+        conn.execute(text("CREATE INDEX ix_t_a ON t (a)"))
+        conn.execute(text("SELECT * FROM t WHERE b = 1"))
+        conn.execute(text("SELECT * FROM t WHERE a = 1"))
+        conn.execute(text("SELECT * FROM t WHERE b = 1"))
+
+    report = {entry["statement"]: entry for entry in advisor.report()}
+    assert report["SELECT * FROM t WHERE b = 1"]["full_scans"] == ["t"]
+    assert report["SELECT * FROM t WHERE b = 1"]["count"] == 2
+    assert report["SELECT * FROM t WHERE a = 1"]["full_scans"] == []
+
+
+def test_report_queries_use_indexes():
+    """Las consultas de reportes del esquema actual no recorren tablas completas"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+
+    with engine.connect() as conn:
+        for name, stmt in representative_queries().items():
+            sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+            assert full_scans(explain(conn, sql)) == [], name
+
+
+def test_migrations_match_models(tmp_path):
+    """Aplicar todas las revisiones deja el esquema igual a los modelos"""
+    pytest.importorskip("alembic")
+    from alembic.autogenerate import compare_metadata
+    from alembic.migration import MigrationContext
+
+    from src.db.data_version import VERSIONS_TABLE
+    from src.db.schema_migrations import ensure_schema
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    ensure_schema(engine)
+
+    # La tabla de versiones la mantienen triggers, no tiene modelo
+    def include_object(obj, name, type_, reflected, compare_to):
+        return not (type_ == "table" and name == VERSIONS_TABLE)
+
+    with engine.connect() as conn:
+        context = MigrationContext.configure(conn, opts={"include_object": include_object})
+        assert compare_metadata(context, Base.metadata) == []
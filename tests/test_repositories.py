@@ -0,0 +1,180 @@
+import sys
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Agregar src al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.db import models, models_advanced
+from src.db.database import Base
+from src.api.schemas import EscaneoResponse
+from src.db import lookup_benchmark
+from src.db.repositories import ProductoLookup, ProductoRepository, SaleRepository, UserRepository
+
+
+@pytest.fixture
+def db_session():
+    """Esquema unificado en memoria con algunos productos"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+    repo = ProductoRepository(db)
+    for i in range(5):
+        repo.add(codigo_barra=f"75000000000{i}", nombre=f"Producto {i}", precio=Decimal("10.00"),
+                 categoria="Bebidas" if i % 2 else "Granos", is_active=i != 4)
+    db.add(models_advanced.User(username="cajero1", email="c1@pos.local", password_hash="x", full_name="Cajero Uno"))
+    db.commit()
+    yield db
+    db.close()
+
+
+def test_single_base_and_producto_model():
+    """Ambos módulos de modelos comparten Base y el mismo Producto"""
+    assert models.Producto is models_advanced.Producto
+    assert models.EscaneoHistorial.metadata is models_advanced.Sale.metadata is Base.metadata
+
+
+def test_producto_repository_queries(db_session):
+    """Listado por cursor, búsqueda múltiple y filtro de activos"""
+    repo = ProductoRepository(db_session)
+
+    first_page = repo.list(limit=2)
+    assert [p.codigo_barra for p in first_page] == ["750000000000", "750000000001"]
+    second_page = repo.list(after=first_page[-1].codigo_barra, limit=2)
+    assert [p.codigo_barra for p in second_page] == ["750000000002", "750000000003"]
+    assert {p.categoria for p in repo.list(categoria="Bebidas")} == {"Bebidas"}
+
+    found = repo.get_many(["750000000001", "750000000003", "999"])
+    assert set(found) == {"750000000001", "750000000003"}
+
+    assert repo.get("750000000004") is not None
+    assert repo.get_cart_snapshot("750000000001")["precio"] == Decimal("10.00")
+
+
+def test_producto_lookup(db_session):
+    """Búsqueda de solo lectura por columnas, válida como respuesta de escaneo"""
+    repo = ProductoRepository(db_session)
+    db_session.expunge_all()
+
+    producto = repo.lookup("750000000001")
+    assert isinstance(producto, ProductoLookup)
+    assert (producto.nombre, producto.precio, producto.categoria) == ("Producto 1", Decimal("10.00"), "Bebidas")
+    assert not db_session.identity_map  # sin instancias ORM
+    assert repo.lookup("999") is None
+    assert set(repo.lookup_many(["750000000001", "750000000004", "999"])) == {"750000000001", "750000000004"}
+
+    response = EscaneoResponse(codigo_barra="750000000001", tipo_codigo="EAN13", encontrado=True,
+                               producto=producto, timestamp=datetime.now())
+    assert response.producto.nombre == "Producto 1"
+
+
+def test_lookup_benchmark_uses_less_memory():
+    results = lookup_benchmark.run(productos=300, busquedas=20)
+    assert results["lookup"]["memory_kib"] < results["orm"]["memory_kib"]
+
+
+def test_user_repository(db_session):
+    repo = UserRepository(db_session)
+    user = repo.get_by_username("cajero1")
+    assert user is not None
+    assert repo.get(user.id) is user
+    assert repo.get_by_email("c1@pos.local") is user
+
+
+def test_sale_repository_constant_queries(db_session):
+    """Listado y detalle de ventas no hacen una consulta por fila"""
+    cashier = UserRepository(db_session).get_by_username("cajero1")
+    customer = models_advanced.Customer(customer_code="C1", name="Cliente Uno")
+    productos = ProductoRepository(db_session).list(limit=2)
+    for i in range(20):
+        sale = models_advanced.Sale(
+            sale_number=f"POS-{i:04d}", cashier=cashier, customer=customer if i % 2 else None,
+            subtotal=Decimal("20.00"), total_amount=Decimal("20.00"),
+            payment_method=models_advanced.PaymentMethod.CASH, status=models_advanced.SaleStatus.COMPLETED,
+        )
+        for producto in productos:
+            sale.items.append(models_advanced.SaleItem(
+                producto=producto, quantity=1, unit_price=Decimal("10.00"), line_total=Decimal("10.00")
+            ))
+        sale.payments.append(models_advanced.Payment(method=models_advanced.PaymentMethod.CASH, amount=Decimal("20.00")))
+        db_session.add(sale)
+    db_session.commit()
+    db_session.expunge_all()
+
+    statements = []
+    event.listen(db_session.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    repo = SaleRepository(db_session)
+    sales = repo.list(limit=100)
+    rows = [(sale.cashier.full_name, sale.customer.name if sale.customer else None, count) for sale, count in sales]
+    assert len(rows) == 20
+    assert {count for _, _, count in rows} == {2}
+    assert len(statements) == 1
+
+    statements.clear()
+    db_session.expunge_all()
+    detail = repo.get_detail(sales[0][0].id)
+    names = [item.producto.nombre for item in detail.items]
+    methods = [payment.method for payment in detail.payments]
+    assert len(names) == 2 and len(methods) == 1
+    assert detail.cashier.username == "cajero1"
+    assert len(statements) == 3
+
+
+def test_decrement_stock_is_guarded(db_session):
+    """Un solo UPDATE; las filas sin stock suficiente no se tocan"""
+    repo = ProductoRepository(db_session)
+    catalogo = repo.lookup_many(["750000000000", "750000000001"])
+    for i, producto in enumerate(catalogo.values()):
+        repo.get(producto.codigo_barra).stock = 3 + i
+    db_session.flush()
+
+    ids = {codigo: producto.id for codigo, producto in catalogo.items()}
+    updated = repo.decrement_stock({ids["750000000000"]: 2, ids["750000000001"]: 5})
+
+    assert updated == {ids["750000000000"]}
+    stocks = {codigo: p.stock for codigo, p in repo.lookup_many(ids).items()}
+    assert stocks == {"750000000000": 1, "750000000001": 4}
+
+
+def test_process_sale_queries_do_not_grow_with_lines(db_session):
+    """Una canasta de 60 líneas cuesta las mismas consultas que una de una línea"""
+    from src.api.routes.sales import CreateSaleRequest, process_sale
+
+    for producto in db_session.query(models_advanced.Producto):
+        producto.stock = 100
+    db_session.commit()
+
+    statements = []
+    event.listen(db_session.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    def sell(lines):
+        statements.clear()
+        request = CreateSaleRequest(
+            cashier_username="cajero1",
+            items=[{"codigo_barra": f"75000000000{i % 4}", "quantity": 1} for i in range(lines)],
+            payments=[{"method": "cash", "amount": "1000.00"}],
+        )
+        process_sale(request, db_session)
+        return list(statements)
+
+    single = sell(1)
+    basket = sell(60)
+
+    assert len(basket) == len(single)
+    assert len([s for s in basket if s.lstrip().startswith("SELECT") and "FROM productos" in s]) == 1
+    assert len([s for s in basket if s.lstrip().startswith("UPDATE productos")]) == 1
+    stocks = {p.codigo_barra: p.stock for p in db_session.query(models_advanced.Producto)}
+    assert stocks["750000000000"] == 100 - 1 - 15
+    assert stocks["750000000003"] == 100 - 15
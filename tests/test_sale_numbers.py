@@ -0,0 +1,115 @@
+import sys
+import threading
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# Agregar src al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.db import models  # noqa: F401  (registran los modelos)
+from src.db.database import Base
+from src.db.models_advanced import PaymentMethod, Sale, User
+from src.db.sale_numbers import SaleNumberAllocator
+
+DAY = "20261019"
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    """Base SQLite en archivo: cada hilo usa su propia conexión"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'ventas.db'}", connect_args={"timeout": 30})
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add(User(username="cajero1", email="c1@pos.local", password_hash="x", full_name="Cajero Uno"))
+        db.commit()
+    yield engine
+    engine.dispose()
+
+
+def _checkouts(engine, allocator, lanes, per_lane):
+    """Cobros concurrentes: cada hilo asigna número y guarda la venta"""
+    Session = sessionmaker(bind=engine)
+    errors = []
+
+    def worker(lane_id):
+        try:
+            for _ in range(per_lane):
+                with Session() as db:
+                    number = allocator.next_number(db, lane_id=lane_id, day=DAY)
+                    db.add(Sale(sale_number=number, cashier_id=1, subtotal=Decimal("1.00"),
+                                total_amount=Decimal("1.00"), payment_method=PaymentMethod.CASH))
+                    db.commit()
+        except Exception as e:  # pragma: no cover - se reporta abajo
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(lane,)) for lane in lanes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    with Session() as db:
+        return [number for (number,) in db.query(Sale.sale_number)]
+
+
+def test_sequential_numbers_without_like_scan(file_engine):
+    allocator = SaleNumberAllocator()
+    statements = []
+    event.listen(file_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    with sessionmaker(bind=file_engine)() as db:
+        numbers = [allocator.next_number(db, day=DAY) for _ in range(3)]
+        numbers.append(allocator.next_number(db, lane_id="3", day=DAY))
+        db.commit()
+
+    assert numbers == [f"POS-{DAY}-0001", f"POS-{DAY}-0002", f"POS-{DAY}-0003", f"POS-{DAY}-3-0001"]
+    assert len(statements) == 4
+    assert not [s for s in statements if "sales" in s]
+
+
+def test_concurrent_checkouts_never_collide(file_engine):
+    """Ocho hilos sobre la misma secuencia: números únicos y consecutivos"""
+    numbers = _checkouts(file_engine, SaleNumberAllocator(), lanes=[None] * 8, per_lane=15)
+
+    assert sorted(numbers) == [f"POS-{DAY}-{i:04d}" for i in range(1, 121)]
+
+
+def test_block_reservation_across_workers(file_engine):
+    """Dos procesos con bloques propios nunca reparten el mismo número"""
+    worker_a, worker_b = SaleNumberAllocator(block_size=10), SaleNumberAllocator(block_size=10)
+    statements = []
+    event.listen(file_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    _checkouts(file_engine, worker_a, lanes=["1", "2"], per_lane=12)
+    numbers = _checkouts(file_engine, worker_b, lanes=["1"], per_lane=5)
+
+    assert len(numbers) == len(set(numbers)) == 12 * 2 + 5
+    # Una reserva por bloque: 2 por carril en el primer proceso, 1 en el segundo
+    assert len([s for s in statements if "sale_sequences" in s]) == 5
+    assert f"POS-{DAY}-1-0021" in numbers
+
+
+def test_migration_continues_existing_numbering(tmp_path):
+    """La revisión 0004 arranca la secuencia en el último número ya usado"""
+    pytest.importorskip("alembic")
+    from src.db.schema_migrations import ensure_schema
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'existente.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(User(username="cajero1", email="c1@pos.local", password_hash="x", full_name="Cajero Uno"))
+        for number in ("0001", "0007"):
+            db.add(Sale(sale_number=f"POS-{DAY}-{number}", cashier_id=1, subtotal=Decimal("1.00"),
+                        total_amount=Decimal("1.00"), payment_method=PaymentMethod.CASH))
+        db.commit()
+
+    ensure_schema(engine)
+
+    with Session() as db:
+        assert SaleNumberAllocator().next_number(db, day=DAY) == f"POS-{DAY}-0008"
@@ -0,0 +1,94 @@
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Agregar src al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.scanner.scan_events import ScanEventBus, format_sse, stream_events
+
+
+class TestScanEventBus:
+    """Tests para el bus de eventos de escaneo"""
+    
+    def test_publish_from_thread_reaches_subscriber(self):
+        """Un evento publicado desde otro hilo llega a la cola del suscriptor"""
+        bus = ScanEventBus()
+        
+        async def scenario():
+            queue = bus.subscribe()
+            thread = threading.Thread(
+                target=bus.publish,
+                args=("scan", {"codigo_barra": "7501000673209"})
+            )
+            thread.start()
+            event = await asyncio.wait_for(queue.get(), timeout=2)
+            thread.join()
+            bus.unsubscribe(queue)
+            return event
+        
+        event = asyncio.run(scenario())
+        assert event["id"] == 1
+        assert event["type"] == "scan"
+        assert event["data"]["codigo_barra"] == "7501000673209"
+        assert bus.get_status()["subscribers"] == 0
+    
+    def test_replay_since_last_event_id(self):
+        """Al reconectar se reenvían los eventos posteriores a Last-Event-ID"""
+        bus = ScanEventBus()
+        for codigo in ("111", "222", "333"):
+            bus.publish("scan", {"codigo_barra": codigo})
+        
+        async def scenario():
+            stream = stream_events(bus, last_event_id=1)
+            chunks = [await stream.__anext__() for _ in range(3)]
+            await stream.aclose()
+            return chunks
+        
+        retry, second, third = asyncio.run(scenario())
+        assert retry.startswith("retry:")
+        assert second == format_sse(bus.events_since(1)[0])
+        assert '"333"' in third
+    
+    def test_replay_does_not_duplicate_live_events(self):
+        """Un evento publicado durante el reenvío se envía una sola vez"""
+        bus = ScanEventBus()
+        for codigo in ("111", "222"):
+            bus.publish("scan", {"codigo_barra": codigo})
+        
+        async def scenario():
+            stream = stream_events(bus, last_event_id=1)
+            chunks = [await stream.__anext__()]
+            # Ya suscrito, antes de leer el historial: queda en la cola y en el historial
+            bus.publish("scan", {"codigo_barra": "333"})
+            chunks += [await stream.__anext__() for _ in range(2)]
+            bus.publish("scan", {"codigo_barra": "444"})
+            chunks.append(await stream.__anext__())
+            await stream.aclose()
+            return chunks
+        
+        retry, second, third, fourth = asyncio.run(scenario())
+        assert '"222"' in second
+        assert '"333"' in third
+        assert '"444"' in fourth
+    
+    def test_slow_subscriber_drops_oldest(self):
+        """Un cliente lento no bloquea: se descartan los eventos más antiguos"""
+        bus = ScanEventBus(queue_size=2)
+        
+        async def scenario():
+            queue = bus.subscribe()
+            for codigo in ("111", "222", "333"):
+                bus.publish("scan", {"codigo_barra": codigo})
+            await asyncio.sleep(0)
+            return [queue.get_nowait()["data"]["codigo_barra"] for _ in range(queue.qsize())]
+        
+        assert asyncio.run(scenario()) == ["222", "333"]
+        assert bus.dropped_count == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,64 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Agregar src al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.scanner.scanner_config import ScannerConfigStore, ScannerConfigError, ScannerConfigVersionError
+from src.scanner.usb_hid_scanner import USBHIDScanner
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = tmp_path / "app_config.json"
+    path.write_text(json.dumps({"api": {"port": 8000}}))
+    return path
+
+
+class TestScannerConfig:
+    """Tests para la configuración de scanners recargable en caliente"""
+    
+    def test_update_swaps_and_persists(self, config_path):
+        """Una actualización crea una versión nueva y conserva el resto del archivo"""
+        store = ScannerConfigStore(path=config_path)
+        initial = store.current
+        
+        updated = store.update(min_barcode_length=6, speed_threshold_ms=90.0)
+        
+        assert updated.version == initial.version + 1
+        assert store.current is updated
+        data = json.loads(config_path.read_text())
+        assert data["api"] == {"port": 8000}
+        assert data["scanner"]["min_barcode_length"] == 6
+        
+        # Un proceso nuevo arranca con la configuración persistida
+        assert ScannerConfigStore(path=config_path).current == updated
+    
+    def test_invalid_and_stale_updates_are_rejected(self, config_path):
+        """Valores incoherentes o versiones viejas no cambian la configuración"""
+        store = ScannerConfigStore(path=config_path)
+        current = store.current
+        
+        with pytest.raises(ScannerConfigError):
+            store.update(min_barcode_length=60, max_barcode_length=50)
+        with pytest.raises(ScannerConfigVersionError):
+            store.update(expected_version=current.version + 5, min_barcode_length=6)
+        
+        assert store.current is current
+    
+    def test_live_scanner_sees_new_config(self, config_path):
+        """El scanner HID usa la nueva configuración sin recrearse"""
+        store = ScannerConfigStore(path=config_path)
+        scanner = USBHIDScanner(config_store=store)
+        
+        store.update(min_barcode_length=4, max_barcode_length=20)
+        
+        assert scanner.min_barcode_length == 4
+        assert scanner.get_status()["config_version"] == store.current.version
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
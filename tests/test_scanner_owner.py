@@ -0,0 +1,57 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Agregar src al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.db.shared_state import InMemoryState
+from src.scanner.scanner_owner import ScannerOwnership
+
+
+class FakeScanner:
+    """Scanner sin hardware: cuenta cuántas veces se arrancó"""
+
+    def __init__(self):
+        self.is_listening = False
+        self.starts = 0
+
+    def start_listening(self):
+        self.starts += 1
+        self.is_listening = True
+        return True
+
+    def stop_listening(self):
+        self.is_listening = False
+
+    def get_status(self):
+        return {"type": "USB-HID", "available": True, "listening": self.is_listening}
+
+
+def test_only_one_worker_starts_the_scanner():
+    """Dos workers piden iniciar el scanner: solo uno toca el hardware"""
+    state = InMemoryState()
+    worker_a, worker_b = ScannerOwnership(state, "host:1"), ScannerOwnership(state, "host:2")
+    scanner_a, scanner_b = FakeScanner(), FakeScanner()
+
+    assert worker_a.acquire(scanner_a, scanner_a.start_listening) is None
+    owner = worker_b.acquire(scanner_b, scanner_b.start_listening)
+    assert owner["worker"] == "host:1"
+    assert owner["status"]["listening"] is True
+    assert (scanner_a.starts, scanner_b.starts) == (1, 0)
+
+    # El otro worker pide la detención al dueño y luego puede tomar el scanner
+    assert worker_b.request_stop()["worker"] == "host:1"
+    assert not scanner_a.is_listening
+    assert worker_b.owner() is None
+    assert worker_b.acquire(scanner_b, scanner_b.start_listening) is None
+    assert worker_a.owned_elsewhere()["worker"] == "host:2"
+    worker_b.release()
+
+
+def test_failed_start_does_not_claim_the_scanner():
+    ownership = ScannerOwnership(InMemoryState(), "host:1")
+    with pytest.raises(RuntimeError):
+        ownership.acquire(FakeScanner(), lambda: False)
+    assert ownership.owner() is None
@@ -0,0 +1,89 @@
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event, inspect, text
+
+# Agregar src al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+pytest.importorskip("alembic")
+
+from src.db import models, models_advanced  # noqa: F401  (registran los modelos)
+from src.db import schema_migrations
+from src.db.database import Base
+from src.db.schema_migrations import ensure_schema, head_revision
+
+
+def _count_statements(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_cold_start_then_revision_check_only(tmp_path):
+    """Primer arranque migra; los siguientes solo comparan la revisión"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'cold.db'}")
+
+    status = ensure_schema(engine)
+    assert status.upgraded and status.previous is None
+    assert status.current == head_revision()
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT value FROM system_config WHERE key = 'tax_rate'")).scalar() == "16.00"
+
+    statements = _count_statements(engine)
+    status = ensure_schema(engine)
+    assert not status.upgraded
+    assert not [s for s in statements if not s.lstrip().upper().startswith(("SELECT", "PRAGMA"))]
+    assert len(statements) <= 3
+
+
+def test_adopts_create_all_database(tmp_path):
+    """Bases creadas con create_all se migran sin marcarlas a mano"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'create_all.db'}")
+    Base.metadata.create_all(engine)
+
+    assert ensure_schema(engine).upgraded
+    assert inspect(engine).has_table("alembic_version")
+
+
+def test_legacy_schema_backfilled_in_chunks(tmp_path, monkeypatch):
+    """Productos y usuarios del esquema simple se copian por lotes"""
+    monkeypatch.setattr(schema_migrations, "BACKFILL_CHUNK_SIZE", 2)
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE productos (codigo_barra VARCHAR PRIMARY KEY, nombre VARCHAR NOT NULL, "
+            "precio FLOAT NOT NULL, descripcion VARCHAR, stock INTEGER, categoria VARCHAR, "
+            "created_at DATETIME, updated_at DATETIME)"
+        ))
+        conn.execute(text("CREATE INDEX ix_productos_codigo_barra ON productos (codigo_barra)"))
+        for i in range(5):
+            conn.execute(
+                text("INSERT INTO productos (codigo_barra, nombre, precio, stock) VALUES (:c, :n, 1.5, 3)"),
+                {"c": f"75000000000{i}", "n": f"Producto {i}"},
+            )
+        conn.execute(text(
+            "CREATE TABLE usuarios (id INTEGER PRIMARY KEY, username VARCHAR NOT NULL, email VARCHAR NOT NULL, "
+            "hashed_password VARCHAR NOT NULL, is_active INTEGER, created_at DATETIME)"
+        ))
+        conn.execute(text(
+            "INSERT INTO usuarios (username, email, hashed_password, is_active) VALUES "
+            "('admin', 'admin@example.com', 'x', 1), ('pedro', 'pedro@example.com', 'y', 0)"
+        ))
+
+    statements = _count_statements(engine)
+    ensure_schema(engine)
+
+    with engine.connect() as conn:
+        productos = conn.execute(text("SELECT id, codigo_barra, stock FROM productos ORDER BY id")).all()
+        users = dict(conn.execute(text("SELECT username, role FROM users")).all())
+
+    assert [p.codigo_barra for p in productos] == [f"75000000000{i}" for i in range(5)]
+    assert all(p.id and p.stock == 3 for p in productos)
+    assert users == {"admin": "ADMIN", "pedro": "CASHIER"}
+    assert not inspect(engine).has_table("productos_legacy")
+    # 5 productos en lotes de 2
+    assert len([s for s in statements if "INSERT INTO productos" in s]) == 3
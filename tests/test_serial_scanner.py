@@ -0,0 +1,109 @@
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Agregar src al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.scanner.serial_scanner import SerialScanner, SERIAL_AVAILABLE
+
+pytestmark = pytest.mark.skipif(
+    not SERIAL_AVAILABLE or os.name == "nt",
+    reason="requiere pyserial y pseudo-terminales POSIX"
+)
+
+
+@pytest.fixture
+def pty_pair():
+    """Par de pseudo-terminales: el scanner lee del esclavo, el test escribe en el maestro"""
+    master, slave = os.openpty()
+    yield master, os.ttyname(slave)
+    os.close(master)
+    os.close(slave)
+
+
+class TestSerialScanner:
+    """Tests para el scanner en modo serie usando un par pty"""
+    
+    def _wait_connected(self, scanner):
+        # pyserial vacía el buffer de entrada al abrir el puerto
+        for _ in range(100):
+            if scanner.stats["connected"]:
+                return
+            threading.Event().wait(0.02)
+        pytest.fail("el scanner no abrió el puerto")
+    
+    def _collect(self, scanner, expected):
+        codes = []
+        done = threading.Event()
+        
+        def callback(barcode):
+            codes.append(barcode)
+            if len(codes) >= expected:
+                done.set()
+        
+        scanner.set_barcode_callback(callback)
+        return codes, done
+    
+    def test_reads_framed_codes(self, pty_pair):
+        """Cada trama terminada en CR/LF llega una vez al callback"""
+        master, port = pty_pair
+        scanner = SerialScanner(port=port, baudrate=9600)
+        codes, done = self._collect(scanner, 3)
+        
+        assert scanner.start_listening()
+        try:
+            self._wait_connected(scanner)
+            # Tramas partidas y varias en una sola escritura
+            os.write(master, b"75010006")
+            os.write(master, b"73209\r\n7501000673308\r")
+            os.write(master, b"\n7501000125643\n")
+            assert done.wait(timeout=3)
+        finally:
+            scanner.stop_listening()
+        
+        assert codes == ["7501000673209", "7501000673308", "7501000125643"]
+        stats = scanner.get_status()["stats"]
+        assert stats["barcodes"] == 3
+        assert stats["last_barcode"] == "7501000125643"
+        assert not scanner.is_listening
+    
+    def test_rejects_invalid_length(self, pty_pair):
+        """Las tramas demasiado cortas se cuentan como rechazadas"""
+        master, port = pty_pair
+        scanner = SerialScanner(port=port)
+        codes, done = self._collect(scanner, 1)
+        
+        scanner.start_listening()
+        try:
+            self._wait_connected(scanner)
+            os.write(master, b"123\r\n7501000673209\r\n")
+            assert done.wait(timeout=3)
+        finally:
+            scanner.stop_listening()
+        
+        assert codes == ["7501000673209"]
+        assert scanner.stats["rejected"] == 1
+    
+    def test_retries_missing_port(self, tmp_path):
+        """Si el puerto no existe el hilo sigue reintentando sin fallar"""
+        scanner = SerialScanner(port=str(tmp_path / "ttyACM9"))
+        scanner.reconnect_max_delay = 0.05
+        
+        assert scanner.start_listening()
+        try:
+            threading.Event().wait(0.3)
+            status = scanner.get_status()
+        finally:
+            scanner.stop_listening()
+        
+        assert status["listening"]
+        assert not status["stats"]["connected"]
+        assert status["stats"]["reconnects"] >= 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,151 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+
+# Agregar src al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.cart import CartManager
+from src.db.data_version import DataVersions
+from src.db.shared_state import (
+    InMemoryState, RateLimiter, SharedState, create_shared_state, is_external_state, prepare_workers
+)
+
+
+PRODUCTO = {"id": 1, "codigo_barra": "7501", "nombre": "Agua", "precio": "8.00", "tax_rate": "16.00", "is_taxable": True}
+
+
+def test_in_memory_state_counters_and_ttl():
+    state = InMemoryState()
+    assert state.incr("a") == 1
+    assert state.incr("a", 2) == 3
+    assert state.setdefault("epoch", "x") == "x"
+    assert state.setdefault("epoch", "y") == "x"
+
+    state.incr("window", ttl=0.05)
+    assert state.get("window") == 1
+    time.sleep(0.06)
+    assert state.get("window") is None
+    assert sorted(state.keys("")) == ["a", "epoch"]
+
+
+def test_backend_from_url():
+    with pytest.raises(TypeError):
+        SharedState()
+    assert isinstance(create_shared_state("memory://"), InMemoryState)
+    with pytest.raises(ValueError):
+        create_shared_state("memcached://localhost")
+
+
+def test_workers_need_external_state():
+    """Varios workers con estado en memoria se reducen a uno"""
+    assert not is_external_state("memory://")
+    assert is_external_state("redis://localhost:6379/0")
+    assert prepare_workers(4, "memory://") == 1
+    assert prepare_workers(1, "memory://") == 1
+
+
+def test_rate_limiter():
+    limiter = RateLimiter(InMemoryState(), "login", limit=2, window_seconds=60)
+    assert not limiter.exceeded("cajero1")
+    limiter.hit("cajero1")
+    limiter.hit("cajero1")
+    assert limiter.exceeded("cajero1")
+    assert not limiter.exceeded("cajero2")
+    limiter.reset("cajero1")
+    assert not limiter.exceeded("cajero1")
+
+
+def test_login_limit_is_per_ip_and_user():
+    """Los intentos fallidos desde una IP no bloquean al usuario en otra caja"""
+    from starlette.requests import Request
+    from src.api.routes.auth_advanced import login_attempt_key
+
+    def request(ip):
+        return Request({"type": "http", "client": (ip, 50000)})
+
+    limiter = RateLimiter(InMemoryState(), "login", limit=1, window_seconds=60)
+    limiter.hit(login_attempt_key(request("10.0.0.9"), "cajero1"))
+    assert limiter.exceeded(login_attempt_key(request("10.0.0.9"), "cajero1"))
+    assert not limiter.exceeded(login_attempt_key(request("10.0.0.2"), "cajero1"))
+
+
+def test_data_versions_shared_between_workers():
+    """Dos workers sobre el mismo estado generan los mismos ETag"""
+    # Base sin tabla de versiones: los contadores viven en el estado compartido
+    state, engine = InMemoryState(), create_engine("sqlite://")
+    worker_a, worker_b = DataVersions(state, engine), DataVersions(state, engine)
+
+    assert worker_a.get("catalog") == worker_b.get("catalog")
+    worker_a.bump("catalog")
+    assert worker_b.get("catalog") == worker_a.get("catalog")
+    assert worker_b.get("catalog").endswith("-1")
+    # Sin estado compartido cada proceso tiene su propia época
+    assert DataVersions().epoch != worker_a.epoch
+
+
+def test_data_versions_follow_database(tmp_path):
+    """Con la revisión 0006 cualquier escritura en la base cambia la versión"""
+    pytest.importorskip("alembic")
+    import sqlite3
+    from src.db.database import Base
+    from src.db.schema_migrations import ensure_schema
+
+    path = tmp_path / "versiones.db"
+    engine = create_engine(f"sqlite:///{path}")
+    ensure_schema(engine)
+    worker_a, worker_b = DataVersions(engine=engine), DataVersions(engine=engine)
+    catalog, config = worker_a.get("catalog"), worker_a.get("config")
+    assert worker_b.get("catalog") == catalog
+
+    # Otro proceso escribe directo en la base, sin pasar por la aplicación
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO productos (codigo_barra, nombre, precio, stock) VALUES ('7501', 'Agua', 8, 1)")
+    assert worker_b.get("catalog") == str(int(catalog) + 1)
+    assert worker_b.get("config") == config
+
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE system_config SET value = value")
+    assert worker_a.get("config") != config
+    engine.dispose()
+
+    # Base sin la tabla de versiones: contador del estado compartido
+    legacy = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(legacy)
+    versions = DataVersions(engine=legacy)
+    versions.bump("catalog")
+    assert versions.get("catalog") == f"{versions.epoch}-1"
+    legacy.dispose()
+
+
+def test_cart_shared_between_workers():
+    """Un escaneo en un worker se ve en el carrito y en el SSE de otro"""
+    state = InMemoryState()
+    worker_a = CartManager(product_resolver=lambda codigo: PRODUCTO if codigo == "7501" else None, state=state)
+    worker_b = CartManager(product_resolver=lambda codigo: pytest.fail("no debe consultar"), state=state)
+
+    async def scenario():
+        queue = worker_b.get_events("lane-1").subscribe()
+        worker_a.scan("lane-1", "7501")
+        event = await asyncio.wait_for(queue.get(), timeout=2)
+        # El código ya está en el carrito: el otro worker no consulta el producto
+        worker_b.scan("lane-1", "7501", quantity=2)
+        second = await asyncio.wait_for(queue.get(), timeout=2)
+        return event, second
+
+    event, second = asyncio.run(scenario())
+    assert event["id"] == 1 and event["data"]["cart"]["items_count"] == 1
+    assert second["id"] == 2 and second["data"]["cart"]["items_count"] == 3
+    assert worker_a.get_cart("lane-1").to_dict()["total"] == 24.0
+    assert worker_a.get_status()["lanes"]["lane-1"]["version"] == 2
+
+    worker_a.consume("lane-1", {"7501": 3})
+    assert worker_b.get_cart("lane-1").items_count == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
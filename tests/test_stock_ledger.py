@@ -0,0 +1,245 @@
+import sys
+import threading
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+# Agregar src al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.cart import CartManager, OutOfStockError
+from src.db import models  # noqa: F401  (registran los modelos)
+from src.db.database import Base
+from src.db.models_advanced import Producto, Sale, StockMovement, StockReservation, User
+from src.db.stock_ledger import StockLedger
+
+STOCK = 50
+
+
+@pytest.fixture
+def Session(tmp_path):
+    """Base SQLite en archivo con un producto de stock limitado"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'stock.db'}", connect_args={"timeout": 30})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with Session() as db:
+        db.add(User(username="cajero1", email="c1@pos.local", password_hash="x", full_name="Cajero Uno"))
+        db.add(Producto(codigo_barra="7501", nombre="Leche", precio=Decimal("25.00"), stock=STOCK))
+        db.commit()
+    yield Session
+    engine.dispose()
+
+
+def _parallel(threads: int, target):
+    errors = []
+
+    def run(i):
+        try:
+            target(i)
+        except Exception as e:  # pragma: no cover - se reporta abajo
+            errors.append(e)
+
+    workers = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert not errors
+
+
+def test_parallel_checkouts_never_oversell(Session):
+    """16 cajas cobrando a la vez piden 240 unidades de 50: nunca hay stock negativo"""
+    from src.api.routes.sales import CreateSaleRequest, process_sale
+
+    sold, rejected = [], []
+
+    def checkout(lane):
+        for _ in range(5):
+            request = CreateSaleRequest(
+                cashier_username="cajero1",
+                items=[{"codigo_barra": "7501", "quantity": 3}],
+                payments=[{"method": "cash", "amount": "75.00"}],
+            )
+            with Session() as db:
+                try:
+                    sold.append(process_sale(request, db, lane_id=str(lane)))
+                except HTTPException as e:
+                    assert e.status_code == 400, e.detail
+                    rejected.append(e.detail)
+
+    _parallel(16, checkout)
+
+    with Session() as db:
+        stock = db.query(Producto.stock).scalar()
+        ledger_total = db.query(func.sum(StockMovement.quantity)).scalar()
+        assert stock >= 0
+        assert len(sold) == STOCK // 3 == db.query(Sale).count()
+        assert stock == STOCK - 3 * len(sold)
+        assert ledger_total == stock - STOCK
+        assert len(rejected) == 16 * 5 - len(sold)
+
+
+def test_parallel_reservations_respect_stock(Session):
+    """Cada carril intenta apartar 8 unidades: solo caben 6 carriles"""
+    held = []
+
+    def reserve(lane):
+        with Session() as db:
+            if StockLedger(db, reservation_seconds=60).reserve(f"lane-{lane}", 1, 8):
+                held.append(lane)
+            db.commit()
+
+    _parallel(12, reserve)
+
+    with Session() as db:
+        assert len(held) == STOCK // 8
+        assert db.query(func.sum(StockReservation.quantity)).scalar() == 8 * len(held)
+
+
+def test_reservations_sale_and_release(Session):
+    with Session() as db:
+        ledger = StockLedger(db, reservation_seconds=60)
+        assert ledger.reserve("1", 1, 30)
+        assert not ledger.reserve("2", 1, 21)
+        assert ledger.reserve("2", 1, 20)
+
+        # Todo el stock está apartado: una venta sin carril no lo puede tomar
+        assert ledger.sell({1: 1}) == {1}
+        # El carril 1 sí cobra lo suyo y su reserva se libera
+        assert ledger.sell({1: 30}, lane_id="1") == set()
+        assert db.query(StockReservation.lane_id).all() == [("2",)]
+
+        ledger.release("2")
+        assert ledger.sell({1: 20}) == set()
+
+        ledger.restock({1: 5})
+        db.commit()
+        assert db.query(Producto.stock).scalar() == 5
+        assert [m.quantity for m in db.query(StockMovement).order_by(StockMovement.id)] == [-30, -20, 5]
+
+
+def test_expired_reservations_do_not_hold_stock(Session):
+    with Session() as db:
+        assert StockLedger(db, reservation_seconds=-1).reserve("1", 1, STOCK)
+        ledger = StockLedger(db, reservation_seconds=60)
+        assert ledger.reserve("2", 1, STOCK)
+        # La reserva nueva ya borró la vencida del producto
+        assert db.query(StockReservation.lane_id).all() == [("2",)]
+        assert ledger.release_expired() == 0
+
+
+def test_cart_reserves_scanned_units(Session):
+    """El carrito aparta lo escaneado; sin stock libre el escaneo no cambia el carrito"""
+    def hold(lane_id, producto_id, quantity):
+        with Session() as db:
+            held = StockLedger(db, reservation_seconds=60).reserve(lane_id, producto_id, quantity)
+            db.commit()
+            return held
+
+    snapshot = {"id": 1, "codigo_barra": "7501", "nombre": "Leche", "precio": "25.00"}
+    manager = CartManager(product_resolver=lambda codigo: snapshot, stock_holder=hold)
+
+    manager.scan("lane-1", "7501", quantity=40)
+    with pytest.raises(OutOfStockError):
+        manager.scan("lane-2", "7501", quantity=11)
+    assert manager.get_cart("lane-2").items_count == 0
+
+    manager.clear("lane-1")
+    assert manager.scan("lane-2", "7501", quantity=11)["items_count"] == 11
+    with Session() as db:
+        assert db.query(StockReservation.lane_id, StockReservation.quantity).all() == [("lane-2", 11)]
+
+
+def test_checkout_never_fails_after_sale_is_recorded(Session, monkeypatch):
+    """Si lo escaneado durante el cobro ya no se puede apartar, la venta igual responde"""
+    from src.api.routes import cart as cart_routes
+
+    available = {"units": STOCK}
+
+    def hold(lane_id, producto_id, quantity):
+        return quantity <= available["units"]
+
+    snapshot = {"id": 1, "codigo_barra": "7501", "nombre": "Leche", "precio": "25.00"}
+    manager = CartManager(product_resolver=lambda codigo: snapshot, stock_holder=hold)
+    monkeypatch.setattr(cart_routes, "get_cart_manager", lambda: manager)
+
+    manager.scan("lane-1", "7501", quantity=2)
+    process_sale = cart_routes.process_sale
+
+    def sale_with_late_scan(*args, **kwargs):
+        # Un escaneo llega mientras se persiste la venta y otro carril se lleva el resto
+        result = process_sale(*args, **kwargs)
+        manager.scan("lane-1", "7501", quantity=1)
+        available["units"] = 0
+        return result
+
+    monkeypatch.setattr(cart_routes, "process_sale", sale_with_late_scan)
+    checkout = cart_routes.CheckoutRequest(
+        cashier_username="cajero1", payments=[{"method": "cash", "amount": "50.00"}])
+    with Session() as db:
+        result = cart_routes.checkout_cart("lane-1", checkout, db)
+
+    assert result["status"] == "success"
+    cart = manager.get_cart("lane-1")
+    assert cart.items_count == 1
+    assert manager.get_events("lane-1").events_since(0)[-1]["type"] == "out_of_stock"
+
+    # Ni un fallo inesperado del carrito convierte la venta cobrada en un 500
+    def broken(*args, **kwargs):
+        raise RuntimeError("estado compartido caído")
+
+    monkeypatch.setattr(cart_routes, "process_sale", process_sale)
+    monkeypatch.setattr(manager, "consume", broken)
+    with Session() as db:
+        assert cart_routes.checkout_cart("lane-1", checkout, db)["status"] == "success"
+        assert db.query(Sale).count() == 2
+
+
+def test_double_checkout_records_one_sale(Session, monkeypatch):
+    """Dos cobros simultáneos del mismo carril registran una sola venta"""
+    from src.api.routes import cart as cart_routes
+
+    snapshot = {"id": 1, "codigo_barra": "7501", "nombre": "Leche", "precio": "25.00"}
+    manager = CartManager(product_resolver=lambda codigo: snapshot, stock_holder=lambda *args: True)
+    monkeypatch.setattr(cart_routes, "get_cart_manager", lambda: manager)
+    manager.scan("lane-1", "7501", quantity=2)
+
+    process_sale = cart_routes.process_sale
+    in_sale = threading.Event()
+
+    def slow_sale(*args, **kwargs):
+        # El segundo click llega mientras el primero persiste la venta
+        in_sale.set()
+        second.start()
+        second.join(timeout=0.2)
+        return process_sale(*args, **kwargs)
+
+    monkeypatch.setattr(cart_routes, "process_sale", slow_sale)
+    checkout = cart_routes.CheckoutRequest(
+        cashier_username="cajero1", payments=[{"method": "cash", "amount": "50.00"}])
+    rejected = []
+
+    def click():
+        with Session() as db:
+            try:
+                cart_routes.checkout_cart("lane-1", checkout, db)
+            except HTTPException as e:
+                rejected.append(e.status_code)
+
+    second = threading.Thread(target=click)
+    with Session() as db:
+        assert cart_routes.checkout_cart("lane-1", checkout, db)["status"] == "success"
+    second.join()
+
+    assert in_sale.is_set()
+    assert rejected == [400]
+    with Session() as db:
+        assert db.query(Sale).count() == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,113 @@
+import logging
+import sys
+from pathlib import Path
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Agregar src al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.api.db_middleware import UnitOfWorkMiddleware
+from src.api.routes import debug
+from src.db.database import get_db
+from src.db.query_stats import get_query_stats, statement_shape
+
+
+def make_app(expose_headers: bool):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    sessions = []
+
+    app = FastAPI()
+    app.add_middleware(UnitOfWorkMiddleware, session_factory=factory, expose_headers=expose_headers)
+
+    def first_dependency(db: Session = Depends(get_db)):
+        sessions.append(db)
+        db.execute(text("SELECT 1"))
+        return db
+
+    @app.get("/")
+    def endpoint(other: Session = Depends(first_dependency), db: Session = Depends(get_db)):
+        sessions.append(db)
+        db.execute(text("SELECT 2"))
+        db.execute(text("SELECT 3"))
+        return {"ok": True}
+
+    @app.get("/items/{item_id}")
+    def lazy_loop(item_id: int, db: Session = Depends(get_db)):
+        # Una consulta por fila: patrón N+1
+        for i in range(12):
+            db.execute(text("SELECT :i"), {"i": i})
+        return {"ok": True}
+
+    @app.get("/lanes/{lane_id}")
+    def lane(lane_id: str, db: Session = Depends(get_db)):
+        db.execute(text("SELECT 1"))
+        return {"ok": True}
+
+    app.include_router(debug.router)
+    return app, sessions
+
+
+def test_one_session_per_request_with_debug_headers():
+    """Las dependencias comparten sesión y se informan las consultas"""
+    app, sessions = make_app(expose_headers=True)
+    response = TestClient(app).get("/")
+
+    assert response.status_code == 200
+    assert sessions[0] is sessions[1]
+    assert response.headers["X-DB-Query-Count"] == "3"
+    assert float(response.headers["X-DB-Query-Ms"]) >= 0
+    assert float(response.headers["X-DB-Session-Ms"]) >= 0
+
+    # Cada request tiene su propia sesión
+    TestClient(app).get("/")
+    assert sessions[2] is not sessions[0]
+
+
+def test_headers_hidden_without_debug():
+    app, _ = make_app(expose_headers=False)
+    response = TestClient(app).get("/")
+    assert "X-DB-Query-Count" not in response.headers
+
+
+def test_statement_shape():
+    assert statement_shape("SELECT *\n  FROM t WHERE id IN (?, ?, ?)") == "SELECT * FROM t WHERE id IN (?, ...)"
+    assert statement_shape("SELECT * FROM t WHERE id = %(id_1)s") == "SELECT * FROM t WHERE id = ?"
+
+
+def test_n_plus_one_warning_and_debug_endpoint(monkeypatch, caplog):
+    """Una consulta repetida en el request genera warning y aparece en /debug/queries"""
+    get_query_stats().reset()
+    app, _ = make_app(expose_headers=False)
+    client = TestClient(app)
+
+    with caplog.at_level(logging.WARNING, logger="src.db.query_stats"):
+        client.get("/items/5")
+    assert "Posible N+1 en GET /items/{item_id}" in caplog.text
+
+    assert client.get("/debug/queries").status_code == 404
+
+    monkeypatch.setenv("DEBUG", "true")
+    report = client.get("/debug/queries").json()
+    endpoint = next(e for e in report["endpoints"] if e["endpoint"] == "GET /items/{item_id}")
+    assert endpoint["max_queries"] == 12
+    assert endpoint["n_plus_one_requests"] == 1
+    assert report["recent"][0]["n_plus_one"] == [{"statement": "SELECT ?", "count": 12}]
+
+
+def test_stats_use_route_template(monkeypatch):
+    """Un valor del path igual a un segmento fijo no deforma la plantilla"""
+    get_query_stats().reset()
+    app, _ = make_app(expose_headers=False)
+    client = TestClient(app)
+    client.get("/lanes/lanes")
+    client.get("/lanes/l")
+
+    monkeypatch.setenv("DEBUG", "true")
+    endpoints = {e["endpoint"]: e for e in client.get("/debug/queries").json()["endpoints"]}
+    assert endpoints["GET /lanes/{lane_id}"]["requests"] == 2